@@ -1,5 +1,5 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox, ttk, scrolledtext
+from tkinter import filedialog, messagebox, ttk, scrolledtext, simpledialog
 from datetime import datetime
 import cv2
 import numpy as np
@@ -24,6 +24,11 @@ try:
     from src.logic import TrafficManager
     from src.database import TrafficDB
     from src.prediction import Predictor
+    from src.motion import overall_skip_ratio
+    from src.sources import describe
+    from src.engine import IntersectionEngine, ALL_LANES, DEF_BK
+    from src.compositor import GridCompositor
+    from src import config
     from ultralytics import YOLO
 except ImportError:
     print("Warning: Some modules not found. Some features may not work.")
@@ -110,6 +115,7 @@ class AdminDashboard:
         # Training Vars
         self.dataset_path = tk.StringVar()
         self.train_epochs = tk.IntVar(value=5)
+        self.train_fused = tk.BooleanVar(value=False)
         
         # Chart Type
         self.chart_type = tk.StringVar(value="bar")
@@ -294,6 +300,8 @@ class AdminDashboard:
         tk.Label(left_panel, text="Epochs (Training Cycles):", bg=self.card_bg).pack()
         tk.Scale(left_panel, variable=self.train_epochs, from_=1, to=50, 
                  orient="horizontal", length=200).pack()
+        tk.Checkbutton(left_panel, text="Fused model (Vehicles + Ambulance/Fire Truck)", 
+                       variable=self.train_fused, bg=self.card_bg).pack(pady=(10, 0))
         
         self.train_btn = tk.Button(left_panel, text="🚀 START TRAINING", bg="#95a5a6", 
                                     fg="white", font=("Arial", 12, "bold"), 
@@ -334,6 +342,18 @@ class AdminDashboard:
         try:
             yaml_path = os.path.join(self.dataset_path.get(), "data.yaml")
             epochs = self.train_epochs.get()
+            fused = self.train_fused.get()
+            
+            # Fused model must know every vehicle class AND the emergency classes
+            if fused:
+                import yaml
+                with open(yaml_path) as f:
+                    names = yaml.safe_load(f).get('names', [])
+                names = list(names.values()) if isinstance(names, dict) else list(names)
+                missing = [c for c in config.FUSED_CLASSES if c not in names]
+                if missing:
+                    raise ValueError(f"Fused dataset is missing classes: {', '.join(missing)}")
+                self.log_msg(f"🔗 Fused training: {len(names)} classes incl. {config.EMERGENCY_CLASSES}")
             
             self.log_msg(f"Loading Model: yolov8n.pt (Nano)...")
             model = YOLO("yolov8n.pt")
@@ -354,7 +374,7 @@ class AdminDashboard:
             latest_run = max(runs, key=os.path.getmtime)
             best_pt = os.path.join(latest_run, "weights", "best.pt")
             
-            target_path = "models/custom_ambulance.pt"
+            target_path = config.FUSED_MODEL_PATH if fused else "models/custom_ambulance.pt"
             shutil.copy(best_pt, target_path)
             
             self.log_msg(f"🏆 SUCCESS! Model saved as '{target_path}'")
@@ -389,7 +409,9 @@ class AdminDashboard:
                      font=("Arial", 11, "bold")).pack(side="left")
             tk.Button(row, text="Browse", command=lambda x=d: self.select_video(x), 
                       bg="#3498db", fg="white").pack(side="left", padx=10)
-            disp = os.path.basename(self.video_paths[d]) if self.video_paths[d] else "No File"
+            tk.Button(row, text="Stream", command=lambda x=d: self.select_stream(x), 
+                      bg="#8e44ad", fg="white").pack(side="left", padx=(0, 10))
+            disp = describe(self.video_paths[d]) if self.video_paths[d] else "No File"
             col = "green" if self.video_paths[d] else "red"
             self.path_labels[d] = tk.Label(row, text=disp, fg=col, bg=self.card_bg)
             self.path_labels[d].pack(side="left")
@@ -417,6 +439,14 @@ class AdminDashboard:
             self.video_paths[d] = path
             self.path_labels[d].config(text=os.path.basename(path), fg="green")
 
+    def select_stream(self, d):
+        # RTSP / HTTP camera URL or a local camera index (0, 1 ...)
+        src = simpledialog.askstring("Live Feed", f"{d}: RTSP / HTTP URL or camera number",
+                                     initialvalue=self.video_paths[d] or "rtsp://")
+        if src and src.strip() not in ("", "rtsp://"):
+            self.video_paths[d] = src.strip()
+            self.path_labels[d].config(text=describe(src), fg="green")
+
     def set_override(self, lane):
         self.manual_override_lane = lane
         self.manual_start_time = time.time()
@@ -432,191 +462,78 @@ class AdminDashboard:
         self.root.withdraw()
         
         try:
-            if not os.path.exists("evidence/violations"): 
-                os.makedirs("evidence/violations")
-            
-            db = TrafficDB()
-            brain = TrafficManager(Predictor(db))
-            detector = TrafficDetector()
-            
-            caps = {d: cv2.VideoCapture(p) for d, p in active.items()}
+            W, H = 640, 360
+            # Detection, signals, challans, DB logs (same engine as the headless runner)
+            engine = IntersectionEngine(active, (W, H), self.config_mgr.get("green_time_default"),
+                                        sound_alerts=self.config_mgr.get("sound_alerts"))
+            readers, gates, clock = engine.readers, engine.gates, engine.clock
+            all_lanes = ALL_LANES
             
-            pair_ns, pair_ew = ['North', 'South'], ['East', 'West']
-            active_pair = 'NS'
-            green_time = self.config_mgr.get("green_time_default")
-            timer_end = time.time() + green_time
-            reason = "Starting..."
-            
-            cnt, SKIP, W, H = 0, 2, 640, 360
-            last_challan_time = {d: 0 for d in ['North', 'South', 'East', 'West']}
-            violation_msg = ""
-            
-            def_bk = {'car':0, 'bike':0, 'heavy':0, 'rickshaw':0}
-            all_lanes = ['North', 'South', 'East', 'West']
-            last_data = {d: {'load':0, 'ambulance':False, 'breakdown':def_bk.copy()} 
-                         for d in all_lanes}
-            curr_data = {d: {'load':0, 'ambulance':False, 'breakdown':def_bk.copy()} 
-                         for d in all_lanes}
-            
-            last_vis = {d: np.zeros((H, W, 3), dtype=np.uint8) for d in all_lanes}
-            vis_map = last_vis.copy()
-            
-            start_time = time.time()
-            current_weather, is_bad_weather = "Clear", False
+            # One preallocated display buffer, lanes are drawn straight into their slices
+            comp = GridCompositor(all_lanes, (W, H))
             last_snap = time.time()
 
             print("✅ Master System Live. Press 'Q' to quit.")
 
             while True:
-                cnt += 1
-                
-                if active_pair == 'NS':
-                    green_lanes = pair_ns
-                    red_lanes = pair_ew
-                elif active_pair == 'EW':
-                    green_lanes = pair_ew
-                    red_lanes = pair_ns
-                else:
-                    green_lanes = []
-                    red_lanes = all_lanes
-
-                for d, cap in caps.items():
-                    ret, frame = cap.read()
-                    if not ret:
-                        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                        ret, frame = cap.read()
-                        if not ret: 
-                            frame = np.zeros((H,W,3), dtype=np.uint8)
-                    
-                    frame = cv2.resize(frame, (W,H))
-                    
-                    if cnt % (SKIP+1) == 0:
-                        try:
-                            p_frame, bk, load, is_amb, weather, bad_wx = detector.analyze_frame(frame)
-                            last_data[d] = {'load':load, 'ambulance':is_amb, 
-                                            'breakdown':bk.copy()}
-                            last_vis[d] = p_frame.copy()
-                            
-                            if bad_wx: 
-                                current_weather, is_bad_weather = weather, True
-                        except:
-                            last_data[d] = {'load':0, 'ambulance':False, 
-                                            'breakdown':def_bk.copy()}
-                            last_vis[d] = frame.copy()
-                        
-                        if (d in red_lanes and 
-                            last_data[d]['load'] > 5 and 
-                            (time.time() - last_challan_time[d] > 3)):
-                            
-                            ts = datetime.now().strftime('%Y%m%d_%H%M%S')
-                            img_name = f"evidence/violations/VIO_{d}_{ts}.jpg"
-                            cv2.imwrite(img_name, frame)
-                            db.log_challan(d, "Red Light Violation", 500, img_name)
-                            violation_msg = f"⚠️ CHALLAN: {d} - Red Light Jump (₹500)"
-                            last_challan_time[d] = time.time()
-                            
-                            if self.config_mgr.get("sound_alerts"):
-                                print("\a")
-
-                    curr_data[d] = last_data[d].copy()
-                    vis_map[d] = last_vis.get(d, frame).copy()
-
-                if self.manual_override_lane and (time.time() - self.manual_start_time < 15):
-                    target = self.manual_override_lane
-                    active_pair = 'NS' if target in pair_ns else 'EW'
-                    reason = f"👮 MANUAL OVERRIDE: {target}"
-                    timer_end = time.time() + 15 
-                    rem = int(15 - (time.time() - self.manual_start_time))
-                else:
+                if self.manual_override_lane:
+                    engine.override(self.manual_override_lane, self.manual_start_time)
                     self.manual_override_lane = None
-                    rem = int(timer_end - time.time())
-                    
-                    if rem <= 0:
-                        rem = 0
-                        dec = brain.decide_phase(curr_data)
-                        active_pair = dec['active_pair']
-                        green_time = dec['time']
-                        timer_end = time.time() + green_time
-                        reason = dec['reason']
-                        
-                        if active_pair != "ALL_RED": 
-                            db.log_signal(active_pair, 0, 0, green_time, False)
-                            start_time = time.time()
+                
+                engine.step()
+                curr_data, reason, rem = engine.curr_data, engine.reason, engine.rem
+                green_lanes, red_lanes = engine.green_lanes, engine.red_lanes
 
-                panels = []
                 any_amb_global = any(curr_data.get(d, {}).get('ambulance', False) 
                                      for d in all_lanes)
+                is_emergency = "AMBULANCE" in reason
                 
+                comp.begin()
                 for d in all_lanes:
                     d_data = curr_data.get(d, {'load':0, 'ambulance':False, 
-                                                'breakdown':def_bk.copy()})
-                    d_frame = vis_map.get(d, np.zeros((H,W,3), dtype=np.uint8)).copy()
-                    
-                    is_green = d in green_lanes
-                    is_red = d in red_lanes
-                    is_emergency = "AMBULANCE" in reason
-                    has_video = d in active
-                    
-                    panel = self.draw_pro_ui(d_frame, d, is_green, is_red, rem, 
-                                             d_data['load'], d_data['ambulance'], 
-                                             d_data['breakdown'], is_emergency, has_video)
-                    panels.append(panel)
-                
-                grid = np.vstack((
-                    np.hstack((panels[0], panels[1])), 
-                    np.hstack((panels[2], panels[3]))
-                ))
-                dh, dw, _ = grid.shape
-                
-                head = np.zeros((60, dw, 3), dtype=np.uint8)
+                                                'breakdown':DEF_BK.copy()})
+                    # Source frame is only read (resized into the panel), never copied
+                    note = None
+                    if d in readers and readers[d].health.state != 'live':
+                        note = f"{readers[d].health.state.upper()}..."
+                    comp.draw_lane(d, engine.last_frames.get(d), engine.display_dets[d], d in green_lanes,
+                                   d in red_lanes, rem, d_data['load'], d_data['ambulance'],
+                                   d_data['breakdown'], is_emergency, d in active, engine.rois.get(d), note)
                 
                 if "AMBULANCE" in reason: 
-                    head[:] = (0, 0, 255)
-                    txt = f"🚨 EMERGENCY: {reason}"
-                elif is_bad_weather: 
-                    head[:] = (50, 50, 50)
-                    txt = f"⚠️ SAFETY MODE: {current_weather}"
+                    head_color, txt = (0, 0, 255), f"🚨 EMERGENCY: {reason}"
+                elif engine.is_bad_weather: 
+                    head_color, txt = (50, 50, 50), f"⚠️ SAFETY MODE: {engine.current_weather}"
                 elif "MANUAL" in reason: 
-                    head[:] = (128, 0, 128)
-                    txt = reason
-                elif (time.time() - max(last_challan_time.values()) < 2): 
-                    head[:] = (0, 165, 255)
-                    txt = violation_msg
+                    head_color, txt = (128, 0, 128), reason
+                elif (clock() - max(engine.last_challan_time.values()) < 2): 
+                    head_color, txt = (0, 165, 255), engine.violation_msg
                 else: 
-                    head[:] = (20, 20, 20)
-                    txt = f"STATUS: {reason}"
-                
-                cv2.putText(head, txt, (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 
-                            0.9, (255, 255, 255), 2)
-                cv2.putText(head, "[Q] Save & Quit", (dw-250, 40), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200,200,200), 1)
+                    head_color, txt = (20, 20, 20), f"STATUS: {reason}"
                 
-                final = np.vstack((head, grid))
-                
-                if dw > 1280: 
-                    final = cv2.resize(final, (1280, 720))
+                right = [("[Q] Save & Quit", 250, 0.7)]
+                if config.MOTION_GATE_ENABLED and gates:
+                    right.append((f"AI Skip: {overall_skip_ratio(gates):.0%}", 420, 0.6))
+                comp.draw_header(head_color, txt, right)
+                final = comp.finish()
                 
                 if any_amb_global and (time.time() - last_snap > 10):
-                    cv2.imwrite(f"evidence/AMB_{datetime.now().strftime('%H%M%S')}.jpg", 
-                                final)
+                    # Copy + background encode (display buffer is reused next frame)
+                    engine.evidence.submit(final, f"AMB_{datetime.now().strftime('%H%M%S')}")
                     last_snap = time.time()
                 
                 cv2.imshow("Ultimate Master AI System - Zero Lag Performance", final)
                 
                 k = cv2.waitKey(1) & 0xFF
                 if k == ord('q'): 
-                    elapsed = int(time.time() - start_time)
-                    if elapsed < 1: 
-                        elapsed = 1
-                    for d in all_lanes:
-                        if curr_data.get(d, {}).get('load', 0) > 0: 
-                            db.log_signal(d, 0, curr_data[d]['load'], elapsed, False)
+                    for line in engine.report() + comp.report():
+                        print(line)
+                    engine.finish()
                     break 
                 if k == ord('s'): 
-                    print(db.export_report())
+                    print(engine.db.export_report())
             
-            for cap in caps.values(): 
-                cap.release()
+            engine.stop()
             cv2.destroyAllWindows()
             self.root.deiconify()
             
@@ -625,81 +542,6 @@ class AdminDashboard:
             cv2.destroyAllWindows()
             self.root.deiconify()
 
-    def draw_pro_ui(self, frame, name, is_green, is_red, rem, load, amb, bk, 
-                     global_emergency, has_video):
-        h, w, _ = frame.shape
-        sidebar = 120
-        total = w + sidebar
-        canvas = np.full((h, total, 3), (30,30,30), dtype=np.uint8)
-        
-        if has_video:
-            overlay = frame.copy()
-            if load < 20: 
-                color, intensity = (0, 255, 0), 0.1
-            elif load < 50: 
-                color, intensity = (0, 255, 255), 0.2
-            else: 
-                color, intensity = (0, 0, 255), 0.3
-            
-            cv2.rectangle(overlay, (0, 0), (w, h), color, -1)
-            cv2.addWeighted(overlay, intensity, frame, 1 - intensity, 0, frame)
-            
-            if is_red:
-                cv2.line(frame, (0, h-50), (w, h-50), (0, 0, 255), 3)
-                cv2.putText(frame, "🛑 STOP LINE", (5, h-55), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-                
-                red_overlay = frame.copy()
-                cv2.rectangle(red_overlay, (0, h-70), (w, h), (0, 0, 255), -1)
-                cv2.addWeighted(red_overlay, 0.2, frame, 0.8, 0, frame)
-        else:
-            cv2.putText(frame, "NO VIDEO FEED", (w//2 - 80, h//2), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (100, 100, 100), 2)
-            if not global_emergency: 
-                is_green = False 
-
-        if amb: 
-            canvas[:] = (0, 0, 50)
-        
-        cx = sidebar // 2
-        c_off, c_red, c_grn = (50,50,50), (0,0,255), (0,255,0)
-        
-        if global_emergency and amb: 
-            is_green = True
-        
-        cv2.circle(canvas, (cx, 40), 18, c_red if is_red else c_off, -1)
-        cv2.circle(canvas, (cx, 85), 18, c_off, -1)
-        cv2.circle(canvas, (cx, 130), 18, c_grn if is_green else c_off, -1)
-        
-        y, f = 180, cv2.FONT_HERSHEY_SIMPLEX
-        if has_video:
-            cv2.putText(canvas, f"Car :{bk['car']}", (10, y), f, 0.45, (200,200,200), 1)
-            cv2.putText(canvas, f"Bike:{bk['bike']}", (10, y+25), f, 0.45, (200,200,200), 1)
-            cv2.putText(canvas, f"Hvy :{bk['heavy']}", (10, y+50), f, 0.45, (200,200,200), 1)
-            cv2.putText(canvas, "DENSITY", (20, y+90), f, 0.5, (0,255,255), 1)
-            cv2.putText(canvas, str(load), (25, y+125), f, 1.2, 
-                        (0,0,255) if load>50 else (0,255,0), 2)
-        else:
-            cv2.putText(canvas, "NO DATA", (20, y+90), f, 0.5, (100,100,100), 1)
-        
-        canvas[:, sidebar:] = frame
-        
-        cv2.rectangle(canvas, (sidebar, h-35), (total, h), (0,0,0), -1)
-        
-        if amb: 
-            t_str, amb_t, amb_c = "PRIORITY", "🚨 GREEN CORRIDOR", (0,0,255)
-        else: 
-            t_str = f"{rem}s" if rem > 0 else "--"
-            amb_t, amb_c = "No Alert", (150,150,150)
-        
-        cv2.putText(canvas, f"Time: {t_str}", (sidebar+20, h-10), 
-                    f, 0.6, (255,255,255), 1)
-        cv2.putText(canvas, f"{amb_t}", (sidebar+160, h-10), f, 0.6, amb_c, 2)
-        
-        cv2.putText(canvas, name, (total-100, 25), f, 0.7, (255,255,255), 2)
-        
-        return canvas
-
     # --- 4. ANALYSIS WITH FIXED CUMULATIVE COUNT TABLE ---
     def show_analysis(self):
         self.clear_content()
@@ -948,7 +790,7 @@ class AdminDashboard:
         for root_dir in ['evidence', 'evidence/violations']:
             if os.path.exists(root_dir):
                 for f in os.listdir(root_dir):
-                    if f.lower().endswith((".jpg", ".jpeg", ".png")): 
+                    if f.lower().endswith((".jpg", ".jpeg", ".png", ".webp")): 
                         self.gallery_images.append(os.path.join(root_dir, f))
         
         self.gallery_images.sort(key=lambda x: os.path.getmtime(x), reverse=True)
@@ -0,0 +1,175 @@
+import os
+import sys
+import time
+import numpy as np
+
+try:
+    from src import config
+except ImportError:
+    import config
+
+# Backend name -> ultralytics export format
+EXPORT_FORMATS = {
+    'onnxruntime': 'onnx',
+    'openvino': 'openvino'
+}
+BACKENDS = ['torch'] + list(EXPORT_FORMATS)
+INT8_BACKENDS = ['openvino']  # Only runtime with a calibrated INT8 export (src/quantize.py)
+
+
+def exported_path(weights, backend, int8=False):
+    """Where ultralytics writes the export for these weights."""
+    base = os.path.splitext(weights)[0]
+    if backend == 'onnxruntime':
+        return base + ".onnx"
+    if backend == 'openvino':
+        return base + ("_int8" if int8 else "") + "_openvino_model"
+    return weights
+
+
+def is_stale(path, weights):
+    """Export older than the .pt it came from (weights retrained since)."""
+    return (os.path.exists(path) and os.path.exists(weights) and
+            os.path.getmtime(path) < os.path.getmtime(weights))
+
+
+def resolve_profile(profile=None, backend=None):
+    """
+    Profile name -> (backend, int8). An explicit backend wins over the profile,
+    but an INT8 profile on a backend that cannot run INT8 is an error (no silent FP32).
+    """
+    profile = profile or config.DETECTOR_PROFILE
+    if profile:
+        if profile not in config.DETECTOR_PROFILES:
+            raise ValueError(f"Unknown detector profile '{profile}' (use one of {list(config.DETECTOR_PROFILES)})")
+        p = config.DETECTOR_PROFILES[profile]
+        backend, int8 = backend or p['backend'], p.get('int8', False)
+        if int8 and backend not in INT8_BACKENDS:
+            raise ValueError(f"Profile '{profile}' is INT8, backend '{backend}' cannot run INT8 "
+                             f"(use one of {INT8_BACKENDS} or an FP32 profile)")
+        return backend, int8
+    return backend or config.INFERENCE_BACKEND, False
+
+
+def load_model(weights, backend=None, int8=False):
+    """
+    Loads YOLO weights on the chosen runtime.
+    Non-torch backends are exported ONCE (dynamic batch, so analyze_frames
+    can still batch lanes) and the export is reused until the .pt changes.
+    Results keep the normal ultralytics box/class/confidence structure.
+    """
+    backend = backend or config.INFERENCE_BACKEND
+    if int8 and backend not in INT8_BACKENDS:
+        raise ValueError(f"INT8 is not available on '{backend}' (use one of {INT8_BACKENDS})")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}' (use one of {BACKENDS})")
+
+    path = exported_path(weights, backend, int8)
+    if int8:
+        # INT8 needs calibration frames -> produced by src/quantize.py, never on the fly
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No INT8 model at {path}. Run: python src/quantize.py <lane videos>")
+        if is_stale(path, weights):
+            raise RuntimeError(f"INT8 model {path} is older than {weights} (retrained?). "
+                               f"Run: python src/quantize.py <lane videos>")
+
+    from ultralytics import YOLO  # Here, so parity / profile helpers import without it
+
+    if backend == 'torch':
+        return YOLO(weights)
+    if int8:
+        print(f"✅ Using INT8 {backend} model: {path}")
+        return YOLO(path, task="detect")
+
+    if not os.path.exists(path) or is_stale(path, weights):
+        print(f"⚙️ Exporting {weights} for {backend} (one time)...")
+        path = YOLO(weights).export(format=EXPORT_FORMATS[backend], dynamic=True)
+    else:
+        print(f"✅ Using cached {backend} export: {path}")
+    return YOLO(path, task="detect")
+
+
+# --- PARITY CHECK (Same detections on every backend?) ---
+def _boxes(result):
+    b = result.boxes
+    return b.xyxy.cpu().numpy(), b.cls.cpu().numpy().astype(int), b.conf.cpu().numpy()
+
+
+def _match(ref, other, iou_min=0.9):
+    """Counts reference boxes found again (same class, IoU >= iou_min)."""
+    try:
+        from src.tracker import iou_matrix
+    except ImportError:
+        from tracker import iou_matrix
+    (rb, rc, rs), (ob, oc, os_) = ref, other
+    iou = iou_matrix(rb, ob)
+    iou[rc[:, None] != oc[None, :]] = 0
+    matched, conf_diff = 0, []
+    for i in range(len(rb)):
+        if iou.shape[1] and iou[i].max() >= iou_min:
+            j = int(iou[i].argmax())
+            matched += 1
+            conf_diff.append(abs(float(rs[i]) - float(os_[j])))
+    return matched, conf_diff
+
+
+def check_parity(frames, weights="yolov8n.pt", backends=None, conf=None):
+    """
+    Runs the same frames through every backend and compares them with torch.
+    Returns {backend: {'recall': .., 'extra': .., 'max_conf_diff': .., 'ms_per_frame': ..}}
+    """
+    backends = backends or BACKENDS
+    conf = config.CONFIDENCE_THRESHOLD if conf is None else conf
+    outputs, timing = {}, {}
+    for name in ['torch'] + [b for b in backends if b != 'torch']:
+        model = load_model(weights, name)
+        model(frames[:1], verbose=False)  # Warmup
+        t0 = time.perf_counter()
+        outputs[name] = [_boxes(r) for r in model(frames, conf=conf, verbose=False)]
+        timing[name] = (time.perf_counter() - t0) * 1000 / len(frames)
+
+    report = {}
+    for name, res in outputs.items():
+        total = found = extra = 0
+        diffs = []
+        for ref, other in zip(outputs['torch'], res):
+            m, d = _match(ref, other)
+            total += len(ref[0]); found += m; extra += len(other[0]) - m
+            diffs += d
+        report[name] = {
+            'recall': found / total if total else 1.0,
+            'extra': extra,
+            'max_conf_diff': max(diffs) if diffs else 0.0,
+            'ms_per_frame': timing[name]
+        }
+    return report
+
+
+def sample_frames(video_path, count=20, size=(640, 360)):
+    import cv2
+    cap = cv2.VideoCapture(video_path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or count
+    frames = []
+    for idx in np.linspace(0, total - 1, count).astype(int):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, int(idx))
+        ret, frame = cap.read()
+        if ret:
+            frames.append(cv2.resize(frame, size))
+    cap.release()
+    return frames
+
+
+if __name__ == "__main__":
+    # Usage: python src/backends.py lane_video.mp4 [weights.pt]
+    if len(sys.argv) < 2:
+        print("Usage: python src/backends.py <video> [weights]")
+        sys.exit(1)
+    frames = sample_frames(sys.argv[1])
+    weights = sys.argv[2] if len(sys.argv) > 2 else "yolov8n.pt"
+    ok = True
+    for name, r in check_parity(frames, weights).items():
+        print(f"{name:12s} recall={r['recall']:.3f} extra={r['extra']} "
+              f"max_conf_diff={r['max_conf_diff']:.3f} {r['ms_per_frame']:.1f} ms/frame")
+        ok = ok and r['recall'] >= 0.95
+    print("✅ PARITY OK" if ok else "❌ PARITY FAILED")
+    sys.exit(0 if ok else 1)
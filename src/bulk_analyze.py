@@ -0,0 +1,224 @@
+import os
+import sys
+import csv
+import time
+import queue
+import argparse
+import threading
+from datetime import datetime, timedelta
+import cv2
+import numpy as np
+
+try:
+    from src.detect import TrafficDetector
+    from src.database import TrafficDB
+    from src.roi import load_lane_rois
+    from src.capture import Decoder
+except ImportError:
+    from detect import TrafficDetector
+    from database import TrafficDB
+    from roi import load_lane_rois
+    from capture import Decoder
+
+COLUMNS = ['timestamp', 'lane', 'car', 'bike', 'heavy', 'rickshaw', 'load_score', 'ambulance', 'frames']
+COUNT_KEYS = ['car', 'bike', 'heavy', 'rickshaw']
+
+
+# --- 1. INPUTS (lane=video, ...) ---
+def parse_sources(args):
+    """['North=a.mp4', 'North=b.mp4', 'c.mp4'] -> {'North': ['a.mp4', 'b.mp4'], 'c': ['c.mp4']}"""
+    sources = {}
+    for a in args:
+        lane, path = a.split('=', 1) if '=' in a else (os.path.splitext(os.path.basename(a))[0], a)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(path)
+        sources.setdefault(lane, []).append(path)
+    return sources
+
+
+def video_info(path):
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    return fps, frames
+
+
+def video_start(path, fps, frames):
+    """No --start given: recording ended at the file's mtime."""
+    return datetime.fromtimestamp(os.path.getmtime(path)) - timedelta(seconds=frames / fps)
+
+
+# --- 2. PARALLEL DECODE (One thread per lane, OpenCV releases the GIL) ---
+class LaneDecoder(threading.Thread):
+    def __init__(self, lane, paths, out_q, every=1, size=(640, 360), start=None):
+        super().__init__(daemon=True)
+        self.lane, self.paths, self.out_q = lane, paths, out_q
+        self.every, self.size, self.clock_start = every, size, start
+        self.decoded = 0
+        self.decode_saved = 0.0
+
+    def run(self):
+        clock = self.clock_start
+        for path in self.paths:
+            fps, frames = video_info(path)
+            t0 = clock if clock is not None else video_start(path, fps, frames)
+            # Frames between the analyzed ones are grab()-only (never turned into pixels)
+            dec = Decoder(path, self.every, self.size)
+            while True:
+                frame, _ = dec.next()
+                if frame is None: break
+                ts = t0 + timedelta(seconds=dec.index / fps)
+                self.out_q.put((self.lane, ts, frame))
+            dec.release()
+            st = dec.stats()
+            self.decoded += st['grabbed']
+            self.decode_saved += st['saved_s']
+            if clock is not None:
+                # Files of one lane are back-to-back recordings
+                clock = t0 + timedelta(seconds=(dec.index + 1) / fps)
+        self.out_q.put((self.lane, None, None))  # End of this lane
+
+
+# --- 3. PER-SECOND AGGREGATION (Video clock) ---
+class SecondAggregator:
+    def __init__(self):
+        self.current = {}  # lane -> [second, n, counts(4), load, ambulance]
+        self.rows = []
+
+    def add(self, lane, ts, breakdown, load, ambulance):
+        sec = ts.replace(microsecond=0)
+        cur = self.current.get(lane)
+        if cur is None or cur[0] != sec:
+            self.close(lane)
+            cur = self.current[lane] = [sec, 0, np.zeros(4), 0, False]
+        cur[1] += 1
+        cur[2] += [breakdown[k] for k in COUNT_KEYS]
+        cur[3] += load
+        cur[4] = cur[4] or ambulance
+
+    def close(self, lane):
+        cur = self.current.pop(lane, None)
+        if cur is None:
+            return
+        sec, n, counts, load, amb = cur
+        self.rows.append([sec, lane] + [round(c / n, 2) for c in counts] + [int(round(load / n)), amb, n])
+
+    def close_all(self):
+        for lane in list(self.current):
+            self.close(lane)
+
+    def take(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+
+# --- 4. OUTPUT (signal_logs and/or columnar file) ---
+def write_columnar(rows, path):
+    cols = {c: [r[i] for r in rows] for i, c in enumerate(COLUMNS)}
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.npz':
+        np.savez_compressed(path, timestamp=np.array(cols['timestamp'], dtype='datetime64[s]'),
+                            lane=np.array(cols['lane']),
+                            **{c: np.array(cols[c]) for c in COLUMNS[2:]})
+    elif ext == '.parquet':
+        try:
+            import pandas as pd
+            pd.DataFrame(cols).to_parquet(path, index=False)
+        except ImportError:
+            raise RuntimeError("Parquet output needs pandas + pyarrow (use .npz or .csv instead)")
+    else:
+        with open(path, 'w', newline='') as fh:
+            w = csv.writer(fh)
+            w.writerow(COLUMNS)
+            w.writerows(rows)
+
+
+def run_bulk(sources, batch=16, every=1, start=None, db=None, out=None, backend=None, profile=None):
+    detector = TrafficDetector(backend=backend, profile=profile)
+    rois = load_lane_rois(sources)
+    for lane, roi in rois.items():
+        detector.state_for(lane, roi)
+
+    # Bounded queue: decoders can't run away from the GPU (RAM stays flat)
+    frames_q = queue.Queue(maxsize=batch * 4)
+    decoders = [LaneDecoder(lane, paths, frames_q, every, start=start) for lane, paths in sources.items()]
+    for d in decoders:
+        d.start()
+
+    agg = SecondAggregator()
+    rows_out = []
+    running = len(decoders)
+    analyzed = 0
+    t0 = last_print = time.perf_counter()
+
+    while running:
+        # Fill one batch (mixed lanes, each lane in decode order)
+        items = [frames_q.get()]
+        while len(items) < batch:
+            try:
+                items.append(frames_q.get_nowait())
+            except queue.Empty:
+                break
+
+        work = []
+        for lane, ts, frame in items:
+            if ts is None:
+                running -= 1
+            else:
+                work.append((lane, ts, frame))
+        if work:
+            results = detector.analyze_batch([(lane, frame, None) for lane, _, frame in work])
+            for (lane, ts, _), (_, bk, load, is_amb, _, _) in zip(work, results):
+                agg.add(lane, ts, bk, load, is_amb)
+            analyzed += len(work)
+
+        done = agg.take()
+        if done:
+            rows_out.extend(done)
+            if db is not None:
+                db.log_signal_bulk([(r[0], r[1], r[6]) for r in done])
+
+        now = time.perf_counter()
+        if now - last_print > 5:
+            print(f"⚡ {analyzed} frames | {analyzed / (now - t0):.1f} FPS")
+            last_print = now
+
+    agg.close_all()
+    done = agg.take()
+    rows_out.extend(done)
+    if db is not None and done:
+        db.log_signal_bulk([(r[0], r[1], r[6]) for r in done])
+    if out:
+        write_columnar(rows_out, out)
+        print(f"📄 Saved {len(rows_out)} rows: {out}")
+
+    elapsed = max(time.perf_counter() - t0, 1e-9)
+    decoded = sum(d.decoded for d in decoders)
+    return {'frames': analyzed, 'seconds': elapsed, 'fps': analyzed / elapsed,
+            'decode_fps': decoded / elapsed, 'rows': len(rows_out),
+            'decode_saved': sum(d.decode_saved for d in decoders)}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Headless bulk analysis of archived lane footage")
+    ap.add_argument("videos", nargs="+", help="lane=video.mp4 (or just video.mp4 -> lane = file name)")
+    ap.add_argument("--batch", type=int, default=16, help="Frames per YOLO call")
+    ap.add_argument("--every", type=int, default=1, help="Analyze every Nth frame (others are never decoded)")
+    ap.add_argument("--start", default=None,
+                    help="Recording start 'YYYY-MM-DD HH:MM:SS' (default: file mtime - duration)")
+    ap.add_argument("--out", default=None, help="Columnar output (.npz / .parquet / .csv)")
+    ap.add_argument("--no-db", action="store_true", help="Do not write signal_logs")
+    ap.add_argument("--backend", default=None)
+    ap.add_argument("--profile", default=None)
+    args = ap.parse_args()
+
+    start = datetime.strptime(args.start, "%Y-%m-%d %H:%M:%S") if args.start else None
+    db = None if args.no_db else TrafficDB()
+    stats = run_bulk(parse_sources(args.videos), args.batch, max(1, args.every), start, db,
+                     args.out, args.backend, args.profile)
+    print(f"🏁 {stats['fps']:.1f} FPS  ({stats['frames']} frames in {stats['seconds']:.1f}s, "
+          f"decode {stats['decode_fps']:.1f} FPS, {stats['rows']} lane-seconds)")
+    if stats['decode_saved']:
+        print(f"⏩ ~{stats['decode_saved']:.1f}s decode saved by grab()-only frames (--every {args.every})")
+    sys.exit(0)
@@ -0,0 +1,276 @@
+import os
+import time
+import queue
+import threading
+import cv2
+
+try:
+    from src import config
+    from src.sources import parse_source, source_kind, open_capture, Backoff, SourceHealth
+except ImportError:
+    import config
+    from sources import parse_source, source_kind, open_capture, Backoff, SourceHealth
+
+POLICIES = ('latest', 'drop_oldest', 'block')
+
+
+class FramePacket:
+    __slots__ = ('frame', 'frame_id', 'timestamp', 'skipped')
+
+    def __init__(self, frame, frame_id, timestamp, skipped=0):
+        self.frame = frame          # BGR image as decoded
+        self.frame_id = frame_id    # Position in the file (None for live streams)
+        self.timestamp = timestamp  # time.time() when the frame was read
+        self.skipped = skipped      # Frames grabbed but never decoded right before this one
+
+
+# --- DECODE PLAN PER LANE ---
+def decode_plan(lane):
+    """-> (every, size): retrieve every Nth frame only, materialized at size (None = native)."""
+    mode = config.DECODE_MODES.get(lane, config.DECODE_MODE_DEFAULT)
+    if mode not in ('full', 'skip'):
+        raise ValueError(f"Unknown decode mode '{mode}' for {lane} (use 'full' / 'skip')")
+    every = config.SKIP_FRAMES + 1 if mode == 'skip' else 1
+    # Tiled lanes are detected at camera resolution
+    size = None if config.TILE_GRIDS.get(lane) else config.DECODE_SIZE
+    return every, size
+
+
+class Decoder:
+    """
+    cv2.VideoCapture that grab()s every frame but only retrieve()s the ones that
+    are used. grab() keeps the stream position / codec state, retrieve() is the
+    part that makes a BGR image (colour conversion + copy, the whole JPEG decode
+    for MJPEG cameras) - frames in between never turn into pixels.
+
+    Delivered frames are the (every)th, (2*every)th ... so they line up with the
+    detection keyframes of DetectionStage.
+    """
+
+    def __init__(self, source, every=1, size=None):
+        self.source = parse_source(source)
+        self.every = max(1, every)
+        self.size = tuple(size) if size else None
+        self.cap = None
+        self.open()
+        self.index = -1
+        self.grabbed = 0
+        self.retrieved = 0
+        self.grab_s = 0.0
+        self.retrieve_s = 0.0
+
+    def open(self):
+        if self.cap is not None:
+            self.cap.release()
+        self.cap = open_capture(self.source)
+        if self.size and source_kind(self.source) == 'device':
+            # Cameras can deliver the small size directly (ignored by file / RTSP backends)
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.size[0])
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.size[1])
+        self.index = -1
+        return self.cap.isOpened()
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def next(self, min_index=None):
+        """
+        -> (frame, skipped). frame is None at the end of the stream.
+        min_index: frames before it are grab()-only (pacing catch-up).
+        """
+        skipped = 0
+        while True:
+            t0 = time.perf_counter()
+            ok = self.cap.grab()
+            self.grab_s += time.perf_counter() - t0
+            if not ok:
+                return None, skipped
+            self.index += 1
+            self.grabbed += 1
+            if (self.index + 1) % self.every == 0 and (min_index is None or self.index >= min_index):
+                break
+            skipped += 1
+
+        t0 = time.perf_counter()
+        ok, frame = self.cap.retrieve()
+        if ok and self.size and (frame.shape[1], frame.shape[0]) != self.size:
+            # Full resolution frame is dropped right here, only the small one travels on
+            frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        self.retrieve_s += time.perf_counter() - t0
+        self.retrieved += 1
+        return (frame if ok else None), skipped
+
+    @property
+    def position(self):
+        return int(self.cap.get(cv2.CAP_PROP_POS_FRAMES)) - 1
+
+    def rewind(self):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        self.index = -1
+
+    def release(self):
+        self.cap.release()
+
+    def stats(self):
+        # Saved = frames never retrieved x measured cost of one retrieve
+        per_retrieve = self.retrieve_s / self.retrieved if self.retrieved else 0.0
+        return {'grabbed': self.grabbed, 'retrieved': self.retrieved,
+                'skipped': self.grabbed - self.retrieved,
+                'decode_s': self.grab_s + self.retrieve_s,
+                'saved_s': (self.grabbed - self.retrieved) * per_retrieve}
+
+
+class CaptureReader(threading.Thread):
+    """
+    One decode thread per lane source. Frames go into a small bounded queue,
+    the processing loop only takes what is ready, so decode and inference overlap
+    and a stalled source never blocks the other lanes.
+
+    policy 'latest'      = only the newest frame is kept (live cameras, lowest latency)
+    policy 'drop_oldest' = queue full -> oldest frame is thrown away
+    policy 'block'       = reader waits for the consumer (files, every frame used)
+
+    Live sources (RTSP / HTTP / camera index) are reopened with a backoff when
+    they drop, self.health has the per-source stats.
+    Decode mode / size come from decode_plan(name) unless every / size are given.
+    """
+
+    def __init__(self, source, name=None, maxsize=None, policy=None, loop=True, every=None, size=False):
+        super().__init__(daemon=True, name=f"capture-{name or source}")
+        self.source = source
+        plan = decode_plan(name)
+        self.every = plan[0] if every is None else every
+        self.size = plan[1] if size is False else size
+        self.decoder = None
+        self.is_file = source_kind(source) == 'file' and os.path.isfile(source)
+        policy = policy or config.CAPTURE_POLICY or ('block' if self.is_file else 'latest')
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown capture policy '{policy}' (use {POLICIES})")
+        self.policy = policy
+        self.loop = loop
+        self.queue = queue.Queue(maxsize=1 if policy == 'latest' else maxsize or config.CAPTURE_QUEUE_SIZE)
+        self.health = SourceHealth(source)
+        self._stop_event = threading.Event()
+
+        # Counters (written by the reader thread only)
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.loops = 0
+        self.last_read = None
+        self.alive = False
+        self._skip_to = None
+
+    # --- READER THREAD ---
+    def run(self):
+        dec = self.decoder = Decoder(self.source, self.every, self.size)
+        backoff = Backoff()
+        connected = dec.isOpened()
+        while not self._stop_event.is_set():
+            if connected:
+                self.alive = True
+                self.health.on_connect()
+                before = self.health.frames
+                if self._read_until_failure(dec) or self._stop_event.is_set():
+                    break  # File ended (no loop) / stop requested
+                if self.health.frames > before:
+                    backoff.reset()  # Stream worked for a while, start again at the short delay
+                error = "stream ended"
+            else:
+                error = "cannot open source"
+            self.alive = False
+
+            if self.is_file or not config.SOURCE_RECONNECT:
+                self.health.on_failure(error)
+                break
+            delay = backoff.next_delay()
+            self.health.on_failure(error, retry_in=delay)
+            print(f"⚠️ {self.name}: {error}, reconnecting in {delay:.1f}s")
+            if self._stop_event.wait(delay):
+                break
+            connected = dec.open()
+        self.alive = False
+        if self.health.state == 'live':
+            self.health.state = 'ended'
+        dec.release()
+
+    def _read_until_failure(self, dec):
+        """Reads until the source fails (False) or a file is done / stop requested (True)."""
+        while not self._stop_event.is_set():
+            frame, skipped = dec.next(self._skip_to)
+            self._skip_to = None
+            if frame is None:
+                if self.is_file and self.loop and self.frames_read:
+                    dec.rewind()
+                    self.loops += 1
+                    continue
+                return self.is_file
+
+            frame_id = dec.position if self.is_file else None
+            self.last_read = time.time()
+            self.frames_read += 1
+            self.health.on_frame(self.last_read)
+            self._put(FramePacket(frame, frame_id, self.last_read, skipped))
+        return True
+
+    def _put(self, packet):
+        if self.policy == 'block':
+            while not self._stop_event.is_set():
+                try:
+                    self.queue.put(packet, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+            return
+        while True:
+            try:
+                self.queue.put_nowait(packet)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.frames_dropped += 1
+                except queue.Empty:
+                    pass
+
+    # --- CONSUMER SIDE ---
+    def read(self, timeout=0):
+        """Next ready frame or None (timeout=0 -> never waits)."""
+        try:
+            if timeout:
+                return self.queue.get(timeout=timeout)
+            return self.queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def skip_to(self, frame_index):
+        """Files: frames before frame_index are never decoded (pacer catch-up)."""
+        if self.is_file:
+            self._skip_to = frame_index
+
+    def stop(self):
+        self._stop_event.set()
+
+    @property
+    def backlog(self):
+        return self.queue.qsize()
+
+    def decode_stats(self):
+        return self.decoder.stats() if self.decoder else {}
+
+
+def open_readers(sources, **kwargs):
+    """{'North': 'north.mp4', ...} -> {'North': started CaptureReader, ...}"""
+    readers = {d: CaptureReader(src, name=d, **kwargs) for d, src in sources.items()}
+    for r in readers.values():
+        r.start()
+    return readers
+
+
+def wait_any(readers, timeout=0.05):
+    """Sleeps until at least one reader has a frame (or timeout) - no busy loop."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if any(r.backlog for r in readers.values()):
+            return True
+        time.sleep(0.002)
+    return False
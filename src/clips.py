@@ -0,0 +1,273 @@
+import os
+import time
+import queue
+import threading
+from collections import deque
+import cv2
+
+try:
+    from src import config
+    from src.database import TrafficDB
+    from src.evidence import DiskBudget
+except ImportError:
+    import config
+    from database import TrafficDB
+    from evidence import DiskBudget
+
+VIDEO_EXTS = ('.mp4', '.avi', '.mkv')
+
+
+class LaneRing:
+    """Last CLIP_PRE_SECONDS of one lane as small JPEGs, never more than CLIP_RING_MB."""
+
+    def __init__(self, seconds, max_bytes, size, quality):
+        self.seconds = seconds
+        self.max_bytes = max_bytes
+        self.size = tuple(size) if size else None
+        self.params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+        self.frames = deque()  # (timestamp, jpeg buffer)
+        self.bytes = 0
+
+    def shrink(self, frame):
+        """Frame loop part: own small copy of the frame (no encode)."""
+        if self.size and frame.shape[1::-1] != self.size:
+            return cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        return frame.copy()
+
+    def push(self, small, ts):
+        ok, buf = cv2.imencode('.jpg', small, self.params)
+        if not ok:
+            return None
+        item = (ts, buf)
+        self.frames.append(item)
+        self.bytes += buf.nbytes
+        while len(self.frames) > 1 and (ts - self.frames[0][0] > self.seconds or self.bytes > self.max_bytes):
+            self.bytes -= self.frames.popleft()[1].nbytes
+        return item
+
+    @property
+    def span(self):
+        return self.frames[-1][0] - self.frames[0][0] if len(self.frames) > 1 else 0.0
+
+
+class ClipRecorder(threading.Thread):
+    """
+    Before / after clips of violations and ambulances.
+
+    - push() (frame loop): frame -> CLIP_SIZE copy into the inbox, the only
+      per-frame cost. A full inbox (CLIP_INBOX_SIZE) skips the frame (counted)
+    - Ring thread: inbox frames -> JPEG into the lane's ring. trigger() goes
+      through the same inbox (never skipped), so it sees the ring as it was:
+      copies it (references, no re-encode) and keeps adding that lane's frames
+      for CLIP_POST_SECONDS
+    - Encoder thread: JPEGs -> video file (temp name + rename), then
+      challans.clip_path is set on the row with the linked event_id (own SQLite connection).
+      The row may not exist yet (evidence writer) -> retried until CLIP_LINK_TIMEOUT
+
+    A full encoder queue drops the clip (counted), it never blocks the frame loop.
+    """
+
+    def __init__(self, lanes, db_path=None, root=None):
+        super().__init__(daemon=True, name="clip-encoder")
+        self.db_path = db_path
+        self.root = os.path.join(root or config.EVIDENCE_DIR, "clips")
+        os.makedirs(self.root, exist_ok=True)
+        max_bytes = int(config.CLIP_RING_MB * 1024 * 1024)
+        self.rings = {d: LaneRing(config.CLIP_PRE_SECONDS, max_bytes, config.CLIP_SIZE, config.CLIP_QUALITY)
+                      for d in lanes}
+        self.recording = []  # Events still collecting "after" frames (ring thread)
+        self.inbox = queue.Queue()  # Frames (bounded by hand, see push) + triggers
+        self.queue = queue.Queue(maxsize=config.CLIP_QUEUE_SIZE)
+        self.pending = []  # (event_id, clip_path, deadline) waiting for their challans row
+        self.disk = DiskBudget(self.root, VIDEO_EXTS, config.CLIP_BUDGET_MB)
+        self.ringer = threading.Thread(target=self._ring_loop, daemon=True, name="clip-ring")
+        self._closing = threading.Event()
+        self._stop_event = threading.Event()
+
+        # Metrics
+        self.pushes = 0
+        self.push_s = 0.0
+        self.skipped = 0
+        self.jpegs = 0
+        self.jpeg_s = 0.0
+        self.triggered = 0
+        self.written = 0
+        self.linked = 0
+        self.unlinked = 0
+        self.dropped = 0
+        self.failed = 0
+        self.max_depth = 0
+        self.encode_s = 0.0
+
+    def start(self):
+        self.ringer.start()
+        super().start()
+
+    # --- FRAME LOOP ---
+    def push(self, lane, frame, ts):
+        t0 = time.perf_counter()
+        if self.inbox.qsize() >= config.CLIP_INBOX_SIZE:
+            self.skipped += 1  # Ring thread behind, the ring just gets a gap
+        else:
+            self.inbox.put(('frame', lane, self.rings[lane].shrink(frame), ts))
+        self.push_s += time.perf_counter() - t0
+        self.pushes += 1
+
+    def trigger(self, lane, name, link=None):
+        """
+        name = file name without extension ('VIO_North_...').
+        link = event_id of the challan this clip belongs to (None = not linked).
+        Returns the clip path it will be written to.
+        """
+        path = os.path.join(self.root, name + config.CLIP_EXT)
+        self.inbox.put(('trigger', lane, path, link))
+        self.triggered += 1
+        return path
+
+    # --- RING THREAD ---
+    def _ring_loop(self):
+        while not (self._closing.is_set() and self.inbox.empty()):
+            try:
+                kind, *args = self.inbox.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if kind == 'trigger':
+                self._start_event(*args)  # lane, path, link
+            else:
+                self._add_frame(*args)  # lane, small frame, ts
+        # Open events are written with the frames they have
+        for ev in self.recording:
+            self._enqueue(ev)
+        self.recording = []
+
+    def _add_frame(self, lane, small, ts):
+        t0 = time.perf_counter()
+        item = self.rings[lane].push(small, ts)
+        self.jpeg_s += time.perf_counter() - t0
+        self.jpegs += 1
+        if item is None or not self.recording:
+            return
+        for ev in self.recording:
+            if ev['lane'] == lane:
+                ev['frames'].append(item)
+        # Done once the lane is past the end (or it stalled and another lane is well past it)
+        done = [ev for ev in self.recording
+                if ts >= ev['until'] + (0 if ev['lane'] == lane else config.CLIP_POST_SECONDS)]
+        for ev in done:
+            self.recording.remove(ev)
+            self._enqueue(ev)
+
+    def _start_event(self, lane, path, link):
+        ring = self.rings[lane]
+        ts = ring.frames[-1][0] if ring.frames else time.time()
+        self.recording.append({'lane': lane, 'path': path, 'link': link,
+                               'frames': list(ring.frames), 'until': ts + config.CLIP_POST_SECONDS})
+
+    def _enqueue(self, ev):
+        if len(ev['frames']) < 2:
+            self.dropped += 1
+            return
+        try:
+            self.queue.put_nowait(ev)
+        except queue.Full:
+            self.dropped += 1
+            print(f"⚠️ Clip encoder busy, dropped {os.path.basename(ev['path'])}")
+            return
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    # --- ENCODER THREAD ---
+    def run(self):
+        db = TrafficDB(self.db_path) if self.db_path else TrafficDB()
+        while not (self._stop_event.is_set() and self.queue.empty()):
+            self._link(db)
+            try:
+                ev = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            t0 = time.perf_counter()
+            try:
+                size = self._encode(ev)
+            except (IOError, OSError, cv2.error) as e:
+                self.failed += 1
+                print(f"❌ Clip write failed ({ev['path']}): {e}")
+                continue
+            self.encode_s += time.perf_counter() - t0
+            self.written += 1
+            self.disk.add(ev['path'], size)
+            if ev['link']:
+                self.pending.append((ev['link'], ev['path'], time.time() + config.CLIP_LINK_TIMEOUT))
+        self._link(db, final=True)
+        db.conn.close()
+
+    def _link(self, db, final=False):
+        """Sets clip_path on challans rows that exist by now, gives up after CLIP_LINK_TIMEOUT."""
+        now = time.time()
+        waiting = []
+        for event, clip, deadline in self.pending:
+            if db.attach_clip(event, clip):
+                self.linked += 1
+            elif final or now > deadline:
+                self.unlinked += 1
+                print(f"⚠️ No challan row for {event}, clip {os.path.basename(clip)} left unlinked")
+            else:
+                waiting.append((event, clip, deadline))
+        self.pending = waiting
+
+    def _encode(self, ev):
+        frames = ev['frames']
+        # Clip plays at the rate the lane was actually shown (skipped / dropped frames included)
+        span = frames[-1][0] - frames[0][0]
+        fps = min(60.0, max(1.0, (len(frames) - 1) / span)) if span > 0 else 10.0
+        first = cv2.imdecode(frames[0][1], cv2.IMREAD_COLOR)
+        h, w = first.shape[:2]
+        root, ext = os.path.splitext(ev['path'])
+        tmp = root + ".part" + ext  # Container is picked from the extension
+        out = cv2.VideoWriter(tmp, cv2.VideoWriter_fourcc(*config.CLIP_CODEC), fps, (w, h))
+        if not out.isOpened():
+            raise IOError(f"VideoWriter could not open {config.CLIP_CODEC} / {ext}")
+        try:
+            out.write(first)
+            for _, buf in frames[1:]:
+                out.write(cv2.imdecode(buf, cv2.IMREAD_COLOR))
+        finally:
+            out.release()
+        os.replace(tmp, ev['path'])
+        return os.path.getsize(ev['path'])
+
+    def stop(self, timeout=10.0):
+        """Open events are written with the frames they have, queued clips are encoded (up to timeout)."""
+        self._closing.set()
+        if self.ringer.is_alive():
+            self.ringer.join(timeout)
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    # --- METRICS ---
+    @property
+    def backlog(self):
+        """Clips waiting for the encoder + clips still recording."""
+        return self.queue.qsize() + len(self.recording)
+
+    @property
+    def inbox_bytes(self):
+        """Small frames waiting for the ring thread (roughly, qsize * frame size)."""
+        w, h = config.CLIP_SIZE or (0, 0)
+        return self.inbox.qsize() * w * h * 3
+
+    @property
+    def ring_bytes(self):
+        return sum(r.bytes for r in self.rings.values()) + self.inbox_bytes
+
+    def report(self):
+        lines = [f"🎬 {d} ring: {r.bytes / 1048576:.2f} MB, {len(r.frames)} frames ({r.span:.1f}s)"
+                 for d, r in self.rings.items()]
+        push_ms = 1000 * self.push_s / self.pushes if self.pushes else 0.0
+        jpeg_ms = 1000 * self.jpeg_s / self.jpegs if self.jpegs else 0.0
+        enc_ms = 1000 * self.encode_s / self.written if self.written else 0.0
+        lines.append(f"🎬 Clips: {self.triggered} triggered, {self.written} written ({self.linked} linked, "
+                     f"{self.unlinked} unlinked), {self.dropped} dropped, {self.failed} failed, {enc_ms:.0f} ms/clip, "
+                     f"{push_ms:.2f} ms/frame loop + {jpeg_ms:.2f} ms/frame ring thread, "
+                     f"{self.skipped} frames skipped, backlog {self.backlog} (max {self.max_depth}), "
+                     f"{self.disk.bytes / 1048576:.1f} MB on disk")
+        return lines
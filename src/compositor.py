@@ -0,0 +1,191 @@
+import time
+import cv2
+import numpy as np
+
+try:
+    from src import config
+    from src.render import draw_detections
+except ImportError:
+    import config
+    from render import draw_detections
+
+LANES = ('North', 'South', 'East', 'West')
+F = cv2.FONT_HERSHEY_SIMPLEX
+C_OFF, C_RED, C_GRN = (50, 50, 50), (0, 0, 255), (0, 255, 0)
+DENSITY_TINT = ((20, (0, 255, 0), 0.1), (50, (0, 255, 255), 0.2), (None, (0, 0, 255), 0.3))
+
+
+class GridCompositor:
+    """
+    Control-room screen: header + 2x2 lane panels (sidebar | video), drawn straight
+    into ONE preallocated buffer at the display size.
+
+    - Lane video is resized directly into its slice (no per-lane canvas, no hstack/vstack,
+      no final resize of the whole grid)
+    - Density tint / red stop-line band are blended in place with cached colour layers
+    - Sidebar backgrounds with the light housings are cached, only lit lights and numbers
+      are drawn per frame
+
+    The layout is the old 1520x780 design (120 px sidebar + 640x360 video, 60 px header)
+    scaled to DISPLAY_SIZE, text positions scale with it.
+    """
+
+    def __init__(self, lanes=LANES, frame_size=(640, 360), size=None, sidebar=120, header=60):
+        self.lanes = list(lanes)
+        fw, fh = frame_size
+        self.size = tuple(size or config.DISPLAY_SIZE)
+        ow, oh = self.size
+        pw = sidebar + fw
+        self.sx = ow / (2 * pw)
+        self.sy = oh / (header + 2 * fh)
+        self.fs = (self.sx + self.sy) / 2  # Font scale
+        self.out = np.zeros((oh, ow, 3), np.uint8)
+
+        def X(v): return int(round(v * self.sx))
+        def Y(v): return int(round(v * self.sy))
+
+        self.header = self.out[:Y(header)]
+        self.panels = {}
+        for i, d in enumerate(self.lanes[:4]):
+            r, c = divmod(i, 2)
+            x0, y0 = X(c * pw), Y(header + r * fh)
+            x1, x2, y1 = X(c * pw + sidebar), X((c + 1) * pw), Y(header + (r + 1) * fh)
+            self.panels[d] = (self.out[y0:y1, x0:x1], self.out[y0:y1, x1:x2])
+
+        self._sidebars = {}   # (shape, amb, has_video) -> background
+        self._layers = {}     # (shape, colour) -> solid colour layer
+        self._no_video = {}   # shape -> "NO VIDEO FEED" panel
+        self.frames = 0
+        self.seconds = 0.0
+        self._t0 = None
+
+    # --- CACHED STATIC LAYERS ---
+    def _px(self, x, y):
+        return int(x * self.sx), int(y * self.sy)
+
+    def _t(self, v):
+        return max(1, int(round(v * self.fs)))
+
+    def _layer(self, shape, color):
+        key = (shape, color)
+        if key not in self._layers:
+            self._layers[key] = np.full(shape, color, np.uint8)
+        return self._layers[key]
+
+    def _sidebar_bg(self, shape, amb, has_video):
+        key = (shape, amb, has_video)
+        if key not in self._sidebars:
+            bg = np.full(shape, (0, 0, 50) if amb else (30, 30, 30), np.uint8)
+            cx = 60
+            for cy in (40, 85, 130):
+                cv2.circle(bg, self._px(cx, cy), self._t(18), C_OFF, -1)
+            if has_video:
+                cv2.putText(bg, "DENSITY", self._px(20, 270), F, 0.5 * self.fs, (0, 255, 255), 1)
+            else:
+                cv2.putText(bg, "NO DATA", self._px(20, 270), F, 0.5 * self.fs, (100, 100, 100), 1)
+            self._sidebars[key] = bg
+        return self._sidebars[key]
+
+    def _no_video_panel(self, shape):
+        if shape not in self._no_video:
+            img = np.zeros(shape, np.uint8)
+            h, w = shape[:2]
+            cv2.putText(img, "NO VIDEO FEED", (w // 2 - self._t(80), h // 2), F, 0.7 * self.fs,
+                        (100, 100, 100), self._t(2))
+            self._no_video[shape] = img
+        return self._no_video[shape]
+
+    # --- PER FRAME ---
+    def begin(self):
+        self._t0 = time.perf_counter()
+
+    def draw_lane(self, name, frame, dets, is_green, is_red, rem, load, amb, bk,
+                  global_emergency, has_video, roi=None, note=None):
+        side, video = self.panels[name]
+        h, w = video.shape[:2]
+
+        if has_video and frame is not None:
+            fh, fw = frame.shape[:2]
+            cv2.resize(frame, (w, h), dst=video)
+            if dets is not None and len(dets):
+                draw_detections(video, dets.scaled(w / fw, h / fh))
+            if note:
+                cv2.putText(video, note, (20, h // 2), F, self.fs, (0, 0, 255), 2)
+
+            # Density tint (in place)
+            for limit, color, intensity in DENSITY_TINT:
+                if limit is None or load < limit:
+                    break
+            cv2.addWeighted(video, 1 - intensity, self._layer(video.shape, color), intensity, 0, dst=video)
+
+            if is_red:
+                # Lane ROI stop line if configured, else default row
+                stop_line = roi.stop_line_px(video.shape) if roi is not None else None
+                p1, p2 = stop_line if stop_line else ((0, h - int(50 * self.sy)), (w, h - int(50 * self.sy)))
+                line_y = min(p1[1], p2[1])
+                cv2.line(video, p1, p2, C_RED, self._t(3))
+                cv2.putText(video, "🛑 STOP LINE", (min(p1[0], p2[0]) + 5, line_y - 5), F,
+                            0.6 * self.fs, C_RED, 2)
+                band = video[max(0, line_y - int(20 * self.sy)):]
+                cv2.addWeighted(band, 0.8, self._layer(video.shape, C_RED)[:len(band)], 0.2, 0, dst=band)
+        else:
+            np.copyto(video, self._no_video_panel(video.shape))
+            if not global_emergency:
+                is_green = False
+
+        if global_emergency and amb:
+            is_green = True
+
+        # Sidebar: cached background + lit lights + numbers
+        np.copyto(side, self._sidebar_bg(side.shape, bool(amb), bool(has_video)))
+        r = self._t(18)
+        if is_red:
+            cv2.circle(side, self._px(60, 40), r, C_RED, -1)
+        if is_green:
+            cv2.circle(side, self._px(60, 130), r, C_GRN, -1)
+        if has_video:
+            fs = 0.45 * self.fs
+            cv2.putText(side, f"Car :{bk['car']}", self._px(10, 180), F, fs, (200, 200, 200), 1)
+            cv2.putText(side, f"Bike:{bk['bike']}", self._px(10, 205), F, fs, (200, 200, 200), 1)
+            cv2.putText(side, f"Hvy :{bk['heavy']}", self._px(10, 230), F, fs, (200, 200, 200), 1)
+            cv2.putText(side, str(load), self._px(25, 305), F, 1.2 * self.fs,
+                        C_RED if load > 50 else C_GRN, 2)
+
+        # Bottom bar + labels over the video
+        video[h - int(35 * self.sy):] = 0
+        if amb:
+            t_str, amb_t, amb_c = "PRIORITY", "🚨 GREEN CORRIDOR", C_RED
+        else:
+            t_str = f"{rem}s" if rem > 0 else "--"
+            amb_t, amb_c = "No Alert", (150, 150, 150)
+        cv2.putText(video, f"Time: {t_str}", (int(20 * self.sx), h - int(10 * self.sy)), F,
+                    0.6 * self.fs, (255, 255, 255), 1)
+        cv2.putText(video, amb_t, (int(160 * self.sx), h - int(10 * self.sy)), F, 0.6 * self.fs, amb_c, 2)
+        cv2.putText(video, name, (w - int(100 * self.sx), int(25 * self.sy)), F, 0.7 * self.fs,
+                    (255, 255, 255), 2)
+
+    def draw_header(self, color, text, right=()):
+        """right = [(text, x from the right edge in old 1520 px units, font scale), ...]"""
+        head = self.header
+        head[:] = color
+        w = head.shape[1]
+        y = int(40 * self.sy)
+        cv2.putText(head, text, (int(20 * self.sx), y), F, 0.9 * self.fs, (255, 255, 255), 2)
+        for txt, dx, scale in right:
+            cv2.putText(head, txt, (w - int(dx * self.sx), y), F, scale * self.fs, (200, 200, 200), 1)
+
+    def finish(self):
+        """-> the display buffer (same array every frame, copy it to keep it)."""
+        if self._t0 is not None:
+            self.seconds += time.perf_counter() - self._t0
+            self.frames += 1
+            self._t0 = None
+        return self.out
+
+    @property
+    def ms_per_frame(self):
+        return 1000 * self.seconds / self.frames if self.frames else 0.0
+
+    def report(self):
+        return [f"🖼️ Compositor: {self.ms_per_frame:.2f} ms/frame over {self.frames} frames "
+                f"({self.size[0]}x{self.size[1]})"]
@@ -3,9 +3,27 @@
 # 1. Detection Settings
 MODEL_PATH = "models/yolov8n.pt"
 CONFIDENCE_THRESHOLD = 0.45  # 45% sure hone par hi maano
+# Inference runtime: 'torch' (default), 'onnxruntime' or 'openvino'
+# Non-torch backends export the weights once and reuse the cached export
+INFERENCE_BACKEND = "torch"
+# Named detector profiles (TrafficDetector(profile="int8"))
+# 'int8' needs a one-time calibration run: python src/quantize.py <lane videos>
+DETECTOR_PROFILE = None       # None = INFERENCE_BACKEND at FP32
+DETECTOR_PROFILES = {
+    'fp32': {'backend': 'torch', 'int8': False},
+    'onnx': {'backend': 'onnxruntime', 'int8': False},
+    'openvino': {'backend': 'openvino', 'int8': False},
+    'int8': {'backend': 'openvino', 'int8': True}
+}
+# Failed YOLO passes in a row before the pipeline stops (instead of running blind)
+DETECTOR_MAX_FAILURES = 5
 
 # 2. Vehicle Weights (Phase 1 - Feature 2)
 # Density Calculation ke liye points system
+# Weights are relative to a car: load_score = 4 points per car-equivalent
+# (1 car = 4, 1 bike = 2, 1 bus = 6). Same scale as the old "4 per vehicle"
+# score, so the challan threshold (load > 5 = more than one car), the
+# density bands in logic.py and old signal_logs rows for prediction still fit.
 VEHICLE_WEIGHTS = {
     'motorbike': 1,
     'bicycle': 1,
@@ -25,4 +43,120 @@ EMERGENCY_CLASSES = ['ambulance', 'fire_truck']
 EMERGENCY_CLEARANCE_TIME = 20  # Ambulance ke liye kitna time dena hai
 
 # 5. Anti-Starvation (Phase 1 - Feature 4)
-MAX_WAIT_CYCLES = 3  # Agar koi lane 3 baar se red hai, to use priority do
\ No newline at end of file
+MAX_WAIT_CYCLES = 3  # Agar koi lane 3 baar se red hai, to use priority do
+
+# 6. Lane Regions of Interest (ROI)
+# Coordinates are normalized (0.0 - 1.0) so they work at any resolution.
+# 'polygon'   = approach lane (opposite-direction traffic, sky, sidewalks ignored)
+# 'stop_line' = ((x1, y1), (x2, y2)) segment drawn when the lane is RED
+# Jo lane yahan nahi hai, uska poora frame use hoga
+LANE_ROIS = {
+    # 'North': {
+    #     'polygon': [(0.35, 0.30), (0.65, 0.30), (0.95, 1.00), (0.05, 1.00)],
+    #     'stop_line': ((0.10, 0.86), (0.90, 0.86))
+    # },
+}
+
+# 7. Motion Gate (Skip YOLO when the road is static - night / off-peak)
+MOTION_GATE_ENABLED = True
+MOTION_THRESHOLD = 0.01       # Fraction of changed pixels needed to run detection
+MOTION_PIXEL_DELTA = 25       # Gray-level change that counts as "changed"
+MOTION_FORCE_INTERVAL = 10    # Seconds - full pass anyway (safety net)
+
+# 8. Tracker (IoU + Kalman between detection keyframes)
+TRACKER_ENABLED = True
+SKIP_FRAMES = 2          # YOLO runs every (SKIP_FRAMES + 1)th frame, tracker fills the gap
+TRACKER_IOU = 0.3        # Min IoU to match a detection with a predicted track
+TRACKER_MAX_AGE = 3      # Keyframes a track may go unmatched before it is dropped
+TRACKER_MIN_HITS = 2     # Keyframe matches needed before a vehicle is counted
+
+# 9. Fused Model (Vehicles + Emergency classes in ONE forward pass)
+# Trained from the Training Lab with the "Fused model" option
+FUSED_MODEL_PATH = "models/fused_traffic.pt"
+FUSED_CLASSES = ['bicycle', 'car', 'motorbike', 'bus', 'truck'] + EMERGENCY_CLASSES
+USE_FUSED_MODEL = True          # Use the fused model whenever it exists
+KEEP_AMBULANCE_ENSEMBLE = False # Also run custom_ambulance.pt + hybrid heuristics on top
+
+# 10. Tiled Inference (High-resolution / 4K overhead cameras)
+# Lane -> (cols, rows). Tiled lanes must get the FULL resolution frame, the
+# frame is split into overlapping tiles that go through YOLO in one batch.
+# Jo lane yahan nahi hai, wo whole-frame mode mein chalegi
+TILE_GRIDS = {
+    # 'North': (3, 2),
+}
+TILE_OVERLAP = 0.2          # Fraction of a tile shared with its neighbour
+TILE_NMS_THRESHOLD = 0.6    # Overlap (of the smaller box) above which tile duplicates merge
+
+# 11. Detection Cache (Looped demo videos / replayed recordings)
+# Raw YOLO boxes per (video file, frame index) are kept on disk. Key includes
+# model weights + mtime, backend, ROI, tile grid -> change any of these and a
+# fresh cache is used automatically.
+DETECTION_CACHE_ENABLED = True
+DETECTION_CACHE_DIR = "cache/detections"
+
+# 12. Capture (One reader thread per lane)
+CAPTURE_QUEUE_SIZE = 4     # Frames buffered per lane
+CAPTURE_POLICY = None      # 'drop_oldest' / 'block' / None = auto (files block, live cameras drop)
+
+# 13. Pipeline Mode
+# "threads"   = reader threads + detection in the UI process (default)
+# "processes" = decode (1 process per lane) -> detection process -> UI/signal process
+PIPELINE_MODE = "threads"
+PIPELINE_QUEUE_SIZE = 4    # Frames in flight per lane between stages (back-pressure)
+RING_SLOTS = 8             # Shared-memory frame slots per lane (process pipeline)
+
+# 14. Decode (Frames nobody looks at are never converted to pixels)
+# 'full' = every frame retrieved (lanes shown on the dashboard)
+# 'skip' = only detection keyframes (every SKIP_FRAMES+1th) are retrieved, the
+#          frames in between are grab()-only (headless / hidden lanes)
+DECODE_MODES = {}            # {'North': 'skip'}, lanes not listed use DECODE_MODE_DEFAULT
+DECODE_MODE_DEFAULT = "full"
+DECODE_SIZE = (640, 360)     # Frames are materialized at this size (None = camera resolution)
+
+# 15. Sources (Files, RTSP / HTTP cameras, device indices)
+# Live sources always deliver the NEWEST frame; a dropped stream is reopened
+# with a backoff of 1s, 2s, 4s ... up to SOURCE_RECONNECT_MAX.
+SOURCE_RECONNECT = True
+SOURCE_RECONNECT_BASE = 1.0   # Seconds before the first reconnect attempt
+SOURCE_RECONNECT_MAX = 30.0   # Backoff ceiling
+SOURCE_TIMEOUT = 5.0          # Open / read timeout for network streams (seconds)
+RTSP_FFMPEG_OPTIONS = "rtsp_transport;tcp"  # TCP: no smeared frames from UDP packet loss
+
+# 16. Pacing (Video time vs wall clock)
+# 'realtime' = files play at their own FPS; late frames are dropped, far
+#              behind -> the reader jumps ahead without decoding
+# 'fast'     = as fast as possible (offline runs), signal timers run on video time
+PACING_MODE = "realtime"
+PACING_MAX_LAG = 0.2                  # Seconds late before frames get dropped
+PACING_DROP_POLICY = "keep_keyframes"  # 'late' = drop every late frame / 'keep_keyframes' = never drop detection keyframes
+PACING_RESYNC = 2.0                   # Seconds behind before the reader skips ahead
+
+# 17. Control Room Display
+DISPLAY_SIZE = (1280, 720)  # Final window size, lane panels are drawn straight into it
+
+# 18. Evidence Writer (Challan photos / ambulance snapshots, off the frame loop)
+EVIDENCE_DIR = "evidence"
+EVIDENCE_FORMAT = "jpg"        # 'jpg' / 'webp'
+EVIDENCE_QUALITY = 85          # JPEG / WebP quality (0-100)
+EVIDENCE_QUEUE_SIZE = 32       # Images waiting to be written (full -> snapshots dropped, challans written inline)
+EVIDENCE_CHALLAN_RETRIES = 2   # Extra tries for a challan image (its row is only logged once the file exists)
+EVIDENCE_BUDGET_MB = 2048      # Disk budget for the evidence folder, oldest files evicted (None = no limit)
+
+# 19. Evidence Clips (Pre-event ring buffer per lane)
+# Every shown frame is kept as a small JPEG for CLIP_PRE_SECONDS (JPEG on the
+# ring thread, the frame loop only downscales); a challan or ambulance event
+# writes that + CLIP_POST_SECONDS after it as a video clip (background encoder),
+# the challans row gets clip_path once the clip and the row exist.
+CLIP_ENABLED = True
+CLIP_PRE_SECONDS = 4.0     # Seconds before the event
+CLIP_POST_SECONDS = 2.0    # Seconds after the event
+CLIP_SIZE = (320, 180)     # Ring frames are downscaled to this (None = frame size)
+CLIP_QUALITY = 70          # JPEG quality of ring frames
+CLIP_RING_MB = 4           # Memory cap per lane (oldest frames go first)
+CLIP_CODEC = "mp4v"        # FourCC, file extension below must match the container
+CLIP_EXT = ".mp4"
+CLIP_QUEUE_SIZE = 8        # Clips waiting for the encoder
+CLIP_INBOX_SIZE = 32       # Frames waiting for the ring thread (full -> frame skipped)
+CLIP_LINK_TIMEOUT = 30     # Seconds a clip waits for its challans row before it stays unlinked
+CLIP_BUDGET_MB = 2048      # Disk budget for evidence/clips, oldest evicted (None = no limit)
+CLIP_AMB_COOLDOWN = 10     # Seconds between ambulance clips of one lane
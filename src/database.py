@@ -8,6 +8,7 @@ class TrafficDB:
         if not os.path.exists("data"):
             os.makedirs("data")
             
+        self.db_path = db_path
         self.conn = sqlite3.connect(db_path, check_same_thread=False)
         self.cursor = self.conn.cursor()
         self.create_tables()
@@ -36,6 +37,13 @@ class TrafficDB:
                 snapshot_path TEXT
             )
         """)
+        # Old databases: evidence clip columns came later
+        # event_id = name shared by the challan's image and clip ('VIO_North_...')
+        cols = [r[1] for r in self.cursor.execute("PRAGMA table_info(challans)")]
+        if 'clip_path' not in cols:
+            self.cursor.execute("ALTER TABLE challans ADD COLUMN clip_path TEXT")
+        if 'event_id' not in cols:
+            self.cursor.execute("ALTER TABLE challans ADD COLUMN event_id TEXT")
         self.conn.commit()
 
     def log_signal(self, lane, count, load, time_given, emergency):
@@ -46,16 +54,31 @@ class TrafficDB:
         """, (now, lane, load, time_given, now.hour, now.weekday()))
         self.conn.commit()
 
+    # --- OFFLINE ANALYSIS (Archived footage, video clock timestamps) ---
+    def log_signal_bulk(self, rows):
+        """rows = [(timestamp, lane, load), ...] - one transaction for the whole batch"""
+        self.cursor.executemany("""
+            INSERT INTO signal_logs (timestamp, lane_name, load_score, green_time, hour, day_of_week)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [(ts, lane, load, 0, ts.hour, ts.weekday()) for ts, lane, load in rows])
+        self.conn.commit()
+
     # --- PHASE 4: LOG CHALLAN ---
-    def log_challan(self, lane, v_type, amount, path):
+    def log_challan(self, lane, v_type, amount, path, event_id=None):
         now = datetime.datetime.now()
         self.cursor.execute("""
-            INSERT INTO challans (timestamp, lane_name, violation_type, penalty_amount, snapshot_path)
-            VALUES (?, ?, ?, ?, ?)
-        """, (now, lane, v_type, amount, path))
+            INSERT INTO challans (timestamp, lane_name, violation_type, penalty_amount, snapshot_path, event_id)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (now, lane, v_type, amount, path, event_id))
         self.conn.commit()
         return self.cursor.lastrowid
 
+    def attach_clip(self, event_id, clip_path):
+        """Links a finished evidence clip to its challan (-> rows updated, 0 = no such challan yet)."""
+        self.cursor.execute("UPDATE challans SET clip_path = ? WHERE event_id = ?", (clip_path, event_id))
+        self.conn.commit()
+        return self.cursor.rowcount
+
     def get_total_challans(self):
         try:
             self.cursor.execute("SELECT COUNT(*), SUM(penalty_amount) FROM challans")
@@ -74,10 +97,13 @@ class TrafficDB:
                 writer.writerows(self.cursor.fetchall())
                 
                 # Challan Data
-                self.cursor.execute("SELECT * FROM challans")
+                self.cursor.execute("""
+                    SELECT id, timestamp, lane_name, violation_type, penalty_amount, snapshot_path, clip_path
+                    FROM challans
+                """)
                 writer.writerow([])
                 writer.writerow(['--- VIOLATION CHALLANS ---'])
-                writer.writerow(['ID', 'Timestamp', 'Lane', 'Violation', 'Amount', 'Image'])
+                writer.writerow(['ID', 'Timestamp', 'Lane', 'Violation', 'Amount', 'Image', 'Clip'])
                 writer.writerows(self.cursor.fetchall())
             
             return f"✅ Full Report Saved: {filename}"
@@ -0,0 +1,151 @@
+import os
+import json
+import hashlib
+from contextlib import contextmanager
+import cv2
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+try:
+    from src import config
+except ImportError:
+    import config
+
+# One row per box: x1, y1, x2, y2, conf, cls, engine (0 = main model, 1 = custom model)
+ROW = 7
+MISSING = -1
+
+
+def file_signature(path, chunk=4 << 20):
+    """Fast content hash of a video: size + first/last 4 MB (full hash of a 2 GB clip is too slow)."""
+    h = hashlib.sha1()
+    size = os.path.getsize(path)
+    h.update(str(size).encode())
+    with open(path, 'rb') as fh:
+        h.update(fh.read(chunk))
+        if size > chunk:
+            fh.seek(max(chunk, size - chunk))
+            h.update(fh.read(chunk))
+    return h.hexdigest()[:16]
+
+
+def key_hash(parts):
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+@contextmanager
+def _locked(fh):
+    """Exclusive lock on an open file (blocks other lanes / runs using the same cache dir)."""
+    if fcntl is not None:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+    else:
+        fh.seek(0)
+        msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class DetectionCache:
+    """
+    Raw model output of one video file, memory-mapped on disk.
+    Directory = <source hash>_<key hash>, so a new model, new thresholds,
+    ROI or tile grid simply opens a different (empty) cache.
+
+    index.npy  (frames, 2) int64   offset, count into rows.f32 (-1 = not cached)
+    rows.f32   (N, 7)      float32 append-only box rows
+    lock                           held while rows + index are written
+
+    Several lanes / runs may use the same directory (same file and key):
+    appends take their offset from the real file size under the lock.
+    """
+
+    def __init__(self, source_path, key_parts, root=None):
+        root = config.DETECTION_CACHE_DIR if root is None else root
+        self.key = key_parts
+        self.dir = os.path.join(root, f"{file_signature(source_path)}_{key_hash(key_parts)}")
+        os.makedirs(self.dir, exist_ok=True)
+
+        index_path = os.path.join(self.dir, "index.npy")
+        self.rows_path = os.path.join(self.dir, "rows.f32")
+        self.lock = open(os.path.join(self.dir, "lock"), 'a+b')
+        with _locked(self.lock):
+            if os.path.exists(index_path):
+                self.index = np.load(index_path, mmap_mode='r+')
+            else:
+                cap = cv2.VideoCapture(source_path)
+                frames = max(1, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+                cap.release()
+                self.index = np.lib.format.open_memmap(index_path, mode='w+', dtype=np.int64, shape=(frames, 2))
+                self.index[:] = MISSING
+                self.index.flush()
+                with open(os.path.join(self.dir, "meta.json"), 'w') as fh:
+                    json.dump({'source': source_path, 'key': key_parts}, fh, indent=4, default=str)
+
+            # Rows written by a crashed run (not in the index) are cut off
+            used = int((self.index[:, 0] + self.index[:, 1]).max(initial=0))
+            with open(self.rows_path, 'ab') as fh:
+                fh.truncate(used * ROW * 4)
+        self._rows = None
+
+        self.hits = 0
+        self.misses = 0
+
+    def _view(self, end):
+        # Re-map only when the file grew past the current mapping
+        if self._rows is None or len(self._rows) < end:
+            self._rows = np.memmap(self.rows_path, dtype=np.float32, mode='r').reshape(-1, ROW)
+        return self._rows
+
+    def get(self, frame_idx):
+        """-> (det, cdet) in the detector's _infer format, or None if not cached."""
+        if not 0 <= frame_idx < len(self.index) or self.index[frame_idx, 0] == MISSING:
+            self.misses += 1
+            return None
+        self.hits += 1
+        off, n = (int(v) for v in self.index[frame_idx])
+        rows = np.array(self._view(off + n)[off:off + n]) if n else np.zeros((0, ROW), np.float32)
+        main, custom = rows[rows[:, 6] == 0], rows[rows[:, 6] == 1]
+        det = (main[:, :4], main[:, 4], main[:, 5])
+        cdet = (custom[:, :4], custom[:, 4]) if self.key.get('custom') else None
+        return det, cdet
+
+    def put(self, frame_idx, det, cdet=None):
+        if not 0 <= frame_idx < len(self.index):
+            return
+        rows = [np.column_stack([det[0], det[1], det[2], np.zeros(len(det[1]))])]
+        if cdet is not None:
+            rows.append(np.column_stack([cdet[0], cdet[1], np.zeros(len(cdet[1])), np.ones(len(cdet[1]))]))
+        rows = np.vstack(rows).astype(np.float32).reshape(-1, ROW)
+        with _locked(self.lock):
+            with open(self.rows_path, 'ab') as fh:
+                fh.seek(0, os.SEEK_END)
+                offset = fh.tell() // (ROW * 4)
+                fh.write(rows.tobytes())
+            # Index is written AFTER the rows, a crash never points at missing data
+            # (count before offset: a reader that sees the offset also sees the count)
+            self.index[frame_idx, 1] = len(rows)
+            self.index[frame_idx, 0] = offset
+
+    def flush(self):
+        self.index.flush()
+
+    def close(self):
+        self.flush()
+        self.lock.close()
+
+    @property
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -1,30 +1,77 @@
-from ultralytics import YOLO
 import cv2
-import math
-import cvzone
 import numpy as np
 import os
-from collections import deque
+import time
+import threading
+
+try:
+    from src.features import FrameFeatures, WHITE, RED, VEDGE, BRIGHT
+    from src.roi import inside_mask
+    from src.detections import Detections, LABELS, CAR, BIKE, HEAVY, AMBULANCE, RICKSHAW
+    from src.backends import load_model, resolve_profile
+    from src.stream_state import StreamState, CASCADE_KEYS
+    from src.tiling import tile_grid, tiles_on_mask, merge_tiles
+    from src.det_cache import DetectionCache
+    from src import config
+except ImportError:
+    from features import FrameFeatures, WHITE, RED, VEDGE, BRIGHT
+    from roi import inside_mask
+    from detections import Detections, LABELS, CAR, BIKE, HEAVY, AMBULANCE, RICKSHAW
+    from backends import load_model, resolve_profile
+    from stream_state import StreamState, CASCADE_KEYS
+    from tiling import tile_grid, tiles_on_mask, merge_tiles
+    from det_cache import DetectionCache
+    import config
+
+# Model class name -> counting category
+CATEGORY_OF = {
+    'car': CAR,
+    'motorbike': BIKE,
+    'bicycle': BIKE,
+    'bus': HEAVY,
+    'truck': HEAVY,
+    'auto': RICKSHAW   # Only in custom/fused datasets
+}
 
 class TrafficDetector:
-    def __init__(self):
+    def __init__(self, backend=None, profile=None):
         print("🚀 Loading Triple-Engine Detection System...")
+        # profile = 'fp32' / 'onnx' / 'openvino' / 'int8' (see config.DETECTOR_PROFILES)
+        # backend = 'torch' / 'onnxruntime' / 'openvino' (overrides the profile)
+        self.backend, self.int8 = resolve_profile(profile, backend)
         
-        # --- ENGINE 1: STANDARD YOLO ---
-        self.model = YOLO("yolov8n.pt")
+        # --- ENGINE 1: STANDARD YOLO (or FUSED vehicles + emergency model) ---
+        self.fused = config.USE_FUSED_MODEL and os.path.exists(config.FUSED_MODEL_PATH)
+        self.model_path = config.FUSED_MODEL_PATH if self.fused else "yolov8n.pt"
+        if self.fused:
+            print("✅ Fused Vehicle + Emergency Model Loaded (single pass)")
+        self.model = load_model(self.model_path, self.backend, self.int8)
+        # Ensemble = custom ambulance model + hybrid heuristics (always on without fused model)
+        self.ensemble = not self.fused or config.KEEP_AMBULANCE_ENSEMBLE
         
         # --- ENGINE 2: CUSTOM MODEL (Optional) ---
         self.custom_model = None
         self.custom_path = "models/custom_ambulance.pt"
-        if os.path.exists(self.custom_path):
+        if not self.ensemble:
+            print("ℹ️ Ensemble disabled (fused model detects emergencies)")
+        elif os.path.exists(self.custom_path):
             print("✅ Custom Ambulance Model Loaded")
-            self.custom_model = YOLO(self.custom_path)
+            self.custom_model = load_model(self.custom_path, self.backend, self.int8)
         else:
             print("ℹ️ Using Hybrid Logic (No custom model found)")
 
+        # Identity of the loaded weights (detection cache key - retrained model = new cache)
+        paths = [self.model_path] + ([self.custom_path] if self.custom_model else [])
+        self.model_id = {'weights': [(p, os.path.getmtime(p) if os.path.exists(p) else None) for p in paths],
+                         'backend': self.backend, 'int8': self.int8}
+
+        # --- PER-STREAM STATE (smoothing, tracker, motion gate) ---
+        self.streams = {}
+        self._streams_lock = threading.Lock()
+        self._infer_lock = threading.Lock()  # YOLO predictors are not thread-safe
+        self.throughput = {m: {'frames': 0, 'tiles': 0, 'seconds': 0.0} for m in ('whole', 'tiled')}
+
         # --- ENGINE 3: HYBRID HEURISTICS CONFIG ---
-        self.history = deque(maxlen=5) # Last 5 frames for temporal smoothing
-        
         # Weights for score calculation
         self.WEIGHTS = {
             'color': 0.30,  # White body + Red stripes
@@ -33,6 +80,22 @@ class TrafficDetector:
             'text': 0.20,   # Text-like patterns
             'light': 0.15   # Bright spots (Sirens)
         }
+        self.AMB_THRESHOLD = 0.55
+
+        # Cascade: cheapest test first -> (name, min score, max score)
+        self.CASCADE = [
+            ('shape', 0.0, 1.0),  # Pure arithmetic, no pixels needed
+            ('color', 0.0, 1.0),  # Integral-image sums
+            ('light', 0.0, 1.0),
+            ('edge', 0.3, 1.0),   # check_edges never goes below 0.3
+            ('text', 0.0, 1.0)    # Contour walk (most expensive)
+        ]
+        # Best/worst case contribution of the stages AFTER stage i
+        self._rest_lo, self._rest_hi = [], []
+        for i in range(len(self.CASCADE)):
+            rest = self.CASCADE[i+1:]
+            self._rest_lo.append(sum(lo * self.WEIGHTS[n] for n, lo, _ in rest))
+            self._rest_hi.append(sum(hi * self.WEIGHTS[n] for n, _, hi in rest))
 
         self.classNames = ["person", "bicycle", "car", "motorbike", "aeroplane", "bus", "train", "truck", "boat",
                            "traffic light", "fire hydrant", "stop sign", "parking meter", "bench", "bird", "cat",
@@ -44,51 +107,95 @@ class TrafficDetector:
                            "diningtable", "toilet", "tvmonitor", "laptop", "mouse", "remote", "keyboard", "cell phone",
                            "microwave", "oven", "toaster", "sink", "refrigerator", "book", "clock", "vase", "scissors",
                            "teddy bear", "hair drier", "toothbrush"]
+        if self.fused:
+            # Fused model has its own class list (COCO vehicles + ambulance/fire_truck)
+            names = self.model.names
+            self.classNames = [names[i] for i in sorted(names)]
+
+        # Lookup tables: class id -> category / density weight (car-equivalents) / hybrid candidate
+        unit = config.VEHICLE_WEIGHTS['car']
+        self._category = np.full(len(self.classNames), -1, dtype=np.int64)
+        self._class_weight = np.zeros(len(self.classNames))
+        self._candidate = np.zeros(len(self.classNames), dtype=bool)
+        for i, name in enumerate(self.classNames):
+            if name in config.EMERGENCY_CLASSES:
+                self._category[i] = AMBULANCE
+            elif name in CATEGORY_OF:
+                self._category[i] = CATEGORY_OF[name]
+                self._class_weight[i] = config.VEHICLE_WEIGHTS.get(name, unit) / unit
+            self._candidate[i] = name in ["bus", "truck", "car"]
+
+    # --- STREAM REGISTRY ---
+    def state_for(self, stream_id, roi=None):
+        """Get (or create) the state of one lane / camera, e.g. 'North' or 'J2/North'."""
+        with self._streams_lock:
+            state = self.streams.get(stream_id)
+            if state is None:
+                state = self.streams[stream_id] = StreamState(stream_id, roi)
+            elif roi is not None:
+                state.roi = roi
+            return state
+
+    # --- DETECTION CACHE (Looped / replayed video files) ---
+    def attach_cache(self, stream_id, source_path):
+        """Raw detections of this file are stored on disk and reused when the same frame comes again."""
+        if config.DETECTION_CACHE_ENABLED and os.path.isfile(source_path):
+            state = self.state_for(stream_id)
+            state.cache_source, state.cache = source_path, None
+
+    def _cache_for(self, state, shape):
+        # Everything that changes the raw model output is part of the key
+        key = {'model': self.model_id, 'custom': self.custom_model is not None, 'shape': shape[:2],
+               'roi': state.roi.polygon if state.roi is not None else None, 'tiles': state.tiles,
+               'tile_overlap': config.TILE_OVERLAP if state.tiles else None,
+               'tile_nms': config.TILE_NMS_THRESHOLD if state.tiles else None}
+        if state.cache is None or state.cache.key != key:
+            if state.cache is not None:
+                state.cache.close()
+            state.cache = DetectionCache(state.cache_source, key)
+        return state.cache
+
+    def cache_report(self):
+        """Hit ratio per cached stream (also flushes the index files)."""
+        report = {}
+        for sid, state in list(self.streams.items()):
+            if state.cache is not None:
+                state.cache.flush()
+                report[sid] = state.cache.hit_ratio
+        return report
+
+    @property
+    def cascade_stats(self):
+        """How often each stage is reached (+ how boxes exit the cascade), all streams."""
+        with self._streams_lock:
+            states = list(self.streams.values())
+        return {k: sum(s.cascade_stats[k] for s in states) for k in CASCADE_KEYS}
+
+    # All checks below work on NumPy arrays (one entry per candidate box)
 
     # --- 1. COLOR ANALYSIS (White Body + Red/Blue) ---
-    def check_color(self, img_crop):
-        if img_crop.size == 0: return 0
-        hsv = cv2.cvtColor(img_crop, cv2.COLOR_BGR2HSV)
-        total_pixels = img_crop.shape[0] * img_crop.shape[1]
-        
-        # White (Body)
-        white_mask = cv2.inRange(hsv, np.array([0, 0, 168]), np.array([172, 111, 255]))
-        white_ratio = cv2.countNonZero(white_mask) / total_pixels
-        
-        # Red (Stripes/Cross)
-        red_mask1 = cv2.inRange(hsv, np.array([0, 70, 50]), np.array([10, 255, 255]))
-        red_mask2 = cv2.inRange(hsv, np.array([170, 70, 50]), np.array([180, 255, 255]))
-        red_ratio = (cv2.countNonZero(red_mask1) + cv2.countNonZero(red_mask2)) / total_pixels
-        
-        score = 0
-        if white_ratio > 0.3: score += 0.6
-        if red_ratio > 0.05: score += 0.4
-        return min(score, 1.0)
+    def check_color(self, ratios):
+        white_ratio, red_ratio = ratios[:, WHITE], ratios[:, RED]
+        score = 0.6 * (white_ratio > 0.3) + 0.4 * (red_ratio > 0.05)
+        return np.minimum(score, 1.0)
 
     # --- 2. SHAPE ANALYSIS (Aspect Ratio & Size) ---
     def check_shape(self, w, h):
         ratio = w / h
         # Ambulances are boxy vans (Ratio 1.3 to 2.8)
-        if 1.3 < ratio < 2.8: return 1.0
-        elif 1.0 < ratio < 3.5: return 0.5
-        return 0
+        return np.where((ratio > 1.3) & (ratio < 2.8), 1.0,
+                        np.where((ratio > 1.0) & (ratio < 3.5), 0.5, 0.0))
 
     # --- 3. EDGE PATTERN (Boxy vs Curved) ---
-    def check_edges(self, img_crop):
-        gray = cv2.cvtColor(img_crop, cv2.COLOR_BGR2GRAY)
-        edges = cv2.Canny(gray, 50, 150)
+    def check_edges(self, ratios):
         # Count vertical lines (Ambulances have many vertical edges unlike cars)
-        vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 5))
-        detected = cv2.morphologyEx(edges, cv2.MORPH_OPEN, vertical_kernel)
-        edge_density = cv2.countNonZero(detected) / (img_crop.shape[0] * img_crop.shape[1])
-        return 1.0 if edge_density > 0.05 else 0.3
+        return np.where(ratios[:, VEDGE] > 0.05, 1.0, 0.3)
 
     # --- 4. TEXT REGION DETECTION (Contrast Blocks) ---
-    def check_text_regions(self, img_crop):
-        gray = cv2.cvtColor(img_crop, cv2.COLOR_BGR2GRAY)
-        # Adaptive threshold to find text-like high contrast areas
-        thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
-        contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    # (Per box - only reached by boxes the cheaper stages could not decide)
+    def check_text_regions(self, thresh_crop):
+        if thresh_crop.size == 0: return 0
+        contours, _ = cv2.findContours(thresh_crop, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         text_score = 0
         for cnt in contours:
             x, y, w, h = cv2.boundingRect(cnt)
@@ -98,123 +205,288 @@ class TrafficDetector:
         return min(text_score / 10, 1.0)
 
     # --- 5. FLASHING LIGHTS (Bright Spots) ---
-    def check_lights(self, img_crop):
-        gray = cv2.cvtColor(img_crop, cv2.COLOR_BGR2GRAY)
-        # Find very bright spots (Siren lights)
-        _, bright = cv2.threshold(gray, 240, 255, cv2.THRESH_BINARY)
-        bright_ratio = cv2.countNonZero(bright) / (img_crop.shape[0] * img_crop.shape[1])
+    def check_lights(self, ratios):
         # Sirens are small bright spots (not whole image like sky)
-        if 0.03 < bright_ratio < 0.15: return 1.0 
-        return 0
+        bright = ratios[:, BRIGHT]
+        return np.where((bright > 0.03) & (bright < 0.15), 1.0, 0.0)
+
+    # --- HYBRID SCORE CASCADE ---
+    def score_ambulance(self, feats, boxes, stats):
+        """
+        Evaluates the hybrid tests cheapest-first for all candidate boxes at once
+        and drops boxes as soon as the remaining weights can no longer cross
+        (or miss) AMB_THRESHOLD. Only undecided boxes reach the text contour walk.
+        Stage counters go to stats (the stream's cascade_stats).
+        Returns (is_ambulance[N], score[N]). On early accept the score is a lower bound.
+        """
+        n = len(boxes)
+        eps = 1e-9
+        x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+        ratios = feats.ratios_many(boxes)
+        stage = {
+            'shape': lambda: self.check_shape(x2 - x1, y2 - y1),
+            'color': lambda: self.check_color(ratios),
+            'light': lambda: self.check_lights(ratios),
+            'edge': lambda: self.check_edges(ratios)
+        }
+
+        alive = np.ones(n, dtype=bool)
+        decided = np.zeros(n, dtype=bool)
+        score = np.zeros(n)
+        partial = np.zeros(n)
+        scores = {}
+        last = len(self.CASCADE) - 1
+
+        for i, (name, _, _) in enumerate(self.CASCADE):
+            stats[name] += int(alive.sum())
+            if name == 'text':
+                s = np.zeros(n)
+                for j in np.flatnonzero(alive):
+                    s[j] = self.check_text_regions(feats.thresh_crop(*boxes[j]))
+            else:
+                s = stage[name]()
+
+            scores[name] = s
+            partial = partial + s * self.WEIGHTS[name]
+            if i == last: break
+
+            # Margin keeps the decision identical to the full float sum
+            rej = alive & (partial + self._rest_hi[i] < self.AMB_THRESHOLD - eps)
+            acc = alive & (partial + self._rest_lo[i] > self.AMB_THRESHOLD + eps)
+            score[rej] = partial[rej]
+            score[acc] = partial[acc] + self._rest_lo[i]
+            decided[acc] = True
+            stats['early_reject'] += int(rej.sum())
+            stats['early_accept'] += int(acc.sum())
+            alive &= ~(rej | acc)
+
+        stats['full'] += int(alive.sum())
+        # Weighted Sum (original order)
+        final_score = (scores['color'] * self.WEIGHTS['color'] +
+                       scores['shape'] * self.WEIGHTS['shape'] +
+                       scores['edge'] * self.WEIGHTS['edge'] +
+                       scores['text'] * self.WEIGHTS['text'] +
+                       scores['light'] * self.WEIGHTS['light'])
+        score[alive] = final_score[alive]
+        decided[alive] = final_score[alive] > self.AMB_THRESHOLD
+        return decided, score
 
     # --- WEATHER CHECK (Phase 8 Logic) ---
-    def check_weather(self, frame):
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        avg_brightness = np.mean(gray)
-        contrast = np.std(gray)
+    def check_weather(self, feats):
+        avg_brightness, contrast = feats.brightness_contrast()
         if avg_brightness < 60: return "🌙 NIGHT / LOW LIGHT", True
         elif contrast < 35: return "🌫️ FOG / SMOG ALERT", True
         return "☀️ CLEAR WEATHER", False
 
     # === MAIN ANALYSIS FUNCTION ===
-    def analyze_frame(self, frame):
-        results = self.model(frame, stream=True, verbose=False)
-        breakdown = {'car': 0, 'bike': 0, 'heavy': 0, 'rickshaw': 0}
-        total_load = 0
-        is_ambulance = False
-        ambulance_confidence = 0
-        
-        weather_status, bad_weather = self.check_weather(frame)
-        
-        for r in results:
-            boxes = r.boxes
-            for box in boxes:
-                conf = math.ceil((box.conf[0] * 100)) / 100
-                cls = int(box.cls[0])
-                currentClass = self.classNames[cls]
-
-                if conf > 0.4:
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    w, h = x2 - x1, y2 - y1
-                    
-                    # Skip tiny objects
-                    if w < 50 or h < 50: continue
-
-                    # Basic Counting
-                    if currentClass == "car":
-                        breakdown['car'] += 1; total_load += 1
-                        self.draw_box(frame, box, "Car", (255, 0, 255))
-                    elif currentClass in ["motorbike", "bicycle"]:
-                        breakdown['bike'] += 1; total_load += 1
-                        self.draw_box(frame, box, "Bike", (0, 255, 255))
-                    
-                    # --- AMBULANCE DETECTION LOGIC ---
-                    # Check ANY large vehicle (Bus, Truck, Car)
-                    if currentClass in ["bus", "truck", "car"]:
-                        
-                        # Crop image for analysis
-                        crop = frame[max(0,y1):min(y2,frame.shape[0]), max(0,x1):min(x2,frame.shape[1])]
-                        
-                        # Calculate Method Scores
-                        s_color = self.check_color(crop)
-                        s_shape = self.check_shape(w, h)
-                        s_edge = self.check_edges(crop)
-                        s_text = self.check_text_regions(crop)
-                        s_light = self.check_lights(crop)
-                        
-                        # Weighted Sum
-                        final_score = (s_color * self.WEIGHTS['color'] +
-                                       s_shape * self.WEIGHTS['shape'] +
-                                       s_edge * self.WEIGHTS['edge'] +
-                                       s_text * self.WEIGHTS['text'] +
-                                       s_light * self.WEIGHTS['light'])
-                        
-                        # HYBRID DECISION THRESHOLD (> 0.55 means likely Ambulance)
-                        if final_score > 0.55:
-                            is_ambulance = True
-                            ambulance_confidence = final_score
-                            
-                            # Special RED Drawing for Ambulance
-                            self.draw_ambulance_box(frame, x1, y1, x2, y2, final_score)
-                            
-                            # Don't double count as heavy/car if it's ambulance
-                            continue 
-                        
-                        # If not ambulance but heavy
-                        if currentClass in ["bus", "truck"]:
-                            breakdown['heavy'] += 1; total_load += 2
-                            self.draw_box(frame, box, "Heavy", (0, 165, 255))
+    def analyze_frame(self, frame, roi=None, stream_id=None, frame_id=None):
+        frame_ids = {stream_id: frame_id} if frame_id is not None else None
+        return self.analyze_frames({stream_id: frame}, {stream_id: roi} if roi else None, frame_ids)[stream_id]
+
+    # === BATCHED MULTI-LANE ANALYSIS ===
+    def analyze_frames(self, frames_by_lane, rois=None, frame_ids=None):
+        """
+        Runs ONE YOLO forward pass for all lanes instead of one call per lane.
+        Input:  {'North': frame, 'South': frame, ...}  (keys = stream ids, see state_for)
+                rois = {'North': LaneROI, ...} (optional, else the ROI stored in the stream state)
+        Output: {'North': (detections, breakdown, load_score, ambulance, weather, bad_weather), ...}
+        Frames are NOT modified - drawing is done by render.draw_detections on demand.
+        Lanes with a tile grid (config.TILE_GRIDS) are split into overlapping tiles,
+        all tiles of all such lanes go through a second batched pass.
+        frame_ids = {'North': frame index in the source file, ...} enables the
+        detection cache for streams registered with attach_cache.
+        """
+        if not frames_by_lane:
+            return {}
+        rois = rois or {}
+        frame_ids = frame_ids or {}
+        for lane in frames_by_lane:
+            if lane in rois:
+                self.state_for(lane, rois[lane])
+
+        lanes = list(frames_by_lane.keys())
+        results = self.analyze_batch([(l, frames_by_lane[l], frame_ids.get(l)) for l in lanes])
+        return dict(zip(lanes, results))
+
+    # === BATCH OF (STREAM, FRAME) PAIRS ===
+    def analyze_batch(self, items):
+        """
+        items = [(stream_id, frame, frame_id or None), ...] - the same stream may
+        appear several times (offline bulk runs), its frames are post-processed
+        in the given order so smoothing stays sequential.
+        Returns one result tuple per item (same format as analyze_frames).
+        """
+        if not items:
+            return []
+        lanes = [it[0] for it in items]
+        frames = [it[1] for it in items]
+        frame_ids = [it[2] for it in items]
+        states = [self.state_for(l) for l in lanes]
+
+        # Crop each lane to its ROI rectangle (views, no copy)
+        views, masks = [], []
+        for state, frame in zip(states, frames):
+            roi = state.roi
+            if roi is not None:
+                views.append(roi.crop(frame))
+                masks.append(roi.mask_for(frame.shape))
+            else:
+                views.append(frame)
+                masks.append(None)
+
+        # Cached frames skip the model completely
+        boxes, caches = {}, {}
+        for i, (state, frame) in enumerate(zip(states, frames)):
+            if state.cache_source is not None and frame_ids[i] is not None:
+                caches[i] = self._cache_for(state, frame.shape)
+                hit = caches[i].get(frame_ids[i])
+                if hit is not None:
+                    boxes[i] = hit
+
+        # Batch inputs: whole views + tiles (only tiles that touch the lane)
+        whole, tiles = [], {}
+        for i, (state, view, mask) in enumerate(zip(states, views, masks)):
+            if i in boxes:
+                continue
+            if state.tiles:
+                grid = tile_grid(view.shape, state.tiles)
+                tiles[i] = tiles_on_mask(grid, mask) if mask is not None else grid
+            else:
+                whole.append(i)
+
+        if whole:
+            t0 = time.perf_counter()
+            res = self._infer([views[i] for i in whole])
+            for i, parts in zip(whole, res):
+                boxes[i] = parts
+            self._count_throughput('whole', len(whole), 0, time.perf_counter() - t0)
+        if tiles:
+            t0 = time.perf_counter()
+            order = [(i, t) for i, ts in tiles.items() for t in ts]
+            res = self._infer([views[i][t[1]:t[3], t[0]:t[2]] for i, t in order])
+            for i, ts in tiles.items():
+                parts = [res[k] for k, (j, _) in enumerate(order) if j == i]
+                det = merge_tiles([p[0] for p in parts], ts)
+                cdet = None
+                if self.custom_model:
+                    # Custom model has a single class -> class id 0 for NMS
+                    c_parts = [(c[0], c[1], np.zeros(len(c[1]))) for _, c in parts]
+                    cdet = merge_tiles(c_parts, ts)[:2]
+                boxes[i] = (det, cdet)
+            self._count_throughput('tiled', len(tiles), len(order), time.perf_counter() - t0)
+
+        for i, cache in caches.items():
+            if i in whole or i in tiles:
+                cache.put(frame_ids[i], *boxes[i])
+
+        # Split batch back per lane (same order as input)
+        out = []
+        for i, (state, frame) in enumerate(zip(states, frames)):
+            det, cdet = boxes[i]
+            with state.lock:
+                dets, *rest = self._analyze_result(views[i], det, cdet, state, masks[i])
+            if state.roi is not None:
+                # Crop coords -> full frame coords
+                (ox, oy, _, _), _ = state.roi.geometry(frame.shape)
+                dets = dets.offset(ox, oy)
+            out.append((dets, *rest))
+        return out
+
+    def _infer(self, inputs):
+        """One batched pass -> [((xyxy, conf, cls), (xyxy, conf) or None), ...]"""
+        if not inputs:
+            return []
+        # Only the forward pass is serialized, post-processing runs in parallel
+        with self._infer_lock:
+            results = self.model(inputs, verbose=False)
+            c_results = self.custom_model(inputs, verbose=False) if self.custom_model else None
+
+        # Pull every box out ONCE as arrays (no per-box tensor access)
+        out = []
+        for k, r in enumerate(results):
+            b = r.boxes
+            det = (b.xyxy.cpu().numpy().reshape(-1, 4), b.conf.cpu().numpy(), b.cls.cpu().numpy())
+            cdet = None
+            if c_results is not None:
+                cb = c_results[k].boxes
+                cdet = (cb.xyxy.cpu().numpy().reshape(-1, 4), cb.conf.cpu().numpy())
+            out.append((det, cdet))
+        return out
+
+    def _count_throughput(self, mode, frames, tiles, seconds):
+        with self._streams_lock:
+            t = self.throughput[mode]
+            t['frames'] += frames; t['tiles'] += tiles; t['seconds'] += seconds
+
+    def throughput_report(self):
+        """Inference FPS per mode (whole-frame vs tiled lanes)."""
+        report = {}
+        for mode, t in self.throughput.items():
+            if t['frames']:
+                report[mode] = {'frames': t['frames'], 'fps': t['frames'] / max(t['seconds'], 1e-9),
+                                'tiles_per_frame': t['tiles'] / t['frames'] if mode == 'tiled' else 1}
+        return report
+
+    def _analyze_result(self, frame, det, cdet, state, mask=None):
+        # Shared feature planes (built once per frame, not per box)
+        feats = FrameFeatures(frame)
+        weather_status, bad_weather = self.check_weather(feats)
+
+        xyxy = det[0].astype(np.int32)
+        conf = np.ceil(det[1] * 100) / 100
+        cls = det[2].astype(np.int64)
+        w, h = xyxy[:, 2] - xyxy[:, 0], xyxy[:, 3] - xyxy[:, 1]
+        cat = self._category[cls]
+
+        # Confidence + vehicle class + skip tiny objects
+        keep = (conf > 0.4) & (cat >= 0) & (w >= 50) & (h >= 50)
+        # Skip vehicles outside the lane polygon (opposite direction, sidewalk)
+        if mask is not None:
+            keep &= inside_mask(mask, xyxy)
+        xyxy, conf, cls, cat = xyxy[keep], conf[keep], cls[keep], cat[keep]
+
+        # FUSED MODEL: emergency class straight from YOLO
+        amb = cat == AMBULANCE
+        scores = conf.astype(np.float64)
+
+        # --- AMBULANCE DETECTION LOGIC ---
+        # Check ANY large vehicle (Bus, Truck, Car)
+        if self.ensemble:
+            cand = self._candidate[cls]
+            if cand.any():
+                feats.build()
+                is_amb, s = self.score_ambulance(feats, xyxy[cand], state.cascade_stats)
+                amb[cand] = is_amb
+                scores[cand] = np.where(is_amb, s, scores[cand])
+                # Don't double count as heavy/car if it's ambulance
+                cat[cand] = np.where(is_amb, AMBULANCE, cat[cand])
+
+        # Counting + density load (config.VEHICLE_WEIGHTS)
+        counted = ~amb
+        counts = np.bincount(cat[counted], minlength=len(LABELS))
+        total_load = np.bincount(cat[counted], weights=self._class_weight[cls[counted]],
+                                 minlength=len(LABELS)).sum()
+        breakdown = {'car': int(counts[CAR]), 'bike': int(counts[BIKE]),
+                     'heavy': int(counts[HEAVY]), 'rickshaw': int(counts[RICKSHAW])}
+        dets = Detections(xyxy, cat, scores, amb)
 
         # --- CUSTOM MODEL OVERRIDE (If Available) ---
-        if self.custom_model:
-            c_results = self.custom_model(frame, stream=True, verbose=False)
-            for r in c_results:
-                for box in r.boxes:
-                    if box.conf[0] > 0.6:
-                        is_ambulance = True
-                        x1, y1, x2, y2 = map(int, box.xyxy[0])
-                        self.draw_ambulance_box(frame, x1, y1, x2, y2, float(box.conf[0]))
-
-        # Temporal Smoothing (Reduce flickering)
-        self.history.append(is_ambulance)
-        # Only confirm if detected in 3 out of last 5 frames
-        confirmed_ambulance = sum(self.history) >= 3
-
-        load_score = min(total_load * 4, 100) 
-        return frame, breakdown, load_score, confirmed_ambulance, weather_status, bad_weather
-
-    # Standard Box
-    def draw_box(self, img, box, label, color):
-        x1, y1, x2, y2 = map(int, box.xyxy[0])
-        cvzone.cornerRect(img, (x1, y1, x2-x1, y2-y1), l=9, rt=2, colorR=color)
-        cvzone.putTextRect(img, f'{label}', (max(0, x1), max(35, y1)), scale=1, thickness=1, offset=3, colorR=color)
-
-    # Special Ambulance Box
-    def draw_ambulance_box(self, img, x1, y1, x2, y2, score):
-        w, h = x2 - x1, y2 - y1
-        # Flashing Red Border
-        cv2.rectangle(img, (x1, y1), (x2, y2), (0, 0, 255), 4)
-        # Add "Priority" Label
-        label = f"AMBULANCE {int(score*100)}%"
-        cv2.rectangle(img, (x1, y1-30), (x1+200, y1), (0, 0, 255), -1)
-        cv2.putText(img, label, (x1+5, y1-8), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
\ No newline at end of file
+        if cdet is not None:
+            c_xyxy = cdet[0].astype(np.int32)
+            c_conf = cdet[1]
+            c_keep = c_conf > 0.6
+            if mask is not None:
+                c_keep &= inside_mask(mask, c_xyxy)
+            if c_keep.any():
+                n = int(c_keep.sum())
+                dets = Detections(np.vstack([dets.boxes, c_xyxy[c_keep]]),
+                                  np.concatenate([dets.classes, np.full(n, AMBULANCE)]),
+                                  np.concatenate([dets.scores, c_conf[c_keep]]),
+                                  np.concatenate([dets.ambulance, np.ones(n, dtype=bool)]))
+        is_ambulance = bool(dets.ambulance.any())
+
+        # Temporal Smoothing (Reduce flickering) - per stream
+        confirmed_ambulance = state.vote(is_ambulance)
+
+        load_score = min(int(round(total_load * 4)), 100)  # 4 points per car-equivalent
+        return dets, breakdown, load_score, confirmed_ambulance, weather_status, bad_weather
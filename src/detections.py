@@ -0,0 +1,54 @@
+import numpy as np
+
+# Category ids used in Detections.classes
+LABELS = ['car', 'bike', 'heavy', 'ambulance', 'rickshaw']
+CAR, BIKE, HEAVY, AMBULANCE, RICKSHAW = range(5)
+
+
+class Detections:
+    """
+    Compact per-frame analysis result (no pixels, no drawing).
+    boxes     (N, 4) int32   x1, y1, x2, y2 in frame coords
+    classes   (N,)   int8    index into LABELS
+    scores    (N,)   float32 YOLO confidence (hybrid/custom score for ambulances)
+    ambulance (N,)   bool    emergency vehicle flag
+    track_ids (N,)   int32   only set for tracker output, else None
+    """
+    __slots__ = ('boxes', 'classes', 'scores', 'ambulance', 'track_ids')
+
+    def __init__(self, boxes, classes, scores, ambulance, track_ids=None):
+        self.boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+        self.classes = np.asarray(classes, dtype=np.int8)
+        self.scores = np.asarray(scores, dtype=np.float32)
+        self.ambulance = np.asarray(ambulance, dtype=bool)
+        self.track_ids = None if track_ids is None else np.asarray(track_ids, dtype=np.int32)
+
+    @classmethod
+    def empty(cls):
+        return cls(np.zeros((0, 4)), [], [], [])
+
+    @classmethod
+    def from_rows(cls, rows):
+        """rows = [(x1, y1, x2, y2, score, class_id, is_ambulance), ...]"""
+        if not rows:
+            return cls.empty()
+        a = np.array(rows, dtype=np.float64)
+        return cls(a[:, :4], a[:, 5], a[:, 4], a[:, 6] > 0)
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def offset(self, dx, dy):
+        """Shift boxes (ROI crop coords -> full frame coords)."""
+        if (dx == 0 and dy == 0) or len(self) == 0:
+            return self
+        return Detections(self.boxes + [dx, dy, dx, dy], self.classes, self.scores,
+                          self.ambulance, self.track_ids)
+
+    def scaled(self, sx, sy):
+        """Rescale boxes (e.g. full-resolution frame -> display size)."""
+        b = np.round(self.boxes * [sx, sy, sx, sy])
+        return Detections(b, self.classes, self.scores, self.ambulance, self.track_ids)
+
+    def labels(self):
+        return [LABELS[c] for c in self.classes]
@@ -0,0 +1,263 @@
+import time
+from datetime import datetime
+import numpy as np
+
+try:
+    from src import config
+    from src.database import TrafficDB
+    from src.logic import TrafficManager
+    from src.prediction import Predictor
+    from src.roi import load_lane_rois
+    from src.capture import open_readers
+    from src.pipeline import DetectionStage, Pipeline
+    from src.pacing import Pacer
+    from src.motion import GateCounters, gate_report
+    from src.detections import Detections
+    from src.render import draw_detections
+    from src.evidence import EvidenceWriter
+    from src.clips import ClipRecorder
+except ImportError:
+    import config
+    from database import TrafficDB
+    from logic import TrafficManager
+    from prediction import Predictor
+    from roi import load_lane_rois
+    from capture import open_readers
+    from pipeline import DetectionStage, Pipeline
+    from pacing import Pacer
+    from motion import GateCounters, gate_report
+    from detections import Detections
+    from render import draw_detections
+    from evidence import EvidenceWriter
+    from clips import ClipRecorder
+
+ALL_LANES = ['North', 'South', 'East', 'West']
+PAIR_NS, PAIR_EW = ['North', 'South'], ['East', 'West']
+DEF_BK = {'car': 0, 'bike': 0, 'heavy': 0, 'rickshaw': 0}
+
+
+class StageTimer:
+    """Average latency per stage since the last take()."""
+
+    def __init__(self):
+        self.sums, self.counts = {}, {}
+
+    def add(self, stage, seconds):
+        self.sums[stage] = self.sums.get(stage, 0.0) + seconds
+        self.counts[stage] = self.counts.get(stage, 0) + 1
+
+    def take(self):
+        out = {s: 1000 * self.sums[s] / self.counts[s] for s in self.sums}
+        self.sums, self.counts = {}, {}
+        return out
+
+
+# === INTERSECTION ENGINE (No UI - dashboard and headless runner sit on top) ===
+class IntersectionEngine:
+    """
+    cameras -> detection -> signal decision -> challans / DB logs, one step() at a time.
+    Nothing here opens a window; the dashboard draws from the public state
+    (last_frames, display_dets, curr_data, reason, rem ...).
+    """
+
+    def __init__(self, sources, size=(640, 360), green_time=30, db=None, sound_alerts=False,
+                 detector=None):
+        self.sources = dict(sources)
+        self.size = size
+        self.sound_alerts = sound_alerts
+
+        self.db = db or TrafficDB()
+        # Evidence JPEGs + challan rows are written off the frame loop
+        self.evidence = EvidenceWriter(self.db.db_path, db=self.db)
+        self.evidence.start()
+        # Last few seconds of every lane (small JPEGs) -> before/after clips of events
+        self.clips = ClipRecorder(self.sources, self.db.db_path) if config.CLIP_ENABLED else None
+        if self.clips is not None:
+            self.clips.start()
+        self.brain = TrafficManager(Predictor(self.db))
+        self.rois = load_lane_rois(self.sources)
+
+        W, H = size
+        if config.PIPELINE_MODE == "processes":
+            # Decode / detection in their own processes, this one = signals (+ UI)
+            self.pipe = Pipeline(self.sources, size).start()
+            self.stage, self.readers = None, {}
+            # Gates run in the detection process, their counters arrive with the updates
+            self.gates = {d: GateCounters() for d in self.sources}
+        else:
+            self.pipe = None
+            if detector is None:
+                try:
+                    from src.detect import TrafficDetector
+                except ImportError:
+                    from detect import TrafficDetector
+                detector = TrafficDetector()
+            # One reader thread per lane (decode overlaps inference)
+            self.readers = open_readers(self.sources)
+            # Per-lane state lives in the detector (no smoothing cross-talk between lanes)
+            self.stage = DetectionStage(detector, self.sources, size)
+            self.gates = {d: s.gate for d, s in self.stage.states.items()}
+        # Files at their own FPS (or as fast as possible with timers on video time)
+        self.pacer = Pacer(self.sources)
+        self.clock = self.pacer.now
+
+        # --- Signal state ---
+        self.active_pair = 'NS'
+        self.green_time = green_time
+        self.timer_end = self.clock() + green_time
+        self.reason = "Starting..."
+        self.rem = green_time
+        self.start_time = self.clock()
+        self.override_lane, self.override_start = None, 0
+
+        # --- Per-lane state ---
+        self.last_challan_time = {d: 0 for d in ALL_LANES}
+        self.last_amb_clip = {d: 0 for d in ALL_LANES}
+        self.violation_msg = ""
+        self.last_data = {d: {'load': 0, 'ambulance': False, 'breakdown': DEF_BK.copy()} for d in ALL_LANES}
+        self.curr_data = {d: {'load': 0, 'ambulance': False, 'breakdown': DEF_BK.copy()} for d in ALL_LANES}
+        self.last_dets = {d: Detections.empty() for d in ALL_LANES}
+        self.display_dets = {d: Detections.empty() for d in ALL_LANES}
+        self.last_frames = {d: np.zeros((H, W, 3), dtype=np.uint8) for d in self.sources}
+        self.current_weather, self.is_bad_weather = "Clear", False
+
+        # --- Stats ---
+        self.timer = StageTimer()
+        self.frames = 0
+        self.decisions = 0
+        self.challans = 0
+
+    # --- SIGNAL PHASES ---
+    @property
+    def green_lanes(self):
+        return PAIR_NS if self.active_pair == 'NS' else PAIR_EW if self.active_pair == 'EW' else []
+
+    @property
+    def red_lanes(self):
+        return PAIR_EW if self.active_pair == 'NS' else PAIR_NS if self.active_pair == 'EW' else ALL_LANES
+
+    def override(self, lane, started=None):
+        """Manual GREEN for lane's pair, 15 s (wall clock - a human pressed it)."""
+        self.override_lane = lane
+        self.override_start = time.time() if started is None else started
+
+    # --- ONE LOOP ITERATION ---
+    def step(self, timeout=0.05):
+        """Fetches ready frames, runs detection, challans and the signal logic -> [LaneUpdate]."""
+        red_lanes = self.red_lanes
+
+        # Only frames that are READY - a slow/stalled lane keeps its last frame
+        t0 = time.perf_counter()
+        if self.pipe is not None:
+            updates = self.pipe.poll(timeout)
+            for u in updates:
+                self.pacer.observe(u.lane, u.frame_id, u.timestamp)
+                if u.gate is not None:
+                    self.gates[u.lane].checks, self.gates[u.lane].skipped = u.gate
+            self.timer.add('capture', time.perf_counter() - t0)
+        else:
+            packets = self.pacer.take(self.readers, timeout)
+            t1 = time.perf_counter()
+            self.timer.add('capture', t1 - t0)
+            updates = list(self.stage.process(packets).values()) if packets else []
+            if packets:
+                self.timer.add('detect', time.perf_counter() - t1)
+
+        t0 = time.perf_counter()
+        now = time.time()
+        for u in updates:
+            d = u.lane
+            self.frames += 1
+            self.timer.add('frame_age', now - u.timestamp)
+            self.last_frames[d] = u.frame
+            self.last_data[d] = u.data
+            self.last_dets[d] = u.dets
+            self.display_dets[d] = u.display_dets
+            if u.bad_weather:
+                self.current_weather, self.is_bad_weather = u.weather, True
+            if self.clips is not None:
+                self.clips.push(d, u.frame, u.timestamp)
+                if u.data['ambulance'] and self.clock() - self.last_amb_clip[d] > config.CLIP_AMB_COOLDOWN:
+                    self.clips.trigger(d, f"AMB_{d}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+                    self.last_amb_clip[d] = self.clock()
+            if (u.keyframe and d in red_lanes and self.last_data[d]['load'] > 5 and
+                    (self.clock() - self.last_challan_time[d] > 3)):
+                self._challan(d, u.frame)
+
+        for d in self.sources:
+            self.curr_data[d] = self.last_data[d]
+        self._decide()
+        self.timer.add('signal', time.perf_counter() - t0)
+        return updates
+
+    def _challan(self, d, frame):
+        event = f"VIO_{d}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        # Row goes into challans once the image is on disk (writer thread), event_id = file name
+        self.evidence.submit(draw_detections(frame.copy(), self.last_dets[d]), f"violations/{event}",
+                             challan=(d, "Red Light Violation", 500), owned=True)
+        if self.clips is not None:
+            self.clips.trigger(d, event, link=event)
+        self.violation_msg = f"⚠️ CHALLAN: {d} - Red Light Jump (₹500)"
+        self.last_challan_time[d] = self.clock()
+        self.challans += 1
+        if self.sound_alerts:
+            print("\a")
+
+    def _decide(self):
+        if self.override_lane and (time.time() - self.override_start < 15):
+            target = self.override_lane
+            self.active_pair = 'NS' if target in PAIR_NS else 'EW'
+            self.reason = f"👮 MANUAL OVERRIDE: {target}"
+            self.timer_end = self.clock() + 15
+            self.rem = int(15 - (time.time() - self.override_start))
+            return
+        self.override_lane = None
+        self.rem = int(self.timer_end - self.clock())
+        if self.rem <= 0:
+            self.rem = 0
+            dec = self.brain.decide_phase(self.curr_data)
+            self.active_pair = dec['active_pair']
+            self.green_time = dec['time']
+            self.timer_end = self.clock() + self.green_time
+            self.reason = dec['reason']
+            self.decisions += 1
+            if self.active_pair != "ALL_RED":
+                self.db.log_signal(self.active_pair, 0, 0, self.green_time, False)
+                self.start_time = self.clock()
+
+    # --- SHUTDOWN ---
+    def finish(self):
+        """Last loads go to signal_logs (same as quitting the dashboard with Q)."""
+        elapsed = max(1, int(self.clock() - self.start_time))
+        for d in ALL_LANES:
+            if self.curr_data.get(d, {}).get('load', 0) > 0:
+                self.db.log_signal(d, 0, self.curr_data[d]['load'], elapsed, False)
+
+    def report(self):
+        lines = []
+        if self.stage is not None:
+            lines += self.stage.report() + self.pacer.report()
+        else:
+            # Detection process prints the rest of its stats when it stops
+            lines += gate_report(self.gates)
+        for d, r in self.readers.items():
+            lines.append(f"🎞️ {d}: {r.frames_read} frames read, {r.frames_dropped} dropped ({r.policy})")
+            lines.append(f"📡 {r.health}")
+            st = r.decode_stats()
+            if st.get('skipped'):
+                lines.append(f"⏩ {d}: {st['skipped']} frames grab()-only, ~{st['saved_s']:.1f}s decode saved")
+        lines += self.evidence.report()
+        if self.clips is not None:
+            lines += self.clips.report()
+        return lines
+
+    def stop(self):
+        for r in self.readers.values():
+            r.stop()
+        for r in self.readers.values():
+            r.join(timeout=2)  # Reader inside a cv2 call at interpreter exit = abort
+        if self.pipe is not None:
+            self.pipe.stop()  # Detection process prints its own stats
+        self.evidence.stop()  # Queued evidence is still written
+        if self.clips is not None:
+            self.clips.stop()  # After evidence: challan rows exist before clips are linked
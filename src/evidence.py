@@ -0,0 +1,214 @@
+import os
+import time
+import queue
+import threading
+import cv2
+
+try:
+    from src import config
+    from src.database import TrafficDB
+except ImportError:
+    import config
+    from database import TrafficDB
+
+FORMATS = {
+    'jpg': ('.jpg', cv2.IMWRITE_JPEG_QUALITY),
+    'webp': ('.webp', cv2.IMWRITE_WEBP_QUALITY),
+}
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.webp')
+
+
+class DiskBudget:
+    """Files with the given extensions under root, oldest evicted first once over budget_mb."""
+
+    def __init__(self, root, exts, budget_mb=None):
+        self.limit = int(budget_mb * 1024 * 1024) if budget_mb else None
+        self.files = {}
+        for dirpath, _, names in os.walk(root):
+            for n in names:
+                if n.lower().endswith(exts):
+                    p = os.path.join(dirpath, n)
+                    self.files[p] = (os.path.getmtime(p), os.path.getsize(p))
+        self.bytes = sum(size for _, size in self.files.values())
+        self.evicted = 0
+
+    def add(self, path, size):
+        """New file -> evicts the oldest until we are back under the budget (the new file always stays)."""
+        self.files[path] = (time.time(), size)
+        self.bytes += size
+        if not self.limit or self.bytes <= self.limit:
+            return
+        for p, (_, old) in sorted(self.files.items(), key=lambda kv: kv[1][0]):
+            if self.bytes <= self.limit:
+                break
+            if p == path:
+                continue
+            try:
+                os.remove(p)
+            except FileNotFoundError:
+                pass  # Deleted by hand / "Clear Data"
+            self.bytes -= old
+            del self.files[p]
+            self.evicted += 1
+
+
+class EvidenceWriter(threading.Thread):
+    """
+    Violation evidence / ambulance snapshots are encoded and written here, never
+    in the frame loop.
+
+    - Bounded queue: snapshots are dropped when it is full (counted), challans
+      never are -> written right away on the caller's thread / DB connection
+    - File is written to a temp name and renamed, the challans row is committed
+      only after that (own SQLite connection, this thread). A challan image is
+      tried EVIDENCE_CHALLAN_RETRIES more times, then reported as failed (no row)
+    - EVIDENCE_BUDGET_MB: oldest files under the evidence folder go first
+    """
+
+    def __init__(self, db_path=None, root=None, maxsize=None, fmt=None, quality=None, budget_mb=None, db=None):
+        super().__init__(daemon=True, name="evidence-writer")
+        self.db_path = db_path
+        self.sync_db = db  # Caller's connection, only for challans written on the caller's thread
+        self._lock = threading.Lock()  # Writer thread + synchronous challans share disk / metrics
+        self.root = root or config.EVIDENCE_DIR
+        fmt = fmt or config.EVIDENCE_FORMAT
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown evidence format '{fmt}' (use {sorted(FORMATS)})")
+        self.ext, flag = FORMATS[fmt]
+        self.params = [flag, int(config.EVIDENCE_QUALITY if quality is None else quality)]
+        self.queue = queue.Queue(maxsize=maxsize or config.EVIDENCE_QUEUE_SIZE)
+        self._stop_event = threading.Event()
+        os.makedirs(os.path.join(self.root, "violations"), exist_ok=True)
+        self.disk = DiskBudget(self.root, IMAGE_EXTS,
+                               config.EVIDENCE_BUDGET_MB if budget_mb is None else budget_mb)
+
+        # Metrics (written by the writer thread, read anywhere)
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.challans_failed = 0
+        self.committed = 0
+        self.written_sync = 0
+        self.max_depth = 0
+        self.write_s = 0.0
+        self.max_write_s = 0.0
+        self.lag_s = 0.0
+
+    # --- PRODUCER (frame loop) ---
+    def submit(self, image, name, challan=None, owned=False):
+        """
+        name = path under the evidence folder without extension ('violations/VIO_North_...').
+        challan = (lane, violation_type, amount) -> row is logged once the file exists,
+        its event_id is the file name ('VIO_North_...', what clips link on).
+        owned=False copies the image (e.g. the reused display buffer).
+        Returns the final path, or None if a snapshot was dropped (queue full).
+        A challan is never dropped: with a full queue it is written here, its
+        row exists when this returns (None = image failed, no row).
+        """
+        path = os.path.join(self.root, name + self.ext)
+        item = (image if owned else image.copy(), path, challan, time.time())
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            if challan is None:
+                with self._lock:
+                    self.dropped += 1
+                print(f"⚠️ Evidence queue full, dropped {os.path.basename(path)}")
+                return None
+            if self.sync_db is None:
+                self.sync_db = TrafficDB(self.db_path) if self.db_path else TrafficDB()
+            with self._lock:
+                self.submitted += 1
+                self.written_sync += 1
+            return self._write(item, self.sync_db)
+        with self._lock:
+            self.submitted += 1
+            self.max_depth = max(self.max_depth, self.queue.qsize())
+        return path
+
+    # --- WRITER THREAD ---
+    def run(self):
+        db = TrafficDB(self.db_path) if self.db_path else TrafficDB()
+        while not (self._stop_event.is_set() and self.queue.empty()):
+            try:
+                item = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self._write(item, db)
+        db.conn.close()
+
+    def _save(self, image, path):
+        ok, buf = cv2.imencode(self.ext, image, self.params)
+        if not ok:
+            raise IOError("encode failed")
+        tmp = path + ".tmp"
+        with open(tmp, 'wb') as fh:
+            fh.write(buf.tobytes())
+        os.replace(tmp, path)  # File is complete before anyone can see it
+        return len(buf)
+
+    def _write(self, item, db):
+        """Image -> file, then the challan row (if any). Returns the path, None if the image failed."""
+        image, path, challan, queued_at = item
+        t0 = time.perf_counter()
+        tries = 1 + (config.EVIDENCE_CHALLAN_RETRIES if challan is not None else 0)
+        for attempt in range(tries):
+            try:
+                size = self._save(image, path)
+                break
+            except (IOError, OSError, cv2.error) as e:
+                print(f"❌ Evidence write failed ({path}, try {attempt + 1}/{tries}): {e}")
+        else:
+            with self._lock:
+                self.failed += 1
+                if challan is not None:
+                    self.challans_failed += 1
+            if challan is not None:
+                print(f"❌ Challan for {challan[0]} NOT logged, its evidence image could not be written")
+            return None
+        dt = time.perf_counter() - t0
+
+        if challan is not None:
+            lane, v_type, amount = challan
+            db.log_challan(lane, v_type, amount, path, event_id=os.path.splitext(os.path.basename(path))[0])
+        with self._lock:
+            if challan is not None:
+                self.committed += 1
+            self.write_s += dt
+            self.max_write_s = max(self.max_write_s, dt)
+            self.written += 1
+            self.lag_s += time.time() - queued_at
+            self.disk.add(path, size)
+        return path
+
+    def stop(self, timeout=5.0):
+        """Writes what is still queued (up to timeout) and stops."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    # --- METRICS ---
+    @property
+    def depth(self):
+        return self.queue.qsize()
+
+    @property
+    def ms_per_write(self):
+        return 1000 * self.write_s / self.written if self.written else 0.0
+
+    def stats(self):
+        return {'depth': self.depth, 'max_depth': self.max_depth, 'written': self.written,
+                'committed': self.committed, 'written_sync': self.written_sync,
+                'dropped': self.dropped, 'failed': self.failed, 'challans_failed': self.challans_failed,
+                'evicted': self.disk.evicted, 'ms_per_write': round(self.ms_per_write, 1),
+                'max_write_ms': round(1000 * self.max_write_s, 1),
+                'lag_ms': round(1000 * self.lag_s / self.written, 1) if self.written else 0.0,
+                'disk_mb': round(self.disk.bytes / 1048576, 1)}
+
+    def report(self):
+        s = self.stats()
+        return [f"📸 Evidence: {s['written']} written ({s['committed']} challans, {s['written_sync']} on the caller), "
+                f"{s['dropped']} snapshots dropped, "
+                f"{s['failed']} failed ({s['challans_failed']} challans not logged), {s['ms_per_write']} ms/write (max {s['max_write_ms']}), "
+                f"queue max {s['max_depth']}, {s['disk_mb']} MB on disk, {s['evicted']} evicted"]
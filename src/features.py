@@ -0,0 +1,84 @@
+import cv2
+import numpy as np
+
+# Plane indices inside the stacked integral image
+WHITE, RED, VEDGE, BRIGHT = 0, 1, 2, 3
+
+
+class FrameFeatures:
+    """
+    Per-frame precompute stage for the ambulance heuristics.
+    HSV, gray, edge and bright-pixel masks are built ONCE per frame,
+    then every box is scored with O(1) rectangle sums on integral images.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.h, self.w = frame.shape[:2]
+        self.gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        self.thresh = None
+        self.integral = None
+
+    # --- LAZY BUILD (Only if frame has candidate vehicles) ---
+    def build(self):
+        hsv = cv2.cvtColor(self.frame, cv2.COLOR_BGR2HSV)
+
+        # White body + Red stripes (two hue bands, disjoint)
+        white = cv2.inRange(hsv, np.array([0, 0, 168]), np.array([172, 111, 255]))
+        red = cv2.bitwise_or(cv2.inRange(hsv, np.array([0, 70, 50]), np.array([10, 255, 255])),
+                             cv2.inRange(hsv, np.array([170, 70, 50]), np.array([180, 255, 255])))
+
+        # Vertical edges (van structure)
+        edges = cv2.Canny(self.gray, 50, 150)
+        vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 5))
+        vedge = cv2.morphologyEx(edges, cv2.MORPH_OPEN, vertical_kernel)
+
+        # Very bright spots (Siren lights)
+        _, bright = cv2.threshold(self.gray, 240, 255, cv2.THRESH_BINARY)
+
+        # Text-like high contrast areas (contour walk still needs the plane)
+        self.thresh = cv2.adaptiveThreshold(self.gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                            cv2.THRESH_BINARY, 11, 2)
+
+        # One 4-channel integral image for all masks (0/1 per pixel)
+        planes = cv2.merge([white, red, vedge, bright])
+        self.integral = cv2.integral(planes // 255)
+
+    def clip(self, x1, y1, x2, y2):
+        return max(0, x1), max(0, y1), min(x2, self.w), min(y2, self.h)
+
+    def ratios(self, x1, y1, x2, y2):
+        """Fraction of pixels set in each mask inside the box -> array [white, red, vedge, bright]."""
+        if self.integral is None:
+            self.build()
+        x1, y1, x2, y2 = self.clip(x1, y1, x2, y2)
+        area = (x2 - x1) * (y2 - y1)
+        if area <= 0:
+            return np.zeros(4)
+        ii = self.integral
+        total = ii[y2, x2] - ii[y1, x2] - ii[y2, x1] + ii[y1, x1]
+        return total / area
+
+    def ratios_many(self, boxes):
+        """Vectorized ratios() for (N, 4) boxes -> (N, 4) array."""
+        if self.integral is None:
+            self.build()
+        x1 = np.clip(boxes[:, 0], 0, self.w); x2 = np.clip(boxes[:, 2], 0, self.w)
+        y1 = np.clip(boxes[:, 1], 0, self.h); y2 = np.clip(boxes[:, 3], 0, self.h)
+        area = np.maximum((x2 - x1) * (y2 - y1), 0).astype(np.float64)
+        ii = self.integral
+        total = ii[y2, x2] - ii[y1, x2] - ii[y2, x1] + ii[y1, x1]
+        out = np.zeros(total.shape)
+        np.divide(total, area[:, None], out=out, where=area[:, None] > 0)
+        return out
+
+    def thresh_crop(self, x1, y1, x2, y2):
+        if self.integral is None:
+            self.build()
+        x1, y1, x2, y2 = self.clip(x1, y1, x2, y2)
+        return self.thresh[y1:y2, x1:x2]
+
+    # --- WEATHER STATS (Shared gray plane) ---
+    def brightness_contrast(self):
+        mean, std = cv2.meanStdDev(self.gray)
+        return float(mean[0][0]), float(std[0][0])
@@ -0,0 +1,179 @@
+import time
+import cv2
+import numpy as np
+from multiprocessing import shared_memory
+
+try:
+    from src import config
+except ImportError:
+    import config
+
+# Control words at the start of the block
+# READ_SEQ = detection is done with it, SHOWN_SEQ = handed to the UI, UI_SEQ = UI copied it
+WRITE_SEQ, READ_SEQ, REUSED, OVERRUNS, SHOWN_SEQ, UI_SEQ, HELD = range(7)
+N_CTRL = 7
+_ALIGN = 64
+
+
+def _layout(slots, shape):
+    """Byte offsets of (ctrl, slot_seq, slot_fid, slot_ts, slot_skip, frames) inside the block."""
+    offs, pos = [], 0
+    for nbytes in (N_CTRL * 8, slots * 8, slots * 8, slots * 8, slots * 8):
+        offs.append(pos)
+        pos += nbytes
+    pos = (pos + _ALIGN - 1) // _ALIGN * _ALIGN
+    offs.append(pos)
+    return offs, pos + slots * int(np.prod(shape))
+
+
+class FrameRing:
+    """
+    Fixed number of preallocated frame slots for ONE lane in shared memory.
+    Producer writes into the next slot, consumers get NumPy VIEWS of a slot
+    plus its sequence number - no pickling, no copy. Works between threads
+    (same object) and between processes (FrameRing.attach(spec)).
+
+    A view is only valid until its slot is reused (slots - 1 more writes);
+    check ring.valid(seq) after using it if that matters.
+
+    Frames handed to the UI (hand_over) stay protected until the UI has
+    copied them (release): files wait, live cameras drop the new frame.
+    """
+
+    def __init__(self, shm, slots, shape, owner):
+        self.shm = shm
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.owner = owner
+        (c, s, f, t, k, fr), _ = _layout(slots, self.shape)
+        buf = shm.buf
+        self.ctrl = np.ndarray((N_CTRL,), np.int64, buf, c)
+        self.slot_seq = np.ndarray((slots,), np.int64, buf, s)
+        self.slot_fid = np.ndarray((slots,), np.int64, buf, f)
+        self.slot_ts = np.ndarray((slots,), np.float64, buf, t)
+        self.slot_skip = np.ndarray((slots,), np.int64, buf, k)
+        self.frames = np.ndarray((slots,) + self.shape, np.uint8, buf, fr)
+
+    @classmethod
+    def create(cls, shape=(360, 640, 3), slots=None):
+        slots = slots or config.RING_SLOTS
+        _, size = _layout(slots, shape)
+        ring = cls(shared_memory.SharedMemory(create=True, size=size), slots, shape, owner=True)
+        ring.ctrl[:] = 0
+        ring.slot_seq[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, spec):
+        """spec = ring.spec() from the creating process."""
+        name, slots, shape = spec
+        # Workers started by the creator share its resource tracker, only the creator unlinks
+        return cls(shared_memory.SharedMemory(name=name), slots, shape, owner=False)
+
+    def spec(self):
+        return (self.shm.name, self.slots, self.shape)
+
+    # --- PRODUCER ---
+    def _oldest_needed(self):
+        low = self.ctrl[READ_SEQ]
+        if self.ctrl[UI_SEQ] < self.ctrl[SHOWN_SEQ]:
+            low = min(low, self.ctrl[UI_SEQ])  # UI has not copied everything it was given
+        return low
+
+    def has_space(self):
+        """False while a consumer is a full ring behind (used by the 'block' policy)."""
+        return self.ctrl[WRITE_SEQ] - self._oldest_needed() < self.slots - 1
+
+    def can_overwrite(self):
+        """Live producer: False while the next slot holds a frame the UI still has to copy."""
+        old = self.ctrl[WRITE_SEQ] + 1 - self.slots
+        if self.ctrl[UI_SEQ] < old <= self.ctrl[SHOWN_SEQ]:
+            self.ctrl[HELD] += 1
+            return False
+        return True
+
+    def wait_for_space(self, stop=None, poll=0.001):
+        while not self.has_space():
+            if stop is not None and stop.is_set():
+                return False
+            time.sleep(poll)
+        return True
+
+    def write(self, frame, frame_id=-1, timestamp=None, skipped=0):
+        """Copies (or resizes) the frame straight into the next slot. Returns its seq."""
+        seq = int(self.ctrl[WRITE_SEQ]) + 1
+        i = seq % self.slots
+        if seq > self.slots:
+            self.ctrl[REUSED] += 1
+            if seq - self.ctrl[READ_SEQ] > self.slots:
+                self.ctrl[OVERRUNS] += 1  # Consumer never saw the frame in this slot
+        self.slot_seq[i] = 0  # Slot is being written
+        view = self.frames[i]
+        if frame.shape == self.shape:
+            np.copyto(view, frame)
+        else:
+            cv2.resize(frame, (self.shape[1], self.shape[0]), dst=view)
+        self.slot_fid[i] = -1 if frame_id is None else frame_id
+        self.slot_ts[i] = time.time() if timestamp is None else timestamp
+        self.slot_skip[i] = skipped
+        self.slot_seq[i] = seq
+        self.ctrl[WRITE_SEQ] = seq
+        return seq
+
+    # --- CONSUMER ---
+    @property
+    def write_seq(self):
+        return int(self.ctrl[WRITE_SEQ])
+
+    def get(self, seq):
+        """(view, frame_id, timestamp, skipped) of frame seq, or None if it is gone / not written yet."""
+        i = seq % self.slots
+        if seq <= 0 or self.slot_seq[i] != seq:
+            return None
+        fid = int(self.slot_fid[i])
+        return self.frames[i], (None if fid < 0 else fid), float(self.slot_ts[i]), int(self.slot_skip[i])
+
+    def latest(self):
+        """(seq, view, frame_id, timestamp, skipped) of the newest frame, or None."""
+        seq = self.write_seq
+        got = self.get(seq)
+        return None if got is None else (seq,) + got
+
+    def valid(self, seq):
+        return self.slot_seq[seq % self.slots] == seq
+
+    def mark_read(self, seq):
+        if seq > self.ctrl[READ_SEQ]:
+            self.ctrl[READ_SEQ] = seq
+
+    # --- DETECTION -> UI HAND-OVER ---
+    def hand_over(self, seq):
+        """Detection side: the UI will use frame seq, keep it until release(seq)."""
+        if seq > self.ctrl[SHOWN_SEQ]:
+            self.ctrl[SHOWN_SEQ] = seq
+
+    def release(self, seq):
+        """UI side: frame seq (and everything before it) is copied."""
+        if seq > self.ctrl[UI_SEQ]:
+            self.ctrl[UI_SEQ] = seq
+
+    def forget_hand_overs(self):
+        """New detection process: what the old one handed over may never arrive."""
+        self.ctrl[SHOWN_SEQ] = self.ctrl[UI_SEQ]
+
+    def stats(self):
+        return {'written': int(self.ctrl[WRITE_SEQ]), 'reused': int(self.ctrl[REUSED]),
+                'overruns': int(self.ctrl[OVERRUNS]), 'held': int(self.ctrl[HELD])}
+
+    def close(self):
+        # Views must go before the buffer can be released
+        self.ctrl = self.slot_seq = self.slot_fid = self.slot_ts = self.slot_skip = self.frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # Someone still holds a view, mapping goes away with it
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
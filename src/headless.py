@@ -0,0 +1,151 @@
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+
+# --- PATH FIX (python src/headless.py from the project root) ---
+sys.path.append(os.getcwd())
+
+try:
+    from src import config
+    from src.engine import IntersectionEngine
+    from src.database import TrafficDB
+except ImportError:
+    import config
+    from engine import IntersectionEngine
+    from database import TrafficDB
+
+# No tkinter / matplotlib / cv2.imshow anywhere on this path - runs on a display-less controller
+
+
+# --- 1. SETTINGS (config file + command line) ---
+def load_settings(path):
+    """
+    JSON file:
+    {
+        "lanes": {"North": "rtsp://10.0.0.11/stream1", "South": "videos/south.mp4", "East": "0"},
+        "green_time_default": 30,
+        "db": "data/traffic_logs.db",
+        "settings": {"PIPELINE_MODE": "processes", "PACING_MODE": "realtime"}
+    }
+    "settings" overrides src/config.py values by name.
+    """
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def apply_settings(overrides):
+    for key, value in overrides.items():
+        if not key.isupper() or not hasattr(config, key):
+            raise KeyError(f"Unknown setting '{key}' (must be a name from src/config.py)")
+        default = getattr(config, key)
+        # JSON has no tuples: [640, 360] -> (640, 360) where config uses a tuple
+        if isinstance(default, tuple) and isinstance(value, list):
+            value = tuple(value)
+        setattr(config, key, value)
+
+
+def parse_lanes(args):
+    """['North=rtsp://...', 'South=videos/s.mp4'] -> {'North': ..., 'South': ...}"""
+    lanes = {}
+    for a in args:
+        if '=' not in a:
+            raise ValueError(f"Lane source must be lane=source, got '{a}'")
+        lane, src = a.split('=', 1)
+        lane = lane.strip().capitalize()
+        if lane not in ('North', 'South', 'East', 'West'):
+            raise ValueError(f"Unknown lane '{lane}' (North / South / East / West)")
+        lanes[lane] = src.strip()
+    return lanes
+
+
+# --- 2. STATS LINE ---
+class StatsLine:
+    def __init__(self, engine, every):
+        self.engine = engine
+        self.every = every
+        self.last = time.time()
+        self.frames = 0
+        self.decisions = 0
+        self.challans = 0
+
+    def maybe_print(self, force=False):
+        now = time.time()
+        dt = now - self.last
+        if not force and dt < self.every:
+            return
+        e = self.engine
+        fps = (e.frames - self.frames) / dt if dt > 0 else 0.0
+        dpm = (e.decisions - self.decisions) * 60 / dt if dt > 0 else 0.0
+        lat = " | ".join(f"{s} {ms:.1f} ms" for s, ms in e.timer.take().items())
+        ev = e.evidence
+        clips = f"clips {e.clips.backlog} pending, ring {e.clips.ring_bytes / 1048576:.1f} MB | " if e.clips else ""
+        print(f"📊 {fps:.1f} FPS | {lat} | {dpm:.1f} decisions/min | "
+              f"{e.challans - self.challans} challans | evidence q {ev.depth} ({ev.ms_per_write:.1f} ms/write) | "
+              f"{clips}{e.active_pair} {e.rem}s ({e.reason})", flush=True)
+        self.last, self.frames, self.decisions, self.challans = now, e.frames, e.decisions, e.challans
+
+
+# --- 3. RUN ---
+def run(lanes, green_time=30, db_path=None, stats_every=10, duration=None):
+    stop = {'flag': False}
+
+    def request_stop(signum, frame):
+        if stop['flag']:
+            print("⚠️ Second signal, exiting now")
+            sys.exit(1)
+        print(f"🛑 {signal.Signals(signum).name} received, shutting down...")
+        stop['flag'] = True
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    db = TrafficDB(db_path) if db_path else TrafficDB()
+    engine = IntersectionEngine(lanes, green_time=green_time, db=db)
+    stats = StatsLine(engine, stats_every)
+    started = time.time()
+    print(f"✅ Headless engine live: {', '.join(f'{d}={s}' for d, s in lanes.items())} "
+          f"({config.PIPELINE_MODE}, pacing {config.PACING_MODE})", flush=True)
+    try:
+        while not stop['flag']:
+            engine.step()
+            stats.maybe_print()
+            if duration and time.time() - started >= duration:
+                break
+    finally:
+        stats.maybe_print(force=True)
+        engine.finish()
+        for line in engine.report():
+            print(line)
+        engine.stop()
+        print("👋 Stopped", flush=True)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Run the intersection engine without any GUI")
+    ap.add_argument("lanes", nargs="*", help="lane=source (file, rtsp://, http://, camera number)")
+    ap.add_argument("--config", default=None, help="JSON file with lanes / settings (see load_settings)")
+    ap.add_argument("--mode", choices=["threads", "processes"], default=None, help="PIPELINE_MODE")
+    ap.add_argument("--pacing", choices=["realtime", "fast"], default=None, help="PACING_MODE")
+    ap.add_argument("--green-time", type=int, default=None, help="First green phase (seconds)")
+    ap.add_argument("--db", default=None, help="SQLite file (default data/traffic_logs.db)")
+    ap.add_argument("--stats-every", type=float, default=10, help="Seconds between stats lines")
+    ap.add_argument("--duration", type=float, default=None, help="Stop after N seconds")
+    args = ap.parse_args()
+
+    cfg = load_settings(args.config) if args.config else {}
+    apply_settings(cfg.get("settings", {}))
+    if args.mode:
+        config.PIPELINE_MODE = args.mode
+    if args.pacing:
+        config.PACING_MODE = args.pacing
+
+    # Command line lanes win over the file
+    lanes = {**cfg.get("lanes", {}), **parse_lanes(args.lanes)}
+    if not lanes:
+        ap.error("No lane sources (give lane=source or --config)")
+    green = args.green_time or cfg.get("green_time_default", 30)
+    run(lanes, green, args.db or cfg.get("db"), args.stats_every, args.duration)
+    sys.exit(0)
@@ -2,7 +2,7 @@ import cv2
 import numpy as np
 import time
 import tkinter as tk
-from tkinter import filedialog, messagebox
+from tkinter import filedialog, messagebox, simpledialog
 import os
 import traceback
 import datetime
@@ -16,6 +16,12 @@ from detect import TrafficDetector
 from logic import TrafficManager
 from database import TrafficDB
 from prediction import Predictor
+from roi import load_lane_rois
+from detections import Detections
+from render import draw_detections
+from capture import open_readers, wait_any
+from sources import describe
+from evidence import EvidenceWriter
 import config
 
 # ==========================================
@@ -79,6 +85,7 @@ class VideoLauncher:
             tk.Label(frame, text=f"{d}:", font=("Arial", 12, "bold"), bg="#1e1e1e", fg="white", width=6, anchor="w").pack(side="left")
             btn = tk.Button(frame, text="Browse", command=lambda x=d: self.select_file(x), bg="#333", fg="white", width=10)
             btn.pack(side="left", padx=10)
+            tk.Button(frame, text="Stream", command=lambda x=d: self.select_stream(x), bg="#333", fg="white", width=8).pack(side="left")
             lbl = tk.Label(frame, text="-- No Video --", bg="#1e1e1e", fg="#ff4757", font=("Arial", 9))
             lbl.pack(side="left")
             self.path_labels[d] = lbl
@@ -93,6 +100,13 @@ class VideoLauncher:
             self.video_paths[direction] = path
             self.path_labels[direction].config(text=os.path.basename(path)[:20]+"...", fg="#2ed573")
 
+    def select_stream(self, direction):
+        # RTSP / HTTP URL ya camera number (0, 1 ...)
+        src = simpledialog.askstring("Live Feed", f"{direction}: RTSP / HTTP URL or camera number", parent=self.root)
+        if src and src.strip():
+            self.video_paths[direction] = src.strip()
+            self.path_labels[direction].config(text=describe(src)[:24], fg="#2ed573")
+
     def start_sys(self):
         if not self.video_paths:
             messagebox.showerror("Wait!", "Select at least 1 video.")
@@ -185,8 +199,14 @@ if __name__ == "__main__":
                 pred = Predictor(db)
                 brain = TrafficManager(pred)
                 detector = TrafficDetector()
+                evidence = EvidenceWriter(db.db_path, db=db)
+                evidence.start()
                 
-                caps = {d: cv2.VideoCapture(p) for d, p in launcher.video_paths.items()}
+                # Files loop, live streams reconnect on their own (newest frame only)
+                caps = open_readers(launcher.video_paths)
+                rois = load_lane_rois(caps)
+                for d, p in launcher.video_paths.items():
+                    detector.attach_cache(d, p)
                 
                 # Configuration
                 pair_ns = ['North', 'South']
@@ -201,7 +221,9 @@ if __name__ == "__main__":
                 
                 default_bk = {'car': 0, 'bike': 0, 'heavy': 0, 'rickshaw': 0}
                 last_data = {d: {'load': 0, 'ambulance': False, 'breakdown': default_bk} for d in caps}
-                last_visuals = {}
+                last_dets = {d: Detections.empty() for d in caps}
+                # Stream down / reconnecting / not there yet -> last frame (black at start), signals keep running
+                last_frames = {d: np.zeros((H, W, 3), dtype=np.uint8) for d in caps}
                 last_snap = 0
                 
                 user_exit = False # Flag to check if 'Q' was pressed
@@ -210,29 +232,34 @@ if __name__ == "__main__":
 
                 # --- AI PROCESSING LOOP ---
                 while True:
-                    frame_counter += 1
                     curr_data = {}
                     visuals_map = {}
                     any_amb = False
 
                     # 1. READ & PROCESS
-                    for d, cap in caps.items():
-                        ret, frame = cap.read()
-                        if not ret:
-                            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                            ret, frame = cap.read()
-                            if not ret: frame = np.zeros((H, W, 3), dtype=np.uint8)
-                        
-                        frame = cv2.resize(frame, (W, H))
-                        
-                        if frame_counter % (SKIP_FRAMES + 1) == 0:
-                            p_frame, bk, load, is_amb = detector.analyze_frame(frame)
+                    # Never wait on one lane: only frames that are READY, a slow/stalled lane keeps its last frame
+                    wait_any(caps)
+                    fresh, frame_ids = {}, {}
+                    for d, reader in caps.items():
+                        pkt = reader.read()
+                        if pkt is None:
+                            continue
+                        last_frames[d] = fresh[d] = cv2.resize(pkt.frame, (W, H))
+                        if pkt.frame_id is not None: frame_ids[d] = pkt.frame_id
+                    if fresh:
+                        frame_counter += 1
+
+                    if fresh and frame_counter % (SKIP_FRAMES + 1) == 0:
+                        # Single batched inference for the lanes with a new frame (stale lanes keep their data)
+                        results = detector.analyze_frames(fresh, rois, frame_ids)
+                        for d, (dets, bk, load, is_amb, _, _) in results.items():
                             last_data[d] = {'load': load, 'ambulance': is_amb, 'breakdown': bk}
-                            last_visuals[d] = p_frame
+                            last_dets[d] = dets
                             if is_amb: any_amb = True
-                        
+                    
+                    for d, frame in last_frames.items():
                         curr_data[d] = last_data[d]
-                        visuals_map[d] = last_visuals.get(d, frame).copy()
+                        visuals_map[d] = draw_detections(frame.copy(), last_dets[d])  # last_frames stay clean
 
                     # 2. LOGIC
                     rem = int(timer_end - time.time())
@@ -275,9 +302,8 @@ if __name__ == "__main__":
                     # Snapshot
                     if any_amb and (time.time() - last_snap > 10):
                         ts = datetime.datetime.now().strftime("%H%M%S")
-                        fn = f"evidence/AMB_{ts}.jpg"
-                        cv2.imwrite(fn, final)
-                        print(f"📸 SNAPSHOT: {fn}")
+                        fn = evidence.submit(final, f"AMB_{ts}")
+                        if fn: print(f"📸 SNAPSHOT: {fn}")
                         last_snap = time.time()
 
                     cv2.imshow("Traffic Control AI", final)
@@ -292,7 +318,9 @@ if __name__ == "__main__":
 
                 # --- CLEANUP BEFORE RETURNING TO DASHBOARD ---
                 print("🔄 Returning to Dashboard...")
-                for cap in caps.values(): cap.release()
+                for reader in caps.values(): reader.stop()
+                evidence.stop()
+                for line in evidence.report(): print(line)
                 cv2.destroyAllWindows()
                 
                 # Loop wapas start hoga -> Launcher khulega
@@ -0,0 +1,80 @@
+import time
+import cv2
+import numpy as np
+
+try:
+    from src import config
+except ImportError:
+    import config
+
+
+class MotionGate:
+    """
+    Cheap per-lane motion check. Compares a small grayscale frame against a
+    running background; if almost nothing changed, the previous detections
+    are reused instead of running YOLO again.
+    """
+
+    def __init__(self, threshold=None, force_interval=None, size=(160, 90), alpha=0.05):
+        self.threshold = config.MOTION_THRESHOLD if threshold is None else threshold
+        self.force_interval = config.MOTION_FORCE_INTERVAL if force_interval is None else force_interval
+        self.pixel_delta = config.MOTION_PIXEL_DELTA
+        self.size = size
+        self.alpha = alpha
+
+        self.background = None
+        self.last_full = 0
+        self.last_change = 0.0
+
+        # Stats
+        self.checks = 0
+        self.skipped = 0
+
+    def needs_inference(self, frame, now=None):
+        now = time.time() if now is None else now
+        self.checks += 1
+
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+        if self.background is None:
+            self.background = gray.astype(np.float32)
+            self.last_full = now
+            return True
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+        _, changed = cv2.threshold(diff, self.pixel_delta, 255, cv2.THRESH_BINARY)
+        self.last_change = cv2.countNonZero(changed) / changed.size
+        cv2.accumulateWeighted(gray, self.background, self.alpha)
+
+        if self.last_change >= self.threshold or now - self.last_full >= self.force_interval:
+            self.last_full = now
+            return True
+
+        self.skipped += 1
+        return False
+
+    @property
+    def skip_ratio(self):
+        return self.skipped / self.checks if self.checks else 0.0
+
+
+class GateCounters:
+    """checks / skipped of a MotionGate running in the detection process (from LaneUpdate.gate)."""
+
+    def __init__(self):
+        self.checks = 0
+        self.skipped = 0
+
+    skip_ratio = MotionGate.skip_ratio
+
+
+def overall_skip_ratio(gates):
+    checks = sum(g.checks for g in gates.values())
+    return sum(g.skipped for g in gates.values()) / checks if checks else 0.0
+
+
+def gate_report(gates):
+    if not config.MOTION_GATE_ENABLED or not sum(g.checks for g in gates.values()):
+        return []
+    return [f"💤 Motion Gate: {overall_skip_ratio(gates):.0%} inference passes skipped"]
@@ -0,0 +1,206 @@
+import time
+import cv2
+
+try:
+    from src import config
+    from src.sources import is_live
+except ImportError:
+    import config
+    from sources import is_live
+
+MODES = ('realtime', 'fast')
+DROP_POLICIES = ('late', 'keep_keyframes')
+WAIT, SHOW, DROP = 'wait', 'show', 'drop'
+
+
+def keyframe_step(pos, pkt):
+    """
+    Detection keyframe rule (DetectionStage and the pacer) -> (is keyframe, new position).
+    Files: position = frame id, the first frame shown in each block of SKIP_FRAMES+1
+           ids is the keyframe -> the same ids every loop (detection cache hits).
+    Live:  position = source frames so far (incl. grab()-only ones).
+    """
+    n = config.SKIP_FRAMES + 1
+    if pkt.frame_id is not None:
+        return pos is None or pkt.frame_id // n != pos // n, pkt.frame_id
+    before = pos or 0
+    after = before + 1 + pkt.skipped
+    return before // n != after // n, after
+
+
+class LanePace:
+    """Clock mapping + counters of one lane."""
+
+    def __init__(self, fps, length, live):
+        self.fps = fps
+        self.length = length    # Frames in the file (0 = unknown)
+        self.live = live
+        self.origin = None      # Wall time of media time 0
+        self.frames = 0         # Source frames so far (across file loops)
+        self.last_id = None
+        self.kf_pos = None      # keyframe_step() position of the last SHOWN frame
+        self.shown = 0
+        self.dropped = 0
+        self.resyncs = 0
+        self.skip_target = None  # Frame index the reader was told to jump to
+        self.lag = 0.0
+        self.max_lag = 0.0
+
+    def media_time(self, pkt):
+        """Seconds of video up to this packet (file loops keep counting up)."""
+        if self.live or pkt.frame_id is None:
+            return pkt.timestamp
+        self.track(pkt.frame_id)
+        return (self.frames + pkt.frame_id) / self.fps
+
+    def track(self, frame_id):
+        if self.last_id is not None and frame_id < self.last_id:
+            # File looped (frames skipped before the end still count)
+            self.frames += max(self.length, self.last_id + 1)
+            self.skip_target = None
+        self.last_id = frame_id
+
+
+class Pacer:
+    """
+    Maps every lane's frame timestamps onto one wall clock.
+
+    realtime: file frame i is due at origin + i / fps. Early frames wait, frames
+              more than PACING_MAX_LAG late are dropped (PACING_DROP_POLICY):
+                'late'           = every late frame is dropped
+                'keep_keyframes' = late frames are dropped except detection keyframes
+              Further behind than PACING_RESYNC -> the reader jumps ahead with
+              grab() only. Live cameras are already real time ('latest' policy),
+              only their lag is measured.
+    fast:     nothing waits, nothing is dropped, now() runs on video time
+              (slowest lane) so signal timers follow the video.
+
+    Dropped frames are added to the next shown packet's skipped count, the
+    tracker / keyframe counting in DetectionStage stays in source frames.
+    """
+
+    def __init__(self, sources, mode=None, max_lag=None, policy=None):
+        self.mode = mode or config.PACING_MODE
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown pacing mode '{self.mode}' (use {MODES})")
+        self.policy = policy or config.PACING_DROP_POLICY
+        if self.policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy '{self.policy}' (use {DROP_POLICIES})")
+        self.max_lag = config.PACING_MAX_LAG if max_lag is None else max_lag
+        self.lanes = {d: LanePace(*self._probe(src), is_live(src)) for d, src in sources.items()}
+        self.pending = {}       # lane -> packet that is not due yet
+        self.carry = {}         # lane -> frames dropped since the last shown packet
+        self.started = time.time()
+        self.video_now = {}     # lane -> media time of the last shown frame (fast mode)
+
+    @staticmethod
+    def _probe(src):
+        """-> (fps, frame count) of a file, live sources have no schedule."""
+        if is_live(src):
+            return None, 0
+        cap = cv2.VideoCapture(src)
+        fps, length = cap.get(cv2.CAP_PROP_FPS), int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        return (fps if fps and fps < 1000 else 25.0), max(length, 0)
+
+    # --- DECISION FOR ONE PACKET ---
+    def decide(self, d, pkt, now=None):
+        """-> WAIT / SHOW / DROP. SHOW and DROP consume the packet (counters updated)."""
+        lane = self.lanes[d]
+        now = time.time() if now is None else now
+        media = lane.media_time(pkt)
+        lag = None  # Files in fast mode have no schedule -> no lag
+        if lane.live:
+            lag = now - media
+        elif self.mode == 'realtime':
+            if lane.origin is None:
+                lane.origin = now - media
+            lag = now - (lane.origin + media)
+
+        action = SHOW
+        if self.mode == 'realtime' and not lane.live:
+            if lag < 0:
+                return WAIT  # Same packet is offered again (loop bookkeeping is idempotent)
+            if lag > self.max_lag and not (self.policy == 'keep_keyframes' and keyframe_step(lane.kf_pos, pkt)[0]):
+                action = DROP
+
+        if lag is not None:
+            lane.lag = 0.9 * lane.lag + 0.1 * lag if lane.shown else lag
+            lane.max_lag = max(lane.max_lag, lag)
+        if action == DROP:
+            lane.dropped += 1
+            self.carry[d] = self.carry.get(d, 0) + 1 + pkt.skipped
+        else:
+            lane.shown += 1
+            pkt.skipped += self.carry.pop(d, 0)
+            lane.kf_pos = keyframe_step(lane.kf_pos, pkt)[1]  # Same position DetectionStage will have
+            self.video_now[d] = media - self.started if lane.live else media
+        return action
+
+    def resync_target(self, d, now=None):
+        """Frame index a file reader should jump to (None = not far enough behind)."""
+        lane = self.lanes[d]
+        if self.mode != 'realtime' or lane.live or lane.origin is None or lane.last_id is None:
+            return None
+        if lane.skip_target is not None and lane.last_id < lane.skip_target:
+            return None  # Reader is still jumping
+        now = time.time() if now is None else now
+        due_frames = int((now - lane.origin) * lane.fps) - lane.frames
+        if (due_frames - lane.last_id) / lane.fps <= config.PACING_RESYNC:
+            return None
+        lane.resyncs += 1
+        lane.skip_target = due_frames
+        return due_frames
+
+    # --- THREADED LOOP HELPER ---
+    def take(self, readers, timeout=0.05):
+        """{lane: CaptureReader} -> {lane: FramePacket} that are due now (waits at most timeout)."""
+        deadline = time.time() + timeout
+        while True:
+            out = {}
+            now = time.time()
+            for d, r in readers.items():
+                while True:
+                    pkt = self.pending.pop(d, None) or r.read()
+                    if pkt is None:
+                        break
+                    action = self.decide(d, pkt, now)
+                    if action == WAIT:
+                        self.pending[d] = pkt
+                        break
+                    if action == SHOW:
+                        out[d] = pkt
+                        break
+                target = self.resync_target(d, now)
+                if target is not None:
+                    r.skip_to(target)
+            if out or time.time() >= deadline:
+                return out
+            time.sleep(0.002)
+
+    # --- CLOCK FOR SIGNAL TIMERS ---
+    def now(self):
+        if self.mode == 'realtime' or not self.video_now:
+            return time.time()
+        # Slowest lane: a timer never runs ahead of what any camera shows
+        return self.started + min(self.video_now.values())
+
+    def observe(self, d, frame_id, timestamp):
+        """Processes mode: UI only sees LaneUpdates, keeps the video clock from them."""
+        lane = self.lanes[d]
+        if lane.live or frame_id is None:
+            self.video_now[d] = timestamp - self.started
+            return
+        lane.track(frame_id)
+        self.video_now[d] = (lane.frames + frame_id) / lane.fps
+
+    def report(self):
+        lines = []
+        for d, lane in self.lanes.items():
+            if self.mode == 'realtime' or lane.live:
+                lag = f"lag {lane.lag * 1000:.0f} ms (max {lane.max_lag * 1000:.0f} ms)"
+            else:
+                lag = "lag n/a"
+            lines.append(f"⏱️ {d} pacing ({self.mode}): {lag}, {lane.shown} shown, "
+                         f"{lane.dropped} dropped, {lane.resyncs} resyncs")
+        return lines
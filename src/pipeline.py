@@ -0,0 +1,409 @@
+import os
+import time
+import queue
+import signal
+import multiprocessing as mp
+import cv2
+
+try:
+    from src import config
+    from src.capture import FramePacket, Decoder, decode_plan
+    from src.detections import Detections
+    from src.roi import load_lane_rois
+    from src.frame_ring import FrameRing
+    from src.sources import is_live, open_capture
+    from src.pacing import Pacer, WAIT, SHOW, keyframe_step
+    from src.motion import gate_report
+except ImportError:
+    import config
+    from capture import FramePacket, Decoder, decode_plan
+    from detections import Detections
+    from roi import load_lane_rois
+    from frame_ring import FrameRing
+    from sources import is_live, open_capture
+    from pacing import Pacer, WAIT, SHOW, keyframe_step
+    from motion import gate_report
+
+DEF_BK = {'car': 0, 'bike': 0, 'heavy': 0, 'rickshaw': 0}
+
+
+class LaneUpdate:
+    """What the UI / signal controller needs from one lane after one frame."""
+    __slots__ = ('lane', 'frame', 'frame_id', 'timestamp', 'keyframe', 'analyzed',
+                 'data', 'dets', 'display_dets', 'weather', 'bad_weather', 'seq', 'gate')
+
+    def __init__(self, lane, frame, frame_id, timestamp, keyframe, analyzed, data, dets,
+                 display_dets, weather=None, bad_weather=False):
+        self.lane = lane
+        self.frame = frame                # Display size (640x360)
+        self.frame_id = frame_id
+        self.timestamp = timestamp
+        self.keyframe = keyframe          # Detection tick for this lane
+        self.analyzed = analyzed          # YOLO actually ran (not skipped by motion gate)
+        self.data = data                  # {'load', 'ambulance', 'breakdown'}
+        self.dets = dets                  # Last keyframe detections (evidence)
+        self.display_dets = display_dets  # Tracker boxes between keyframes
+        self.weather = weather
+        self.bad_weather = bad_weather
+        self.seq = None                   # Frame ring slot seq (process pipeline)
+        self.gate = None                  # (checks, skipped) of the lane's motion gate
+
+
+# === DETECTION STAGE (Motion gate + batched YOLO + tracker) ===
+# Same code path for the threaded dashboard loop and the detection process
+class DetectionStage:
+    def __init__(self, detector, sources, size=(640, 360)):
+        self.detector = detector
+        self.size = size
+        self.rois = load_lane_rois(sources)
+        self.states = {d: detector.state_for(d, self.rois.get(d)) for d in sources}
+        for d, src in sources.items():
+            detector.attach_cache(d, src)
+        self.kf_pos = {d: None for d in sources}  # keyframe_step() position per lane
+        self.last_data = {d: {'load': 0, 'ambulance': False, 'breakdown': DEF_BK.copy()} for d in sources}
+        self.last_dets = {d: Detections.empty() for d in sources}
+        self.failures = 0  # Failed YOLO passes (total)
+        self.failed_in_row = 0
+
+    def process(self, packets):
+        """packets = {lane: FramePacket} (ready frames only) -> {lane: LaneUpdate}"""
+        W, H = self.size
+        frames, full_res, frame_ids, keyframes = {}, {}, {}, set()
+        for d, p in packets.items():
+            # Keyframe = first frame of a SKIP_FRAMES+1 block (file frame ids / source frame count)
+            is_key, self.kf_pos[d] = keyframe_step(self.kf_pos[d], p)
+            if is_key:
+                keyframes.add(d)
+            h, w = p.frame.shape[:2]
+            frames[d] = p.frame if (w, h) == self.size else cv2.resize(p.frame, self.size)
+            if self.states[d].tiles and (w, h) != self.size:
+                full_res[d] = p.frame  # Tiled lanes are detected at camera resolution
+            if p.frame_id is not None:
+                frame_ids[d] = p.frame_id
+            if config.TRACKER_ENABLED:
+                # Tracks move on for the skipped (never decoded) frames too
+                for _ in range(1 + p.skipped):
+                    self.states[d].tracker.predict()
+
+        analyzed, weather = set(), {}
+        if keyframes:
+            # Motion gate: static lanes reuse their previous detections
+            moving = {d: frames[d] for d in keyframes}
+            if config.MOTION_GATE_ENABLED:
+                moving = {d: f for d, f in moving.items() if self.states[d].gate.needs_inference(f)}
+                if config.TRACKER_ENABLED:
+                    for d in keyframes - set(moving):
+                        self.states[d].tracker.hold()  # Static road: freeze tracks, no drift
+
+            # One batched YOLO pass for all (moving) lanes
+            try:
+                results = self.detector.analyze_frames({d: full_res.get(d, f) for d, f in moving.items()},
+                                                       frame_ids=frame_ids)
+                self.failed_in_row = 0
+            except Exception as e:
+                self.failures += 1
+                self.failed_in_row += 1
+                ids = {d: frame_ids.get(d) for d in moving}
+                print(f"❌ Detection failed ({self.failed_in_row} in a row) for {ids}: {e!r}")
+                if self.failed_in_row >= config.DETECTOR_MAX_FAILURES:
+                    raise
+                moving = {}  # Lanes keep their last data this time (not analyzed, tracks just predicted)
+
+            for d in moving:
+                if d in results:
+                    dets, bk, load, is_amb, wx, bad_wx = results[d]
+                    if d in full_res:
+                        # Camera resolution -> display size
+                        fh, fw = full_res[d].shape[:2]
+                        dets = dets.scaled(W / fw, H / fh)
+                    self.last_data[d] = {'load': load, 'ambulance': is_amb, 'breakdown': bk.copy()}
+                    self.last_dets[d] = dets
+                    analyzed.add(d)
+                    weather[d] = (wx, bad_wx)
+                    if config.TRACKER_ENABLED:
+                        self.states[d].tracker.update(dets)
+                else:
+                    self.last_data[d] = {'load': 0, 'ambulance': False, 'breakdown': DEF_BK.copy()}
+                    self.last_dets[d] = Detections.empty()
+
+        updates = {}
+        for d, frame in frames.items():
+            data = self.last_data[d].copy()
+            display = self.last_dets[d]
+            if config.TRACKER_ENABLED:
+                # Live per-frame counts from tracks (no jump every keyframe)
+                data['breakdown'] = self.states[d].tracker.live_breakdown()
+                if d not in analyzed:
+                    # Predicted track boxes instead of the stale keyframe boxes
+                    display = self.states[d].tracker.as_detections()
+            wx, bad_wx = weather.get(d, (None, False))
+            updates[d] = LaneUpdate(d, frame, packets[d].frame_id, packets[d].timestamp, d in keyframes,
+                                    d in analyzed, data, self.last_dets[d], display, wx, bad_wx)
+            gate = self.states[d].gate
+            updates[d].gate = (gate.checks, gate.skipped)
+        return updates
+
+    def report(self):
+        lines = gate_report({d: s.gate for d, s in self.states.items()})
+        if self.failures:
+            lines.append(f"❌ Detection failures: {self.failures}")
+        for mode, r in self.detector.throughput_report().items():
+            lines.append(f"⏱️ {mode} inference: {r['fps']:.1f} FPS ({r['tiles_per_frame']:.1f} tiles/frame)")
+        for d, ratio in self.detector.cache_report().items():
+            lines.append(f"💾 {d} detection cache hits: {ratio:.0%}")
+        if config.TRACKER_ENABLED:
+            for d, s in self.states.items():
+                lines.append(f"🚗 {d} unique vehicles: {s.tracker.unique_counts}")
+        return lines
+
+
+# === WORKER PROCESSES ===
+def _put(q, item, stop):
+    """Back-pressure: wait while the next stage is busy (but never past a stop request)."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _settings():
+    """Current config values - spawned workers re-import config, runtime overrides travel along."""
+    return {k: v for k, v in vars(config).items() if k.isupper()}
+
+
+def _run_worker(target, settings, args):
+    # Ctrl+C / SIGINT goes to the whole process group, the main process does the clean stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for k, v in settings.items():
+        setattr(config, k, v)
+    target(*args)
+
+
+def decode_worker(lane, source, ring_spec, stop):
+    """One process per lane: decode straight into the lane's shared-memory ring."""
+    cv2.setNumThreads(1)
+    ring = FrameRing.attach(ring_spec)
+    is_file = not is_live(source) and os.path.isfile(str(source))
+    # Ring slots already have the decode size (camera resolution for tiled lanes)
+    every, _ = decode_plan(lane)
+    dec = Decoder(source, every, (ring.shape[1], ring.shape[0]))
+    if not dec.isOpened():
+        raise RuntimeError(f"Cannot open source for {lane}: {source}")
+    read_any = False
+    try:
+        while not stop.is_set():
+            frame, skipped = dec.next()
+            if frame is None:
+                if is_file and read_any:
+                    dec.rewind()
+                    continue
+                break  # Live stream ended -> supervisor restarts us
+            read_any = True
+            frame_id = dec.position if is_file else None
+            # Back-pressure for files (every frame used), live cameras overwrite the oldest slot
+            # (unless the UI still has to copy it - then this camera frame is dropped)
+            if is_file:
+                if not ring.wait_for_space(stop):
+                    break
+            elif not ring.can_overwrite():
+                continue
+            ring.write(frame, frame_id, time.time(), skipped)
+    finally:
+        st = dec.stats()
+        if st['skipped']:
+            print(f"⏩ {lane}: {st['skipped']} frames grab()-only, ~{st['saved_s']:.1f}s decode saved")
+        dec.release()
+        ring.close()
+
+
+def detect_worker(sources, ring_specs, out_q, stop, size, backend, profile):
+    """One process owns the model(s): motion gate, YOLO, heuristics, tracker."""
+    out_q.cancel_join_thread()  # Never hang on exit with updates still queued
+    try:
+        from src.detect import TrafficDetector
+    except ImportError:
+        from detect import TrafficDetector
+
+    rings = {d: FrameRing.attach(spec) for d, spec in ring_specs.items()}
+    for ring in rings.values():
+        ring.forget_hand_overs()  # Restarted: updates of the previous process are lost
+    stage = DetectionStage(TrafficDetector(backend=backend, profile=profile), sources, size)
+    pacer = Pacer(sources)
+    seen = {d: 0 for d in rings}
+    live = {d: is_live(src) for d, src in sources.items()}
+    torn = {d: 0 for d in rings}  # Live frames the camera overwrote while we copied them
+    while not stop.is_set():
+        # Next unread frame per lane (or the newest one if we were lapped) - views, no copy
+        # Live cameras: always the newest frame (latency first), copied out of the slot
+        packets, seqs = {}, {}
+        for d, ring in rings.items():
+            while ring.write_seq > seen[d]:
+                seq = ring.write_seq if live[d] else seen[d] + 1
+                got = ring.get(seq)
+                if got is None:
+                    latest = ring.latest()
+                    if latest is None: break
+                    seq, got = latest[0], latest[1:]
+                pkt = FramePacket(*got)
+                if live[d]:
+                    # Cameras never wait for us -> analyze our own copy, the slot may be lapped meanwhile
+                    pkt.frame = pkt.frame.copy()
+                    if not ring.valid(seq):
+                        torn[d] += 1  # Half-overwritten copy -> newest frame instead
+                        seen[d] = seq
+                        ring.mark_read(seq)
+                        continue
+                action = pacer.decide(d, pkt)
+                if action == WAIT:
+                    break  # Not due yet, same slot next round
+                if action == SHOW:
+                    packets[d] = pkt
+                    seqs[d] = seq
+                    ring.hand_over(seq)  # Protected from here until the UI copied it
+                    break
+                # Dropped by the pacer (already decoded - resync by skipping happens in threads mode)
+                seen[d] = seq
+                ring.mark_read(seq)
+        if not packets:
+            time.sleep(0.002)
+            continue
+
+        updates = stage.process(packets)
+        for d, seq in seqs.items():
+            seen[d] = seq
+            rings[d].mark_read(seq)
+            if updates[d].frame is packets[d].frame and (not live[d] or rings[d].valid(seq)):
+                # Display frame IS the ring slot (live: still the same frame) -> send only its seq
+                updates[d].frame = None
+            updates[d].seq = seq
+        _put(out_q, list(updates.values()), stop)
+
+    for line in stage.report() + pacer.report():
+        print(line)
+    for d, n in torn.items():
+        if n:
+            print(f"🎞️ {d}: {n} camera frames overwritten while being copied")
+    for ring in rings.values():
+        ring.close()
+
+
+# === SUPERVISOR (Main process = UI + signal controller) ===
+class Pipeline:
+    """
+    decode (1 process per lane) -> detection (1 process) -> this process (UI + signals)
+    Frames travel through per-lane shared-memory rings (no pickling), only the
+    small LaneUpdates go through a queue. Crashed workers are restarted with a
+    backoff while the signal controller keeps running on the last known data.
+    """
+
+    def __init__(self, sources, size=(640, 360), queue_size=None, backend=None, profile=None):
+        self.sources = dict(sources)
+        self.size = size
+        self.backend, self.profile = backend, profile
+        self.ctx = mp.get_context('spawn')  # Safe with CUDA / OpenVINO runtimes
+        self.result_q = self.ctx.Queue(maxsize=queue_size or config.PIPELINE_QUEUE_SIZE)
+        self.stop_event = self.ctx.Event()
+        self.procs = {}
+        self.restarts = {}
+        self.next_start = {}
+
+        # Display-size slots, tiled lanes keep the camera resolution
+        self.rings = {}
+        for d, src in self.sources.items():
+            w, h = size
+            if config.TILE_GRIDS.get(d):
+                cap = open_capture(src)
+                w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or w
+                h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or h
+                cap.release()
+            self.rings[d] = FrameRing.create((h, w, 3))
+        self.lost = {d: 0 for d in self.sources}  # Updates whose frame was gone before the UI copied it
+
+    def _spawn(self, name):
+        if name == 'detector':
+            target = detect_worker
+            args = (self.sources, {d: r.spec() for d, r in self.rings.items()}, self.result_q,
+                    self.stop_event, self.size, self.backend, self.profile)
+        else:
+            lane = name[len('decode-'):]
+            target = decode_worker
+            args = (lane, self.sources[lane], self.rings[lane].spec(), self.stop_event)
+        p = self.ctx.Process(target=_run_worker, args=(target, _settings(), args), name=name, daemon=True)
+        p.start()
+        self.procs[name] = p
+
+    def start(self):
+        self._spawn('detector')
+        for lane in self.sources:
+            self._spawn(f"decode-{lane}")
+        return self
+
+    def supervise(self):
+        """Crash isolation: restart dead workers (exponential backoff, max 30 s)."""
+        now = time.time()
+        for name, p in list(self.procs.items()):
+            if p.is_alive() or self.stop_event.is_set():
+                continue
+            if name not in self.next_start:
+                n = self.restarts.get(name, 0)
+                self.next_start[name] = now + min(30, 2 ** n)
+                print(f"⚠️ {name} exited (code {p.exitcode}), restarting in {min(30, 2 ** n)}s")
+            elif now >= self.next_start[name]:
+                del self.next_start[name]
+                self.restarts[name] = self.restarts.get(name, 0) + 1
+                self._spawn(name)
+
+    def poll(self, timeout=0.05):
+        """All lane updates that are ready -> [LaneUpdate, ...] (waits at most timeout)."""
+        self.supervise()
+        updates = []
+        try:
+            updates.extend(self.result_q.get(timeout=timeout))
+            while True:
+                updates.extend(self.result_q.get_nowait())
+        except queue.Empty:
+            pass
+        kept = []
+        for u in updates:
+            ring = self.rings[u.lane]
+            if u.frame is None:
+                # Own copy of the analyzed frame (display, evidence and clips keep it after
+                # the slot is reused); never another frame in its place
+                got = ring.get(u.seq)
+                frame = got[0].copy() if got is not None else None
+                if frame is None or not ring.valid(u.seq):
+                    ring.release(u.seq)
+                    self.lost[u.lane] += 1
+                    continue
+                u.frame = frame
+            if u.seq is not None:
+                ring.release(u.seq)
+            kept.append(u)
+        return kept
+
+    def ring_stats(self):
+        return {d: r.stats() for d, r in self.rings.items()}
+
+    def stop(self, timeout=3.0):
+        self.stop_event.set()
+        deadline = time.time() + timeout
+        while time.time() < deadline and any(p.is_alive() for p in self.procs.values()):
+            # Drain so a blocked detection process can see the stop flag
+            try:
+                while True:
+                    self.result_q.get_nowait()
+            except queue.Empty:
+                pass
+            time.sleep(0.05)
+        for p in self.procs.values():
+            if p.is_alive():
+                p.terminate()
+            p.join(0.5)
+        for d, st in self.ring_stats().items():
+            print(f"🎞️ {d}: {st['written']} frames, {st['reused']} slot reuses, {st['overruns']} overruns, "
+                  f"{st['held']} camera frames dropped for the UI, {self.lost[d]} updates lost")
+        for ring in self.rings.values():
+            ring.close()
@@ -13,7 +13,7 @@ class Predictor:
         """
         try:
             # Connect directly to DB for read operation
-            conn = sqlite3.connect("data/traffic_logs.db")
+            conn = sqlite3.connect(getattr(self.db, 'db_path', "data/traffic_logs.db"))
             cursor = conn.cursor()
             
             # Query: Average load for this specific Day & Hour
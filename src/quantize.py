@@ -0,0 +1,158 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+from datetime import datetime
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+try:
+    from src import config
+    from src.backends import exported_path, load_model
+    from src.tracker import iou_matrix
+except ImportError:
+    import config
+    from backends import exported_path, load_model
+    from tracker import iou_matrix
+
+
+# --- 1. CALIBRATION SET (Frames from OUR lane videos) ---
+def sample_video_frames(videos, per_video, offset=0.0, size=(640, 360)):
+    """Evenly spaced frames per video; offset (0-1 of a step) gives a disjoint held-out set."""
+    frames = []
+    for path in videos:
+        cap = cv2.VideoCapture(path)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if total <= 0:
+            print(f"⚠️ Skipping unreadable video: {path}")
+            continue
+        step = total / per_video
+        for i in range(per_video):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(min(total - 1, (i + offset) * step)))
+            ret, frame = cap.read()
+            if ret:
+                frames.append(cv2.resize(frame, size))
+        cap.release()
+    return frames
+
+
+def build_calibration_set(frames, out_dir, names):
+    img_dir = os.path.join(out_dir, "images")
+    os.makedirs(img_dir, exist_ok=True)
+    for i, f in enumerate(frames):
+        cv2.imwrite(os.path.join(img_dir, f"calib_{i:05d}.jpg"), f)
+
+    # Images only - PTQ calibration does not need labels
+    yaml_path = os.path.join(out_dir, "data.yaml")
+    with open(yaml_path, 'w') as fh:
+        fh.write(f"path: {os.path.abspath(out_dir)}\ntrain: images\nval: images\nnames:\n")
+        for idx, name in sorted(names.items()):
+            fh.write(f"  {idx}: {name}\n")
+    return yaml_path
+
+
+# --- 2. POST-TRAINING QUANTIZATION ---
+def quantize_weights(weights, yaml_path):
+    target = exported_path(weights, 'openvino', int8=True)
+    print(f"⚙️ INT8 calibration for {weights} ...")
+    out = YOLO(weights).export(format="openvino", int8=True, data=yaml_path, dynamic=True)
+    if os.path.abspath(out) != os.path.abspath(target):
+        if os.path.exists(target): shutil.rmtree(target)
+        shutil.move(out, target)
+    return target
+
+
+# --- 3. ACCURACY / LATENCY REPORT ---
+def run_timed(model, frames, conf):
+    dets, lat = [], []
+    model(frames[:1], verbose=False)  # Warmup
+    for f in frames:
+        t0 = time.perf_counter()
+        r = model(f, conf=conf, verbose=False)[0]
+        lat.append((time.perf_counter() - t0) * 1000)
+        b = r.boxes
+        dets.append((b.xyxy.cpu().numpy(), b.cls.cpu().numpy().astype(int)))
+    return dets, lat
+
+
+def per_class_recall(ref_dets, test_dets, names, iou_min=0.5):
+    """FP32 detections are the reference: how many does INT8 find again, per class?"""
+    stats = {}
+    for (rb, rc), (tb, tc) in zip(ref_dets, test_dets):
+        iou = iou_matrix(rb, tb)
+        if iou.size:
+            iou[rc[:, None] != tc[None, :]] = 0
+        for i, c in enumerate(rc):
+            s = stats.setdefault(names.get(int(c), str(c)), [0, 0])
+            s[0] += 1
+            if iou.shape[1] and iou[i].max() >= iou_min:
+                s[1] += 1
+    return {k: {'reference': n, 'recall': round(found / n, 4)} for k, (n, found) in sorted(stats.items())}
+
+
+def latency_summary(lat):
+    return {'median_ms': round(float(np.median(lat)), 2), 'p95_ms': round(float(np.percentile(lat, 95)), 2)}
+
+
+def quantize_and_report(weights, videos, calib_frames=300, eval_frames=100, out_dir="reports/quantization"):
+    fp32 = YOLO(weights)
+    names = dict(fp32.names)
+    calib_dir = os.path.join(out_dir, "calib_" + os.path.splitext(os.path.basename(weights))[0])
+
+    per_video = max(1, calib_frames // max(1, len(videos)))
+    frames = sample_video_frames(videos, per_video)
+    if not frames:
+        raise RuntimeError("No calibration frames could be read from the given videos")
+    yaml_path = build_calibration_set(frames, calib_dir, names)
+    int8_path = quantize_weights(weights, yaml_path)
+
+    # Held-out frames (between calibration samples)
+    held_out = sample_video_frames(videos, max(1, eval_frames // max(1, len(videos))), offset=0.5)
+    conf = config.CONFIDENCE_THRESHOLD
+    ref, lat_fp32 = run_timed(fp32, held_out, conf)
+    test, lat_int8 = run_timed(load_model(weights, 'openvino', int8=True), held_out, conf)
+
+    report = {
+        'weights': weights,
+        'int8_model': int8_path,
+        'created': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'videos': videos,
+        'calibration_frames': len(frames),
+        'eval_frames': len(held_out),
+        'confidence_threshold': conf,
+        'per_class_recall': per_class_recall(ref, test, names),
+        'latency': {'fp32': latency_summary(lat_fp32), 'int8': latency_summary(lat_int8)}
+    }
+    report['speedup_median'] = round(report['latency']['fp32']['median_ms'] /
+                                     max(report['latency']['int8']['median_ms'], 1e-6), 2)
+
+    os.makedirs(out_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(weights))[0]
+    report_path = os.path.join(out_dir, f"{stem}_int8_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(report_path, 'w') as fh:
+        json.dump(report, fh, indent=4)
+    print(f"📄 Report saved: {report_path}")
+    return report
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="INT8 quantization of the detector models (OpenVINO PTQ)")
+    ap.add_argument("videos", nargs="+", help="Lane videos used for calibration + evaluation")
+    ap.add_argument("--weights", nargs="*", default=None,
+                    help="Default: yolov8n.pt + models/custom_ambulance.pt (if present)")
+    ap.add_argument("--calib-frames", type=int, default=300)
+    ap.add_argument("--eval-frames", type=int, default=100)
+    args = ap.parse_args()
+
+    weights = args.weights or ["yolov8n.pt"] + (["models/custom_ambulance.pt"]
+                                                if os.path.exists("models/custom_ambulance.pt") else [])
+    for w in weights:
+        r = quantize_and_report(w, args.videos, args.calib_frames, args.eval_frames)
+        print(f"🏁 {w}: INT8 {r['latency']['int8']['median_ms']} ms vs FP32 "
+              f"{r['latency']['fp32']['median_ms']} ms (x{r['speedup_median']})")
+        for cls, s in r['per_class_recall'].items():
+            print(f"   {cls:12s} recall {s['recall']:.3f}  (n={s['reference']})")
+    sys.exit(0)
@@ -0,0 +1,45 @@
+import cv2
+import cvzone
+
+try:
+    from src.detections import LABELS
+except ImportError:
+    from detections import LABELS
+
+# Label text + colour per category
+STYLE = {
+    'car': ("Car", (255, 0, 255)),
+    'bike': ("Bike", (0, 255, 255)),
+    'heavy': ("Heavy", (0, 165, 255)),
+    'rickshaw': ("Auto", (255, 255, 0))
+}
+
+
+# === LAZY RENDERER ===
+# Called only for lanes that are actually on screen (or saved as evidence)
+def draw_detections(img, dets):
+    for i in range(len(dets)):
+        x1, y1, x2, y2 = (int(v) for v in dets.boxes[i])
+        tid = f" #{dets.track_ids[i]}" if dets.track_ids is not None else ""
+        if dets.ambulance[i]:
+            draw_ambulance_box(img, x1, y1, x2, y2, float(dets.scores[i]), tid)
+        else:
+            label, color = STYLE.get(LABELS[dets.classes[i]], ("Vehicle", (200, 200, 200)))
+            draw_box(img, x1, y1, x2, y2, label + tid, color)
+    return img
+
+
+# Standard Box
+def draw_box(img, x1, y1, x2, y2, label, color):
+    cvzone.cornerRect(img, (x1, y1, x2-x1, y2-y1), l=9, rt=2, colorR=color)
+    cvzone.putTextRect(img, f'{label}', (max(0, x1), max(35, y1)), scale=1, thickness=1, offset=3, colorR=color)
+
+
+# Special Ambulance Box
+def draw_ambulance_box(img, x1, y1, x2, y2, score, suffix=""):
+    # Flashing Red Border
+    cv2.rectangle(img, (x1, y1), (x2, y2), (0, 0, 255), 4)
+    # Add "Priority" Label
+    label = f"AMBULANCE {int(score*100)}%{suffix}"
+    cv2.rectangle(img, (x1, y1-30), (x1+200, y1), (0, 0, 255), -1)
+    cv2.putText(img, label, (x1+5, y1-8), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
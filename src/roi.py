@@ -0,0 +1,73 @@
+import cv2
+import numpy as np
+
+try:
+    from src import config
+except ImportError:
+    import config
+
+
+class LaneROI:
+    """
+    Region of interest for one approach lane.
+    The detector crops to the polygon's bounding rectangle BEFORE inference
+    and drops boxes whose ground point falls outside the polygon mask.
+    """
+
+    def __init__(self, polygon, stop_line=None):
+        self.polygon = [(float(x), float(y)) for x, y in polygon]
+        self.stop_line = stop_line
+        self._cache = {}  # (h, w) -> (rect, mask)
+
+    @classmethod
+    def from_config(cls, lane):
+        cfg = config.LANE_ROIS.get(lane)
+        if not cfg or not cfg.get('polygon'):
+            return None
+        return cls(cfg['polygon'], cfg.get('stop_line'))
+
+    # --- PRECOMPUTED GEOMETRY (Once per frame size) ---
+    def geometry(self, shape):
+        h, w = shape[:2]
+        if (h, w) not in self._cache:
+            pts = np.array([[x * w, y * h] for x, y in self.polygon], dtype=np.int32)
+            x0, y0, bw, bh = cv2.boundingRect(pts)
+            x0, y0 = max(0, x0), max(0, y0)
+            x1, y1 = min(w, x0 + bw), min(h, y0 + bh)
+
+            mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+            cv2.fillPoly(mask, [pts - [x0, y0]], 255)
+            self._cache[(h, w)] = ((x0, y0, x1, y1), mask)
+        return self._cache[(h, w)]
+
+    def crop(self, frame):
+        """Returns a VIEW of the frame (drawing on it draws on the full frame)."""
+        (x0, y0, x1, y1), _ = self.geometry(frame.shape)
+        return frame[y0:y1, x0:x1]
+
+    def mask_for(self, shape):
+        return self.geometry(shape)[1]
+
+    def stop_line_px(self, shape):
+        if not self.stop_line:
+            return None
+        h, w = shape[:2]
+        (ax, ay), (bx, by) = self.stop_line
+        return (int(ax * w), int(ay * h)), (int(bx * w), int(by * h))
+
+
+def inside_mask(mask, boxes):
+    """Vehicle's ground point (bottom-center of box) must lie on the lane. boxes = (N, 4)"""
+    mh, mw = mask.shape[:2]
+    cx = np.clip((boxes[:, 0] + boxes[:, 2]) // 2, 0, mw - 1)
+    cy = np.clip(boxes[:, 3] - 1, 0, mh - 1)
+    return mask[cy, cx] > 0
+
+
+def load_lane_rois(lanes):
+    rois = {}
+    for lane in lanes:
+        roi = LaneROI.from_config(lane)
+        if roi is not None:
+            rois[lane] = roi
+    return rois
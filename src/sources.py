@@ -0,0 +1,140 @@
+import os
+import time
+import cv2
+
+try:
+    from src import config
+except ImportError:
+    import config
+
+KINDS = ('file', 'rtsp', 'http', 'device')
+
+
+# --- 1. WHAT IS THIS SOURCE? ---
+def parse_source(src):
+    """'0' -> 0 (camera index), URLs / file paths stay strings."""
+    if isinstance(src, int):
+        return src
+    src = str(src).strip()
+    return int(src) if src.isdigit() else src
+
+
+def source_kind(src):
+    src = parse_source(src)
+    if isinstance(src, int):
+        return 'device'
+    low = src.lower()
+    if low.startswith(('rtsp://', 'rtsps://', 'rtmp://')):
+        return 'rtsp'
+    if low.startswith(('http://', 'https://')):
+        return 'http'
+    return 'file'
+
+
+def is_live(src):
+    return source_kind(src) != 'file'
+
+
+def describe(src):
+    """Short label for the launcher / logs."""
+    src = parse_source(src)
+    kind = source_kind(src)
+    if kind == 'device':
+        return f"Camera {src}"
+    if kind == 'file':
+        return os.path.basename(src)
+    # Credentials never end up on screen
+    rest = src.split('://', 1)[1].split('@')[-1]
+    return f"{kind.upper()} {rest}"
+
+
+# --- 2. OPEN (Latency first for live sources) ---
+def open_capture(src):
+    src = parse_source(src)
+    kind = source_kind(src)
+    if kind == 'rtsp':
+        # Must be set before the capture is created (FFmpeg backend reads it on open)
+        os.environ.setdefault("OPENCV_FFMPEG_CAPTURE_OPTIONS", config.RTSP_FFMPEG_OPTIONS)
+
+    params = []
+    if kind != 'file' and hasattr(cv2, 'CAP_PROP_OPEN_TIMEOUT_MSEC'):
+        # A dead camera makes grab() fail after the timeout instead of hanging forever
+        ms = int(config.SOURCE_TIMEOUT * 1000)
+        params = [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, ms, cv2.CAP_PROP_READ_TIMEOUT_MSEC, ms]
+    cap = cv2.VideoCapture(src, cv2.CAP_ANY, params) if params else cv2.VideoCapture(src)
+    if kind != 'file':
+        # Newest frame, not a backlog (backends without an internal buffer ignore this)
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+
+# --- 3. RECONNECT + HEALTH ---
+class Backoff:
+    """1s, 2s, 4s ... max SOURCE_RECONNECT_MAX. reset() after a good connection."""
+
+    def __init__(self, base=None, cap=None):
+        self.base = config.SOURCE_RECONNECT_BASE if base is None else base
+        self.cap = config.SOURCE_RECONNECT_MAX if cap is None else cap
+        self.attempt = 0
+
+    def next_delay(self):
+        delay = min(self.cap, self.base * 2 ** self.attempt)
+        self.attempt += 1
+        return delay
+
+    def reset(self):
+        self.attempt = 0
+
+
+class SourceHealth:
+    """Per-source counters, written by the reader only (plain attributes, no lock)."""
+
+    def __init__(self, src):
+        self.kind = source_kind(src)
+        self.label = describe(src)
+        self.state = 'connecting'   # connecting / live / reconnecting / ended
+        self.frames = 0
+        self.connects = 0
+        self.reconnects = 0
+        self.failures = 0
+        self.last_error = None
+        self.connected_at = None
+        self.last_frame = None
+        self.fps = 0.0
+
+    def on_connect(self):
+        self.state = 'live'
+        self.connects += 1
+        self.connected_at = time.time()
+
+    def on_frame(self, now=None):
+        now = time.time() if now is None else now
+        if self.last_frame is not None:
+            dt = now - self.last_frame
+            if dt > 0:
+                self.fps = 1.0 / dt if self.fps == 0 else 0.9 * self.fps + 0.1 / dt
+        self.last_frame = now
+        self.frames += 1
+
+    def on_failure(self, error, retry_in=None):
+        self.failures += 1
+        self.last_error = error
+        self.state = 'reconnecting' if retry_in is not None else 'ended'
+        if retry_in is not None:
+            self.reconnects += 1
+
+    def snapshot(self):
+        now = time.time()
+        return {'source': self.label, 'kind': self.kind, 'state': self.state,
+                'frames': self.frames, 'fps': round(self.fps, 1),
+                'frame_age': None if self.last_frame is None else round(now - self.last_frame, 2),
+                'uptime': 0 if self.connected_at is None or self.state != 'live'
+                else round(now - self.connected_at, 1),
+                'reconnects': self.reconnects, 'failures': self.failures,
+                'last_error': self.last_error}
+
+    def __str__(self):
+        s = self.snapshot()
+        age = '-' if s['frame_age'] is None else f"{s['frame_age']:.1f}s"
+        return (f"{s['source']}: {s['state']}, {s['frames']} frames @ {s['fps']} FPS, "
+                f"last frame {age} ago, {s['reconnects']} reconnects")
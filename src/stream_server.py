@@ -0,0 +1,168 @@
+import os
+import sys
+import time
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import cv2
+
+BOUNDARY = "frame"
+
+
+# --- 1. FAKE CAMERA (Video file in a loop, at its own FPS) ---
+class LoopingCamera(threading.Thread):
+    """Encodes the newest frame as JPEG; viewers always get the live frame, not the file start."""
+
+    def __init__(self, path, fps=None, size=None, quality=80):
+        super().__init__(daemon=True, name=f"camera-{os.path.basename(path)}")
+        self.path = path
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            raise FileNotFoundError(path)
+        self.fps = fps or cap.get(cv2.CAP_PROP_FPS) or 25.0
+        cap.release()
+        self.size = size
+        self.quality = quality
+        self.jpeg = None
+        self.seq = 0
+        self.cond = threading.Condition()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        cap = cv2.VideoCapture(self.path)
+        period = 1.0 / self.fps
+        next_t = time.perf_counter()
+        while not self._stop_event.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                continue
+            if self.size:
+                frame = cv2.resize(frame, self.size)
+            ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            if ok:
+                with self.cond:
+                    self.jpeg, self.seq = buf.tobytes(), self.seq + 1
+                    self.cond.notify_all()
+            # Real-time pacing like a real camera
+            next_t += period
+            delay = next_t - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_t = time.perf_counter()
+        cap.release()
+
+    def wait_frame(self, last_seq, timeout=1.0):
+        with self.cond:
+            self.cond.wait_for(lambda: self.seq != last_seq, timeout)
+            return self.seq, self.jpeg
+
+    def stop(self):
+        self._stop_event.set()
+
+
+# --- 2. HTTP (multipart/x-mixed-replace = what most IP cameras call MJPEG) ---
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, fmt, *args):
+        pass  # Quiet: one line per request is noise for a stand-in camera
+
+    def do_GET(self):
+        name = self.path.strip('/').split('?')[0]
+        name = name[:-len('.mjpg')] if name.endswith('.mjpg') else name
+        cam = self.server.cameras.get(name)
+        if cam is None:
+            self.send_error(404, f"Unknown stream '{name}' (have: {sorted(self.server.cameras)})")
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        # --cut-every: connection is dropped on purpose to exercise client reconnects
+        cut_at = time.time() + self.server.cut_every if self.server.cut_every else None
+        seq = -1
+        try:
+            while not self.server.stopping:
+                seq, jpeg = cam.wait_frame(seq)
+                if jpeg is None:
+                    continue
+                self.wfile.write(f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                                 f"Content-Length: {len(jpeg)}\r\n\r\n".encode())
+                self.wfile.write(jpeg)
+                self.wfile.write(b"\r\n")
+                if cut_at and time.time() > cut_at:
+                    break
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Viewer went away
+
+
+class StreamServer:
+    """
+    Local stand-in for IP cameras: every video becomes http://host:port/<name>.mjpg
+    (name = file name without extension, also /0.mjpg, /1.mjpg ... in argument order).
+
+        srv = StreamServer(['north.mp4']).start()
+        cap = cv2.VideoCapture(srv.url('north'))
+    """
+
+    def __init__(self, videos, host="127.0.0.1", port=0, fps=None, size=None, quality=80, cut_every=None):
+        self.cameras = {}
+        for i, path in enumerate(videos):
+            cam = LoopingCamera(path, fps, size, quality)
+            self.cameras[os.path.splitext(os.path.basename(path))[0]] = cam
+            self.cameras[str(i)] = cam
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.cameras = self.cameras
+        self.httpd.cut_every = cut_every
+        self.httpd.stopping = False
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True, name="stream-server")
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    def url(self, name):
+        host = self.httpd.server_address[0]
+        return f"http://{host}:{self.port}/{name}.mjpg"
+
+    def start(self):
+        for cam in set(self.cameras.values()):
+            cam.start()
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.stopping = True
+        for cam in set(self.cameras.values()):
+            cam.stop()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Serve video files as looping MJPEG camera streams")
+    ap.add_argument("videos", nargs="+")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8090)
+    ap.add_argument("--fps", type=float, default=None, help="Override the file FPS")
+    ap.add_argument("--size", default=None, help="WxH, e.g. 1280x720")
+    ap.add_argument("--quality", type=int, default=80, help="JPEG quality")
+    ap.add_argument("--cut-every", type=float, default=None,
+                    help="Drop each connection after N seconds (reconnect testing)")
+    args = ap.parse_args()
+
+    size = tuple(int(v) for v in args.size.lower().split('x')) if args.size else None
+    srv = StreamServer(args.videos, args.host, args.port, args.fps, size, args.quality, args.cut_every).start()
+    for name, cam in srv.cameras.items():
+        if not name.isdigit():
+            print(f"📡 {srv.url(name)}  ({cam.fps:.0f} FPS)")
+    print("Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        srv.stop()
+    sys.exit(0)
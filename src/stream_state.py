@@ -0,0 +1,42 @@
+import threading
+from collections import deque
+
+try:
+    from src.tracker import LaneTracker
+    from src.motion import MotionGate
+    from src import config
+except ImportError:
+    from tracker import LaneTracker
+    from motion import MotionGate
+    import config
+
+# Counters of the hybrid ambulance cascade (see TrafficDetector.CASCADE)
+CASCADE_KEYS = ['shape', 'color', 'light', 'edge', 'text', 'early_reject', 'early_accept', 'full']
+
+
+class StreamState:
+    """
+    Everything that belongs to ONE lane / camera stream.
+    The detector itself only holds the loaded models, so one TrafficDetector
+    can serve many lanes (and intersections) without cross-talk.
+    """
+
+    def __init__(self, stream_id, roi=None):
+        self.stream_id = stream_id
+        self.roi = roi
+        self.tiles = config.TILE_GRIDS.get(stream_id)  # (cols, rows) or None = whole frame
+        self.lock = threading.Lock()  # One analysis of this stream at a time
+
+        self.history = deque(maxlen=5)  # Last 5 frames for temporal smoothing
+        self.tracker = LaneTracker()
+        self.gate = MotionGate()
+        self.cascade_stats = {k: 0 for k in CASCADE_KEYS}
+
+        # Detection cache (only for file sources, see TrafficDetector.attach_cache)
+        self.cache_source = None
+        self.cache = None
+
+    def vote(self, is_ambulance):
+        """Only confirm if detected in 3 out of last 5 frames of THIS stream."""
+        self.history.append(is_ambulance)
+        return sum(self.history) >= 3
@@ -0,0 +1,212 @@
+import time
+import numpy as np
+
+try:
+    from src import config
+    from src.detections import Detections, LABELS, AMBULANCE
+except ImportError:
+    import config
+    from detections import Detections, LABELS, AMBULANCE
+
+# --- CONSTANT-VELOCITY KALMAN MODEL ---
+# State = [cx, cy, w, h, v_cx, v_cy, v_w, v_h], one step = one video frame
+_F = np.eye(8)
+_F[:4, 4:] = np.eye(4)
+_H = np.eye(4, 8)
+_Q = np.diag([1.0, 1.0, 1.0, 1.0, 0.01, 0.01, 0.0001, 0.0001])
+_R = np.diag([1.0, 1.0, 10.0, 10.0])
+_P0 = np.diag([10.0, 10.0, 10.0, 10.0, 10000.0, 10000.0, 10000.0, 10000.0])
+
+
+def xyxy_to_state(boxes):
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    w = boxes[:, 2] - boxes[:, 0]
+    h = boxes[:, 3] - boxes[:, 1]
+    return np.stack([boxes[:, 0] + w / 2, boxes[:, 1] + h / 2, w, h], axis=1)
+
+
+def state_to_xyxy(x):
+    w = np.maximum(x[:, 2], 1)
+    h = np.maximum(x[:, 3], 1)
+    return np.stack([x[:, 0] - w / 2, x[:, 1] - h / 2, x[:, 0] + w / 2, x[:, 1] + h / 2], axis=1)
+
+
+def iou_matrix(a, b):
+    """IoU between every box in a (N,4) and b (M,4) -> (N,M)."""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)))
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def greedy_match(iou, threshold):
+    """Highest IoU pairs first (SORT/ByteTrack style, no scipy needed)."""
+    matches = []
+    if iou.size == 0:
+        return matches
+    used_t, used_d = set(), set()
+    order = np.dstack(np.unravel_index(np.argsort(-iou, axis=None), iou.shape))[0]
+    for t, d in order:
+        if iou[t, d] < threshold:
+            break
+        if t in used_t or d in used_d:
+            continue
+        used_t.add(t); used_d.add(d)
+        matches.append((int(t), int(d)))
+    return matches
+
+
+class LaneTracker:
+    """
+    Lightweight IoU + Kalman multi-object tracker for ONE lane (NumPy only).
+    predict() runs on every video frame, update() only on detection keyframes,
+    so track IDs survive the SKIP frames between YOLO passes.
+    hold() on keyframes the motion gate skipped: static road = tracks stay put.
+    """
+
+    def __init__(self, iou_threshold=None, max_age=None, min_hits=None):
+        self.iou_threshold = config.TRACKER_IOU if iou_threshold is None else iou_threshold
+        self.max_age = config.TRACKER_MAX_AGE if max_age is None else max_age
+        self.min_hits = config.TRACKER_MIN_HITS if min_hits is None else min_hits
+
+        # Track table (parallel arrays, one row per track)
+        self.x = np.zeros((0, 8))
+        self.P = np.zeros((0, 8, 8))
+        self.ids = []
+        self.labels = []
+        self.scores = []
+        self.hits = []
+        self.misses = []
+        self.first_seen = []
+        self.counted = []
+
+        self.anchor = None  # (x, P) right after the last update()
+        self.next_id = 1
+        self.unique_counts = {'car': 0, 'bike': 0, 'heavy': 0, 'rickshaw': 0, 'ambulance': 0}
+
+    # --- EVERY FRAME ---
+    def predict(self):
+        if len(self.ids) == 0:
+            return
+        self.x = self.x @ _F.T
+        self.P = np.einsum('ij,njk,lk->nil', _F, self.P, _F) + _Q
+
+    # --- KEYFRAMES ONLY ---
+    def update(self, detections, now=None):
+        """
+        detections = Detections of this keyframe
+        Returns tracks that got confirmed in this update (new vehicles).
+        """
+        now = time.time() if now is None else now
+        det_boxes = detections.boxes.astype(np.float64)
+        det_labels = detections.labels()
+
+        matches = greedy_match(iou_matrix(state_to_xyxy(self.x), det_boxes), self.iou_threshold)
+        matched_t = {t for t, _ in matches}
+        matched_d = {d for _, d in matches}
+
+        # Kalman correction for matched tracks (vectorized)
+        if matches:
+            ti = np.array([t for t, _ in matches])
+            z = xyxy_to_state(det_boxes[[d for _, d in matches]])
+            P = self.P[ti]
+            S = P[:, :4, :4] + _R
+            K = P[:, :, :4] @ np.linalg.inv(S)
+            y = z - self.x[ti, :4]
+            self.x[ti] += (K @ y[:, :, None])[:, :, 0]
+            self.P[ti] = P - K @ P[:, :4, :]
+
+        for t, d in matches:
+            self.hits[t] += 1
+            self.misses[t] = 0
+            self.labels[t] = det_labels[d]
+            self.scores[t] = float(detections.scores[d])
+
+        for t in range(len(self.ids)):
+            if t not in matched_t:
+                self.misses[t] += 1
+
+        # Drop lost tracks
+        keep = [t for t in range(len(self.ids)) if self.misses[t] <= self.max_age]
+        if len(keep) != len(self.ids):
+            self._select(keep)
+
+        # New tracks for unmatched detections
+        new = [d for d in range(len(detections)) if d not in matched_d]
+        if new:
+            z = xyxy_to_state(det_boxes[new])
+            x = np.zeros((len(new), 8))
+            x[:, :4] = z
+            self.x = np.vstack([self.x, x])
+            self.P = np.concatenate([self.P, np.repeat(_P0[None], len(new), axis=0)])
+            for d in new:
+                self.ids.append(self.next_id); self.next_id += 1
+                self.labels.append(det_labels[d])
+                self.scores.append(float(detections.scores[d]))
+                self.hits.append(1); self.misses.append(0)
+                self.first_seen.append(now); self.counted.append(False)
+
+        # Per-vehicle counting (each track ID counted once)
+        confirmed = []
+        for t in range(len(self.ids)):
+            if not self.counted[t] and self.hits[t] >= self.min_hits:
+                self.counted[t] = True
+                self.unique_counts[self.labels[t]] = self.unique_counts.get(self.labels[t], 0) + 1
+                confirmed.append(self._track(t, now))
+        self.anchor = (self.x.copy(), self.P.copy())
+        return confirmed
+
+    # --- MOTION GATE SKIPPED THE KEYFRAME ---
+    def hold(self):
+        """
+        Nothing moved since the last detection: tracks go back to their last
+        corrected state with zero velocity, so predict() no longer drifts them.
+        Not a miss (max_age only counts keyframes YOLO actually looked at).
+        """
+        if self.anchor is None or len(self.anchor[0]) != len(self.ids):
+            return
+        x, P = self.anchor
+        x[:, 4:] = 0
+        self.x, self.P = x.copy(), P.copy()
+
+    def _select(self, keep):
+        self.x, self.P = self.x[keep], self.P[keep]
+        for name in ('ids', 'labels', 'scores', 'hits', 'misses', 'first_seen', 'counted'):
+            setattr(self, name, [getattr(self, name)[t] for t in keep])
+
+    def _track(self, t, now):
+        x1, y1, x2, y2 = state_to_xyxy(self.x[t:t+1])[0]
+        return {'id': self.ids[t], 'box': (int(x1), int(y1), int(x2), int(y2)),
+                'label': self.labels[t], 'dwell': now - self.first_seen[t]}
+
+    # --- OUTPUT ---
+    def _live(self):
+        return [t for t in range(len(self.ids)) if self.hits[t] >= self.min_hits and self.misses[t] == 0]
+
+    def tracks(self, now=None):
+        """Confirmed tracks that were seen in the last keyframe(s)."""
+        now = time.time() if now is None else now
+        return [self._track(t, now) for t in self._live()]
+
+    def as_detections(self):
+        """Current (predicted) track boxes in the same structure the detector returns."""
+        live = self._live()
+        if not live:
+            return Detections.empty()
+        classes = [LABELS.index(self.labels[t]) for t in live]
+        return Detections(state_to_xyxy(self.x[live]), classes, [self.scores[t] for t in live],
+                          [c == AMBULANCE for c in classes], [self.ids[t] for t in live])
+
+    def live_breakdown(self):
+        bk = {'car': 0, 'bike': 0, 'heavy': 0, 'rickshaw': 0}
+        for t in self._live():
+            if self.labels[t] in bk:
+                bk[self.labels[t]] += 1
+        return bk
+
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the modules the same way the apps do (src.x, repo root on the path)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,110 @@
+import os
+import numpy as np
+import pytest
+
+from src import backends
+
+
+class _T:
+    """Tensor stand-in (.cpu().numpy())."""
+
+    def __init__(self, a):
+        self.a = np.asarray(a)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.a
+
+
+class _Boxes:
+    def __init__(self, rows):
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, 6)
+        self.xyxy, self.conf, self.cls = _T(rows[:, :4]), _T(rows[:, 4]), _T(rows[:, 5])
+
+
+class _Result:
+    def __init__(self, rows):
+        self.boxes = _Boxes(rows)
+
+
+class StubModel:
+    """Returns fixed rows (x1, y1, x2, y2, conf, cls) per frame index."""
+
+    def __init__(self, per_frame):
+        self.per_frame = per_frame
+
+    def __call__(self, frames, conf=None, verbose=False):
+        return [_Result(self.per_frame[int(f[0, 0, 0])]) for f in frames]
+
+
+def frames(n):
+    out = [np.zeros((8, 8, 3), np.uint8) for _ in range(n)]
+    for i, f in enumerate(out):
+        f[0, 0, 0] = i  # Frame index for the stub
+    return out
+
+
+REF = [[[10, 10, 50, 50, 0.90, 2], [100, 100, 160, 140, 0.80, 7]],
+       [[20, 20, 60, 60, 0.70, 2]]]
+
+
+def run(monkeypatch, outputs):
+    models = {'torch': StubModel(REF), **{k: StubModel(v) for k, v in outputs.items()}}
+    monkeypatch.setattr(backends, "load_model", lambda weights, name: models[name])
+    return backends.check_parity(frames(2), backends=list(models), conf=0.25)
+
+
+def test_identical_backend_has_full_recall(monkeypatch):
+    r = run(monkeypatch, {'onnxruntime': REF})
+    assert r['torch']['recall'] == 1.0 and r['onnxruntime']['recall'] == 1.0
+    assert r['onnxruntime']['extra'] == 0
+    assert r['onnxruntime']['max_conf_diff'] == 0.0
+    assert r['onnxruntime']['ms_per_frame'] >= 0
+
+
+def test_small_shift_and_conf_drift_still_match(monkeypatch):
+    out = [[[10, 10, 50, 51, 0.85, 2], [100, 100, 160, 141, 0.80, 7]],
+           [[20, 20, 60, 60, 0.72, 2]]]
+    r = run(monkeypatch, {'openvino': out})['openvino']
+    assert r['recall'] == 1.0 and r['extra'] == 0
+    assert r['max_conf_diff'] == pytest.approx(0.05)
+
+
+def test_wrong_class_low_iou_and_extra_boxes_count(monkeypatch):
+    out = [[[10, 10, 50, 50, 0.90, 5],          # Same box, other class -> missed + extra
+            [100, 100, 130, 140, 0.80, 7]],     # IoU 0.5 < 0.9 -> missed + extra
+           [[20, 20, 60, 60, 0.70, 2], [200, 200, 220, 220, 0.5, 2]]]  # Found + 1 extra
+    r = run(monkeypatch, {'onnxruntime': out})['onnxruntime']
+    assert r['recall'] == pytest.approx(1 / 3)
+    assert r['extra'] == 3
+
+
+def test_empty_reference_is_full_recall(monkeypatch):
+    models = {'torch': StubModel([[], []]), 'onnxruntime': StubModel([[], [[0, 0, 5, 5, 0.5, 2]]])}
+    monkeypatch.setattr(backends, "load_model", lambda weights, name: models[name])
+    r = backends.check_parity(frames(2), backends=['onnxruntime'], conf=0.25)['onnxruntime']
+    assert r['recall'] == 1.0 and r['extra'] == 1
+
+
+def test_int8_profile_keeps_int8_backend():
+    assert backends.resolve_profile('int8') == ('openvino', True)
+    assert backends.resolve_profile('int8', 'openvino') == ('openvino', True)
+    assert backends.resolve_profile('onnx', 'torch') == ('torch', False)
+
+
+@pytest.mark.parametrize("backend", ['torch', 'onnxruntime'])
+def test_int8_profile_on_fp32_only_backend_is_an_error(backend):
+    with pytest.raises(ValueError, match="INT8"):
+        backends.resolve_profile('int8', backend)
+
+
+def test_int8_export_older_than_weights_is_refused(tmp_path):
+    weights = tmp_path / "yolov8n.pt"
+    export = tmp_path / "yolov8n_int8_openvino_model"
+    export.mkdir()
+    weights.write_bytes(b"retrained")
+    os.utime(export, (1, 1))
+    with pytest.raises(RuntimeError, match="quantize.py"):
+        backends.load_model(str(weights), 'openvino', int8=True)
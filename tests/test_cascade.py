@@ -0,0 +1,78 @@
+import itertools
+import numpy as np
+import pytest
+
+from src import detect
+from src.features import FrameFeatures
+from src.stream_state import CASCADE_KEYS
+
+
+@pytest.fixture
+def detector(monkeypatch):
+    # No weights / ultralytics needed, only the hybrid scoring is used
+    monkeypatch.setattr(detect, "load_model", lambda *a, **k: None)
+    return detect.TrafficDetector(backend="torch")
+
+
+def full_sum(det, s):
+    return sum(s[name] * w for name, w in det.WEIGHTS.items())
+
+
+class TableFeatures:
+    """Stand-in for FrameFeatures: thresh_crop() hands the box index to check_text_regions."""
+
+    def ratios_many(self, boxes):
+        return np.zeros((len(boxes), 4))
+
+    def thresh_crop(self, x1, y1, x2, y2):
+        return int(x1)
+
+
+def test_cascade_matches_full_sum_for_every_stage_outcome(detector, monkeypatch):
+    # Every value each stage can return
+    values = {'shape': [0.0, 0.5, 1.0], 'color': [0.0, 0.4, 0.6, 1.0], 'light': [0.0, 1.0],
+              'edge': [0.3, 1.0], 'text': [i / 10 for i in range(11)]}
+    names = list(values)
+    table = np.array(list(itertools.product(*values.values())))
+    col = {n: table[:, i] for i, n in enumerate(names)}
+
+    monkeypatch.setattr(detector, "check_shape", lambda w, h: col['shape'])
+    monkeypatch.setattr(detector, "check_color", lambda r: col['color'])
+    monkeypatch.setattr(detector, "check_lights", lambda r: col['light'])
+    monkeypatch.setattr(detector, "check_edges", lambda r: col['edge'])
+    monkeypatch.setattr(detector, "check_text_regions", lambda j: col['text'][j])
+
+    n = len(table)
+    boxes = np.stack([np.arange(n), np.zeros(n), np.arange(n) + 1, np.ones(n)], axis=1).astype(int)
+    stats = {k: 0 for k in CASCADE_KEYS}
+    decided, score = detector.score_ambulance(TableFeatures(), boxes, stats)
+
+    expected = full_sum(detector, col)
+    np.testing.assert_array_equal(decided, expected > detector.AMB_THRESHOLD)
+    # Early exits happened, and only undecided boxes paid for the text stage
+    assert stats['early_reject'] and stats['early_accept']
+    assert stats['text'] == stats['full']
+    # Early exits report a bound, never more than the full sum
+    assert np.all(score <= expected + 1e-9)
+
+
+def test_cascade_matches_full_sum_on_pixels(detector):
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (360, 640, 3), dtype=np.uint8)
+    frame[100:200, 100:300] = (250, 250, 250)   # White van body
+    frame[140:150, 100:300] = (0, 0, 230)       # Red stripe
+    frame[105:110, 150:160] = 255               # Siren
+    x1 = rng.integers(0, 560, 300); y1 = rng.integers(0, 300, 300)
+    boxes = np.stack([x1, y1, x1 + rng.integers(10, 200, 300), y1 + rng.integers(10, 120, 300)], axis=1)
+    boxes = np.vstack([boxes, [[100, 100, 300, 200], [95, 95, 305, 205]]])
+
+    feats = FrameFeatures(frame)
+    stats = {k: 0 for k in CASCADE_KEYS}
+    decided, _ = detector.score_ambulance(feats, boxes, stats)
+
+    ratios = feats.ratios_many(boxes)
+    s = {'shape': detector.check_shape(boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]),
+         'color': detector.check_color(ratios), 'light': detector.check_lights(ratios),
+         'edge': detector.check_edges(ratios),
+         'text': np.array([detector.check_text_regions(feats.thresh_crop(*b)) for b in boxes])}
+    np.testing.assert_array_equal(decided, full_sum(detector, s) > detector.AMB_THRESHOLD)
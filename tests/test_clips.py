@@ -0,0 +1,42 @@
+import time
+import numpy as np
+
+from src import config
+from src.clips import ClipRecorder
+from src.database import TrafficDB
+
+
+def wait_for(cond, timeout=10.0):
+    end = time.time() + timeout
+    while not cond() and time.time() < end:
+        time.sleep(0.05)
+    return cond()
+
+
+def test_clip_is_linked_once_its_challan_row_exists(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "CLIP_SIZE", (64, 48))
+    monkeypatch.setattr(config, "CLIP_CODEC", "MJPG")
+    monkeypatch.setattr(config, "CLIP_EXT", ".avi")
+    db = TrafficDB(str(tmp_path / "t.db"))
+    rec = ClipRecorder(["North"], db.db_path, root=str(tmp_path / "ev"))
+    rec.start()
+    snap = str(tmp_path / "ev" / "violations" / "VIO_North_1.jpg")
+    event = "VIO_North_1"
+
+    frame = np.zeros((96, 128, 3), np.uint8)
+    for i in range(10):
+        rec.push("North", frame, i * 0.1)
+    clip = rec.trigger("North", event, link=event)
+    for i in range(10, 40):
+        rec.push("North", frame, i * 0.1)
+
+    assert wait_for(lambda: rec.written == 1)
+    assert rec.linked == 0 and len(rec.pending) == 1  # Evidence writer has not logged the row yet
+
+    db.log_challan("North", "Red Light Violation", 500, snap, event_id=event)
+    assert wait_for(lambda: rec.linked == 1)
+    rec.stop()
+    row = db.cursor.execute("SELECT clip_path FROM challans WHERE event_id = ?", (event,)).fetchone()
+    assert row[0] == clip
+    assert rec.unlinked == 0
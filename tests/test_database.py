@@ -0,0 +1,19 @@
+import csv
+import glob
+
+from src.database import TrafficDB
+
+
+def test_export_labels_every_challan_column(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db = TrafficDB(str(tmp_path / "t.db"))
+    db.log_challan("North", "Red Light Violation", 500, "ev/VIO_North_1.jpg", event_id="VIO_North_1")
+    db.attach_clip("VIO_North_1", "ev/clips/VIO_North_1.mp4")
+    assert db.export_report().startswith("✅")
+
+    rows = list(csv.reader(open(glob.glob("Traffic_Report_*.csv")[0])))
+    i = rows.index(['--- VIOLATION CHALLANS ---'])
+    header, row = rows[i + 1], rows[i + 2]
+    assert header[-1] == 'Clip'
+    assert len(row) == len(header)
+    assert row[-2:] == ["ev/VIO_North_1.jpg", "ev/clips/VIO_North_1.mp4"]
@@ -0,0 +1,68 @@
+import cv2
+import numpy as np
+import pytest
+
+from src.det_cache import DetectionCache
+from src.pacing import keyframe_step
+from src.capture import FramePacket
+from src import config
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (64, 48))
+    for i in range(20):
+        out.write(np.full((48, 64, 3), i * 10, np.uint8))
+    out.release()
+    return path
+
+
+def det(x, n=1):
+    boxes = np.array([[x, x, x + 10, x + 10]] * n, np.float32)
+    return boxes, np.full(n, 0.9, np.float32), np.full(n, 2, np.float32)
+
+
+def test_two_caches_on_one_file_do_not_mix_rows(video, tmp_path):
+    key = {'model': 'stub'}
+    a = DetectionCache(video, key, root=str(tmp_path / "cache"))
+    b = DetectionCache(video, key, root=str(tmp_path / "cache"))  # Second lane / run, same dir
+    a.put(0, det(1))
+    a.put(1, det(2, n=3))
+    b.put(5, det(500))
+    a.put(2, det(3))
+
+    np.testing.assert_array_equal(b.get(5)[0][0], [[500, 500, 510, 510]])
+    np.testing.assert_array_equal(a.get(5)[0][0], [[500, 500, 510, 510]])
+    assert len(b.get(1)[0][0]) == 3
+    np.testing.assert_array_equal(b.get(2)[0][0], [[3, 3, 13, 13]])
+
+    # Reopening keeps every indexed row
+    a.close(); b.close()
+    c = DetectionCache(video, key, root=str(tmp_path / "cache"))
+    np.testing.assert_array_equal(c.get(0)[0][0], [[1, 1, 11, 11]])
+    np.testing.assert_array_equal(c.get(5)[0][0], [[500, 500, 510, 510]])
+
+
+def keyframes(ids, skipped=0):
+    pos, out = None, []
+    for fid in ids:
+        is_key, pos = keyframe_step(pos, FramePacket(None, fid, 0.0, skipped))
+        if is_key:
+            out.append(fid)
+    return out
+
+
+def test_file_keyframes_repeat_every_loop(monkeypatch):
+    monkeypatch.setattr(config, "SKIP_FRAMES", 2)
+    loop = list(range(44))  # Not a multiple of SKIP_FRAMES + 1
+    first, second = keyframes(loop), keyframes(loop + loop)[len(keyframes(loop)):]
+    assert first == second == list(range(0, 44, 3))
+    # grab()-only decode delivers 2, 5, 8 ... -> each one is still a keyframe
+    assert keyframes(range(2, 44, 3)) == list(range(2, 44, 3))
+
+
+def test_live_keyframes_count_source_frames(monkeypatch):
+    monkeypatch.setattr(config, "SKIP_FRAMES", 2)
+    assert len(keyframes([None] * 30)) == 10
+    assert len(keyframes([None] * 10, skipped=2)) == 10
@@ -0,0 +1,52 @@
+import os
+import numpy as np
+
+from src import config
+from src.database import TrafficDB
+from src.evidence import EvidenceWriter
+
+
+def count_challans(db):
+    return db.cursor.execute("SELECT COUNT(*) FROM challans").fetchone()[0]
+
+
+def test_full_queue_drops_snapshots_but_never_challans(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db = TrafficDB(str(tmp_path / "t.db"))
+    w = EvidenceWriter(db.db_path, root=str(tmp_path / "ev"), maxsize=1, db=db)  # Not started -> queue stays full
+    img = np.zeros((32, 32, 3), np.uint8)
+
+    paths = [w.submit(img, f"violations/V{i}", challan=("North", "Red Light Violation", 500)) for i in range(3)]
+    assert all(paths)
+    assert w.written_sync == 2
+    assert count_challans(db) == 2  # Inline ones have their row already
+    assert all(os.path.exists(p) for p in paths[1:])
+    assert w.submit(img, "AMB") is None
+    assert w.dropped == 1
+
+    w.start()
+    w.stop()
+    assert count_challans(db) == 3
+    assert w.committed == 3
+    events = [r[0] for r in db.cursor.execute("SELECT event_id FROM challans ORDER BY event_id")]
+    assert events == ["V0", "V1", "V2"]  # File name = what the clip links on
+
+
+def test_challan_row_only_when_the_image_exists(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db = TrafficDB(str(tmp_path / "t.db"))
+    w = EvidenceWriter(db.db_path, root=str(tmp_path / "ev"), maxsize=1, db=db)
+    img = np.zeros((32, 32, 3), np.uint8)
+    w.submit(img, "violations/V0", challan=("North", "Red Light Violation", 500))  # Fills the queue
+
+    tries = []
+
+    def disk_full(image, path):
+        tries.append(path)
+        raise OSError("No space left on device")
+    monkeypatch.setattr(w, "_save", disk_full)
+    assert w.submit(img, "violations/V1", challan=("North", "Red Light Violation", 500)) is None
+    assert len(tries) == 1 + config.EVIDENCE_CHALLAN_RETRIES
+    assert count_challans(db) == 0
+    assert w.challans_failed == 1 and w.committed == 0
+    assert "1 challans not logged" in w.report()[0]
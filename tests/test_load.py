@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from src import detect
+
+
+@pytest.fixture
+def detector(monkeypatch):
+    monkeypatch.setattr(detect, "load_model", lambda *a, **k: None)
+    return detect.TrafficDetector(backend="torch")
+
+
+def load_of(det, names):
+    """Load score of one frame with these (non-overlapping, 60x60) vehicles."""
+    cls = np.array([det.classNames.index(n) for n in names])
+    x = np.arange(len(names)) * 70
+    xyxy = np.stack([x, np.zeros_like(x), x + 60, np.full_like(x, 60)], axis=1).astype(np.float32)
+    frame = np.zeros((360, 640, 3), np.uint8)
+    _, _, load, _, _, _ = det._analyze_result(frame, (xyxy, np.full(len(names), 0.9), cls), None,
+                                              det.state_for("test"))
+    return load
+
+
+@pytest.mark.parametrize("names, load", [
+    (["car"], 4),                      # One car never crosses the challan threshold (load > 5)
+    (["car", "car"], 8),
+    (["motorbike"], 2),
+    (["car", "motorbike"], 6),
+    (["bus"], 6),
+    (["truck", "car"], 10),
+])
+def test_load_is_four_points_per_car_equivalent(detector, names, load):
+    assert load_of(detector, names) == load
+
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from src import config, detect
+from src.capture import FramePacket
+from src.pipeline import DetectionStage
+
+
+@pytest.fixture
+def stage(monkeypatch):
+    monkeypatch.setattr(detect, "load_model", lambda *a, **k: None)
+    monkeypatch.setattr(config, "MOTION_GATE_ENABLED", False)
+    monkeypatch.setattr(config, "DETECTOR_MAX_FAILURES", 3)
+    return DetectionStage(detect.TrafficDetector(backend="torch"), {"North": "cam-north"})
+
+
+def packet(i):
+    return FramePacket(np.zeros((360, 640, 3), np.uint8), i, i * 0.1, 0)
+
+
+def test_detector_errors_are_counted_then_raised(stage, monkeypatch):
+    stage.last_data["North"]['load'] = 12
+
+    def broken(frames, frame_ids=None):
+        raise RuntimeError("model file missing")
+    monkeypatch.setattr(stage.detector, "analyze_frames", broken)
+
+    i = 0
+    for _ in range(2):
+        u = stage.process({"North": packet(i)})["North"]
+        i += config.SKIP_FRAMES + 1  # Next keyframe
+        assert not u.analyzed
+        assert u.data['load'] == 12  # Last known load, not an "empty road"
+    assert stage.failures == 2
+    assert any("failures: 2" in line for line in stage.report())
+
+    with pytest.raises(RuntimeError, match="model file missing"):
+        stage.process({"North": packet(i)})
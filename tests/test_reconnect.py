@@ -0,0 +1,53 @@
+import time
+import cv2
+import numpy as np
+import pytest
+
+from src import config
+from src.capture import CaptureReader
+from src.stream_server import StreamServer
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = str(tmp_path / "north.avi")
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25, (160, 120))
+    for i in range(50):
+        out.write(np.full((120, 160, 3), (i * 5) % 255, np.uint8))
+    out.release()
+    return path
+
+
+def test_reader_reconnects_to_a_cut_stream(video, monkeypatch):
+    monkeypatch.setattr(config, "SOURCE_RECONNECT_BASE", 0.2)
+    monkeypatch.setattr(config, "SOURCE_TIMEOUT", 2.0)
+    srv = StreamServer([video], fps=25, cut_every=1.0).start()
+    reader = CaptureReader(srv.url('north'), name='North')
+    reader.start()
+    try:
+        got, late = 0, 0
+        t0 = time.time()
+        while time.time() - t0 < 5:
+            if reader.read(0.5) is not None:
+                got += 1
+                late += time.time() - t0 > 3.5  # Still arriving after several cuts
+    finally:
+        reader.stop()
+        reader.join(3)
+        srv.stop()
+
+    assert reader.health.reconnects > 0
+    assert got > 25 and late > 0
+    assert not reader.is_alive()
+
+
+def test_dead_source_backs_off(monkeypatch):
+    monkeypatch.setattr(config, "SOURCE_RECONNECT_BASE", 0.2)
+    monkeypatch.setattr(config, "SOURCE_TIMEOUT", 1.0)
+    reader = CaptureReader('http://127.0.0.1:1/none.mjpg', name='South')
+    reader.start()
+    time.sleep(1.5)
+    reader.stop()
+    reader.join(3)
+    assert reader.health.failures > 0 and reader.health.frames == 0
+    assert not reader.is_alive()
@@ -0,0 +1,37 @@
+import numpy as np
+
+from src.detections import Detections, CAR
+from src.tracker import LaneTracker
+
+
+def car_at(x):
+    return Detections([[x, 100, x + 60, 140]], [CAR], [0.9], [False])
+
+
+def moving_tracker():
+    tr = LaneTracker(iou_threshold=0.3, max_age=2, min_hits=1)
+    for i in range(6):
+        tr.predict()
+        tr.update(car_at(100 + 5 * i))
+    return tr
+
+
+def test_held_tracks_do_not_drift():
+    tr = moving_tracker()
+    before = tr.as_detections().boxes.copy()
+    for _ in range(30):
+        tr.predict()
+    assert tr.as_detections().boxes[0, 0] > before[0, 0] + 50  # Velocity carries it on
+
+    tr.hold()  # Motion gate: nothing changed
+    for _ in range(30):
+        tr.predict()
+    np.testing.assert_allclose(tr.as_detections().boxes, before, atol=1)
+
+
+def test_held_keyframes_are_not_misses():
+    tr = moving_tracker()
+    for _ in range(10):
+        tr.predict()
+        tr.hold()
+    assert tr.misses == [0] and len(tr.as_detections()) == 1